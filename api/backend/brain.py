@@ -7,50 +7,92 @@ Google Gemini-powered financial analysis with strict JSON output.
 import os
 import json
 import time
+import random
+import asyncio
+import threading
 from typing import Dict, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+from api.backend.indicators import format_indicators
+from api.backend.context import (
+    PROMPT_TOKEN_BUDGET, FLASHCARD_TOKEN_BUDGET, estimate_tokens, budget_sections, fit_section, fit_json
+)
+from api.backend.metrics import PROMPT_METRICS
+from api.backend.scoring import score_one
+from api.backend.cache import PersistentCache, TTLCache, content_key
+from api.backend.symbols import SYMBOL_INDEX
+from api.backend.identity import currency_for, get_cached_identity, store_identity
+
 load_dotenv()
 
 
+# Async LLM calls: one overall deadline across attempts, jittered exponential backoff
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "20"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_CAP = float(os.getenv("LLM_BACKOFF_CAP", "8"))
+
+
 # ============================================================================
-# RULE-BASED FALLBACK
+# LLM RESPONSE CACHE
 # ============================================================================
-def rule_based_verdict(market_data: dict) -> tuple:
-    """Fallback verdict using simple rules when AI is unavailable."""
-    sentiment = market_data.get('sentiment', {}).get('overall_score', 0)
-    pe = market_data.get('price', {}).get('pe', 50)
-    
-    if sentiment > 0.4 and pe < 50:
-        return "BUY", ["Strong positive sentiment", "Attractive valuation"]
-    elif sentiment < -0.2 or pe > 100:
-        return "SELL", ["Negative sentiment trend", "Valuation concerns"]
-    else:
-        return "WAIT", ["Mixed indicators", "Fairly valued"]
-
+# Keyed by sha256(model, prompt): byte-identical prompts skip Gemini entirely.
+# Set LLM_CACHE_PATH to a SQLite file to keep entries across restarts.
+LLM_CACHE = PersistentCache(
+    "llm",
+    ttl=float(os.getenv("LLM_CACHE_TTL", "900")),
+    max_size=int(os.getenv("LLM_CACHE_SIZE", "256")),
+    path=os.getenv("LLM_CACHE_PATH") or None
+)
 
-def generate_flashcard(ticker: str, user_context: dict, market_data: dict, deep_analysis: dict) -> dict:
-    """Generate a flashcard with AI analysis or fallback."""
-    
-    api_key = os.getenv("GOOGLE_API_KEY")
-    
-    # Use Fallback if no key
-    if not api_key:
-        signal, reasons = rule_based_verdict(market_data)
-        return {
-            "verdict": {"signal": signal, "confidence": 50, "action": "Review Fundamentals (Fallback)"},
-            "flashcard": {
-                "title": f"Algorithm Signal: {signal}",
-                "reasons": reasons + ["AI unavailable (Rule-based)"],
-                "evidence": {"key_data_points": [f"Sentiment: {market_data.get('sentiment', {}).get('overall_score')}", f"PE: {market_data.get('price', {}).get('pe')}"]}
-            },
-            "ai_explanation": "Verdict generated using rule-based metrics due to missing AI key."
-        }
 
-    # Configure Gemini
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.5-flash")
+# ============================================================================
+# RULE-BASED FALLBACK
+# ============================================================================
+def rule_based_verdict(market_data: dict) -> tuple:
+    """
+    Fallback verdict when AI is unavailable. With only sentiment and P/E
+    (no 'indicators' snapshot) the original thresholds apply: BUY above
+    0.4 sentiment with P/E under 50, SELL below -0.2 sentiment or P/E over
+    100, else WAIT. With indicators, the multi-factor scoring engine
+    (scoring.py) decides, adding momentum / volatility / volume.
+    """
+    if not market_data.get('indicators'):
+        sentiment = market_data.get('sentiment', {}).get('overall_score')
+        sentiment = 0 if sentiment is None else sentiment
+        pe = market_data.get('price', {}).get('pe')
+        pe = 50 if pe is None else pe
+
+        if sentiment > 0.4 and pe < 50:
+            return "BUY", ["Strong positive sentiment", "Attractive valuation"]
+        elif sentiment < -0.2 or pe > 100:
+            return "SELL", ["Negative sentiment trend", "Valuation concerns"]
+        else:
+            return "WAIT", ["Mixed indicators", "Fairly valued"]
+
+    result = score_one(
+        market_data.get('price', {}),
+        market_data.get('indicators'),
+        sentiment=market_data.get('sentiment', {}).get('overall_score', 0)
+    )
+    return result["signal"], result["reasons"]
+
+
+def _track_prompt(kind: str, prompt: str) -> str:
+    """Record the prompt's estimated token count (see /api/metrics)."""
+    PROMPT_METRICS.record(kind, estimate_tokens(prompt))
+    return prompt
+
+
+def _flashcard_prompt(ticker: str, market_data: dict, deep_analysis: dict) -> str:
+    # News gets up to 40% of the budget; deep data is compacted into the rest
+    news_items = market_data.get('sentiment', {}).get('news', [])
+    if isinstance(news_items, dict):
+        news_items = news_items.get('items', [])
+    news, news_tokens = fit_section(news_items, lambda n: n.get('title', ''),
+                                    int(FLASHCARD_TOKEN_BUDGET * 0.4), [ticker.split('.')[0]])
+    deep_data = fit_json(deep_analysis, FLASHCARD_TOKEN_BUDGET - news_tokens - 60)
     
     context_str = f"""
     STOCK: {ticker}
@@ -58,11 +100,12 @@ def generate_flashcard(ticker: str, user_context: dict, market_data: dict, deep_
     PE RATIO: {market_data.get('price', {}).get('pe')}
     SENTIMENT_SCORE: {market_data.get('sentiment', {}).get('overall_score')} (-1 to 1)
     
-    NEWS: {[n['title'] for n in market_data.get('sentiment', {}).get('news', {}).get('items', [])]}
-    DEEP DATA: {deep_analysis}
+    NEWS:
+{news}
+    DEEP DATA: {deep_data}
     """
     
-    prompt = f"""
+    return f"""
     Act as a hedge fund analyst.
     DATA: {context_str}
     
@@ -73,17 +116,24 @@ def generate_flashcard(ticker: str, user_context: dict, market_data: dict, deep_
       "ai_explanation": "..."
     }}
     """
-    
-    # Retry Logic (3 attempts)
-    for attempt in range(3):
-        try:
-            response = model.generate_content(prompt)
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            return json.loads(clean_text)
-        except:
-            time.sleep(1)
-            
-    # Final Fallback after retries
+
+
+def _flashcard_no_key(market_data: dict) -> dict:
+    """Rule-based flashcard used when there is no API key."""
+    signal, reasons = rule_based_verdict(market_data)
+    return {
+        "verdict": {"signal": signal, "confidence": 50, "action": "Review Fundamentals (Fallback)"},
+        "flashcard": {
+            "title": f"Algorithm Signal: {signal}",
+            "reasons": reasons + ["AI unavailable (Rule-based)"],
+            "evidence": {"key_data_points": [f"Sentiment: {market_data.get('sentiment', {}).get('overall_score')}", f"PE: {market_data.get('price', {}).get('pe')}"]}
+        },
+        "ai_explanation": "Verdict generated using rule-based metrics due to missing AI key."
+    }
+
+
+def _flashcard_busy(market_data: dict) -> dict:
+    """Rule-based flashcard used when every AI attempt failed."""
     signal, reasons = rule_based_verdict(market_data)
     return {
         "verdict": {"signal": signal, "confidence": 40, "action": "Caution Recommended"},
@@ -96,6 +146,54 @@ def generate_flashcard(ticker: str, user_context: dict, market_data: dict, deep_
     }
 
 
+def _clean_json(text: str) -> dict:
+    return json.loads(text.replace("```json", "").replace("```", "").strip())
+
+
+def generate_flashcard(ticker: str, user_context: dict, market_data: dict, deep_analysis: dict) -> dict:
+    """Generate a flashcard with AI analysis or fallback."""
+    
+    analyst = get_analyst("fast")
+    
+    # Use Fallback if no key
+    if not analyst.model:
+        return _flashcard_no_key(market_data)
+
+    prompt = _track_prompt("flashcard", _flashcard_prompt(ticker, market_data, deep_analysis))
+    
+    # Retry Logic (3 attempts)
+    for attempt in range(3):
+        try:
+            response = analyst.model.generate_content(prompt)
+            return _clean_json(response.text)
+        except:
+            time.sleep(1)
+            
+    # Final Fallback after retries
+    return _flashcard_busy(market_data)
+
+
+async def generate_flashcard_async(ticker: str, user_context: dict, market_data: dict,
+                                   deep_analysis: dict) -> dict:
+    """
+    Non-blocking generate_flashcard: overall deadline and jittered
+    exponential backoff that yields to the event loop.
+    """
+    analyst = get_analyst("fast")
+    if not analyst.model:
+        return _flashcard_no_key(market_data)
+
+    prompt = _track_prompt("flashcard", _flashcard_prompt(ticker, market_data, deep_analysis))
+    try:
+        text = await analyst._generate_async(prompt)
+        return _clean_json(text)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[BRAIN] Flashcard error: {e}")
+        return _flashcard_busy(market_data)
+
+
 # ============================================================================
 # FINANCIAL ANALYST CLASS
 # ============================================================================
@@ -105,26 +203,20 @@ class FinancialAnalyst:
     Analyzes stock data and returns structured investment verdicts.
     """
     
-    def __init__(self):
+    def __init__(self, model_name: str = "gemini-2.5-flash"):
         self.api_key = os.getenv("GOOGLE_API_KEY")
+        self.model_name = model_name
         self.model = None
         if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel("gemini-2.5-flash")
+            _configure_genai(self.api_key)
+            self.model = genai.GenerativeModel(self.model_name)
         else:
             print("[BRAIN] Warning: GOOGLE_API_KEY not found in environment")
 
-    def get_ticker_identity(self, ticker: str) -> Dict:
-        """
-        Get a Gen Z style identity/overview for the stock.
-        """
-        if not self.model:
-            return {
-                "overview": "API Key missing, can't roast this stock.",
-                "currency_symbol": "$",
-                "currency_code": "USD"
-            }
-            
+    # ------------------------------------------------------------------
+    # Prompts
+    # ------------------------------------------------------------------
+    def _identity_prompt(self, ticker: str) -> str:
         system_prompt = f"""You are a financial backend API. You MUST return data in valid, parseable JSON format only. Do not add markdown formatting like ```json or ```. Do not include any conversational text outside the JSON object.
 Analyze the stock ticker: '{ticker}'."""
 
@@ -142,25 +234,26 @@ Example Output:
 
 Target Ticker: {ticker}"""
 
-        try:
-            response = self.model.generate_content(f"{system_prompt}\n\n{user_prompt}")
-            return self._parse_response(response.text)
-            
-        except Exception as e:
-            print(f"[BRAIN] Identity error: {str(e)}")
-            return {
-                "overview": f"AI died trying to analyze {ticker}.",
-                "currency_symbol": "?",
-                "currency_code": "UNK"
-            }
+        return f"{system_prompt}\n\n{user_prompt}"
 
-    def search_ticker(self, query: str) -> Dict:
-        """
-        Identify the correct stock ticker from a user search query.
-        """
-        if not self.model:
-            return {"error": "AI not configured"}
-            
+    def _overview_prompt(self, ticker: str) -> str:
+        # Currency is already known locally; only ask for the prose
+        system_prompt = f"""You are a financial backend API. You MUST return data in valid, parseable JSON format only. Do not add markdown formatting like ```json or ```. Do not include any conversational text outside the JSON object.
+Analyze the stock ticker: '{ticker}'."""
+
+        user_prompt = f"""Return a JSON object with exactly this key:
+"overview": A 2-sentence summary of the company's current market sentiment. Be slightly witty or "gen z" style if the stock is volatile.
+
+Example Output:
+{{
+    "overview": "Zomato is rallying hard on profitability news, but high valuation makes conservative investors sweat."
+}}
+
+Target Ticker: {ticker}"""
+
+        return f"{system_prompt}\n\n{user_prompt}"
+
+    def _search_prompt(self, query: str) -> str:
         system_prompt = """You are a smart Stock Ticker Resolver for the NSE (India). Your goal is to convert company names into Yahoo Finance tickers, strictly favoring '.NS' for Indian stocks.
 
         CORE LOGIC:
@@ -194,30 +287,11 @@ Target Ticker: {ticker}"""
             "exchange": "NSE" or "NASDAQ" etc
         }}"""
         
-        try:
-            response = self.model.generate_content(f"{system_prompt}\n\n{user_prompt}")
-            return self._parse_response(response.text)
-        except Exception as e:
-            print(f"[BRAIN] Search error: {e}")
-            return {"error": "Search failed"}
-    
-    def analyze(self, context: str, analysis_type: str = "Investment Decision") -> Dict:
-        """
-        Analyze financial data and return structured verdict.
-        
-        Args:
-            context: Combined string of price, news, and social data
-            analysis_type: Type of analysis requested
-            
-        Returns:
-            Dict with verdict, confidence, reasons, and explanation
-        """
-        if not self.model:
-            return self._fallback_response("AI model not available - GOOGLE_API_KEY missing")
-        
-        try:
-            # System prompt enforcing strict JSON output
-            system_prompt = """You are a senior financial analyst at a prestigious hedge fund. 
+        return f"{system_prompt}\n\n{user_prompt}"
+
+    def _analysis_prompt(self, context: str) -> str:
+        # System prompt enforcing strict JSON output
+        system_prompt = """You are a senior financial analyst at a prestigious hedge fund. 
 You analyze stocks using fundamental analysis, technical indicators, news sentiment, and social media trends.
 
 CRITICAL INSTRUCTION: You MUST respond with ONLY valid JSON. No markdown, no code blocks, no explanation outside the JSON.
@@ -241,65 +315,407 @@ Guidelines:
 - Be specific in reasons, cite actual data points
 - Be concise and punchy in the explanation"""
 
-            # User prompt with the actual data
-            user_prompt = f"""Analyze this stock and provide your verdict:
+        # User prompt with the actual data
+        user_prompt = f"""Analyze this stock and provide your verdict:
 
 {context}
 
 Remember: Respond with ONLY the JSON object, no other text."""
 
+        return f"{system_prompt}\n\n{user_prompt}"
+
+    # ------------------------------------------------------------------
+    # Sync API
+    # ------------------------------------------------------------------
+    def get_ticker_identity(self, ticker: str) -> Dict:
+        """
+        Get a Gen Z style identity/overview for the stock.
+        Served from the persistent identity store when possible; currency
+        comes from the local exchange table so the LLM only writes prose.
+        """
+        cached = get_cached_identity(ticker)
+        if cached is not None:
+            return dict(cached)
+        if not self.model:
+            return self._identity_fallback(ticker, missing_key=True)
+
+        currency = currency_for(ticker)
+        try:
+            prompt = self._overview_prompt(ticker) if currency else self._identity_prompt(ticker)
+            response = self.model.generate_content(_track_prompt("identity", prompt))
+            return self._store_identity(ticker, response.text, currency)
+            
+        except Exception as e:
+            print(f"[BRAIN] Identity error: {str(e)}")
+            return self._identity_fallback(ticker)
+
+    def search_ticker(self, query: str) -> Dict:
+        """
+        Identify the correct stock ticker from a user search query.
+        The local symbol index answers first; the LLM only sees queries it
+        can't resolve confidently, and its answers are learned.
+        """
+        local = SYMBOL_INDEX.resolve(query)
+        if local:
+            return local
+        
+        if not self.model:
+            return {"error": "AI not configured"}
+        
+        try:
+            response = self.model.generate_content(_track_prompt("search", self._search_prompt(query)))
+            result = self._parse_response(response.text)
+            SYMBOL_INDEX.learn(query, result)
+            return result
+        except Exception as e:
+            print(f"[BRAIN] Search error: {e}")
+            return {"error": "Search failed"}
+    
+    def analyze(self, context: str, analysis_type: str = "Investment Decision") -> Dict:
+        """
+        Analyze financial data and return structured verdict.
+        
+        Args:
+            context: Combined string of price, news, and social data
+            analysis_type: Type of analysis requested
+            
+        Returns:
+            Dict with verdict, confidence, reasons, and explanation
+        """
+        if not self.model:
+            return self._fallback_response("AI model not available - GOOGLE_API_KEY missing")
+        
+        try:
+            full_prompt = self._analysis_prompt(context)
+            
+            # Serve byte-identical prompts from the response cache
+            cache_key = content_key(self.model_name, full_prompt)
+            cached = LLM_CACHE.get(cache_key)
+            if cached is not None:
+                return {**cached, "cache": "hit"}
+            
             # Generate response using Gemini
-            full_prompt = f"{system_prompt}\n\n{user_prompt}"
-            response = self.model.generate_content(full_prompt)
+            response = self.model.generate_content(_track_prompt("analysis", full_prompt))
             
-            # Parse JSON from response
-            return self._parse_response(response.text)
+            # Parse JSON from response; only clean parses are cached
+            return self._store_analysis(cache_key, response.text)
             
         except Exception as e:
             print(f"[BRAIN] Analysis error: {str(e)}")
             return self._fallback_response(str(e))
+
+    # ------------------------------------------------------------------
+    # Async API (non-blocking, deadlines + jittered backoff)
+    # ------------------------------------------------------------------
+    async def _generate_async(self, prompt: str, deadline: Optional[float] = None,
+                              retries: Optional[int] = None) -> str:
+        """
+        Call Gemini without blocking the event loop. All attempts share one
+        `deadline` (seconds): each gets only the time that is left, and failed
+        attempts back off exponentially with full jitter via asyncio.sleep,
+        never sleeping past the deadline. Raises the last error when out of
+        retries or time.
+        """
+        loop = asyncio.get_running_loop()
+        give_up = loop.time() + (LLM_DEADLINE if deadline is None else deadline)
+        retries = LLM_RETRIES if retries is None else retries
+        last_error: Optional[Exception] = None
+        
+        for attempt in range(max(1, retries)):
+            remaining = give_up - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                response = await asyncio.wait_for(self.model.generate_content_async(prompt), timeout=remaining)
+                return response.text
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                last_error = e
+                print(f"[BRAIN] Attempt {attempt + 1} failed: {type(e).__name__}: {e}")
+                if attempt + 1 < retries:
+                    backoff = random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * 2 ** attempt))
+                    await asyncio.sleep(max(0.0, min(backoff, give_up - loop.time())))
+        
+        raise last_error or asyncio.TimeoutError("LLM deadline exceeded")
+
+    async def get_ticker_identity_async(self, ticker: str) -> Dict:
+        cached = get_cached_identity(ticker)
+        if cached is not None:
+            return dict(cached)
+        if not self.model:
+            return self._identity_fallback(ticker, missing_key=True)
+        currency = currency_for(ticker)
+        try:
+            prompt = self._overview_prompt(ticker) if currency else self._identity_prompt(ticker)
+            return self._store_identity(ticker, await self._generate_async(_track_prompt("identity", prompt)), currency)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[BRAIN] Identity error: {str(e)}")
+            return self._identity_fallback(ticker)
+
+    async def search_ticker_async(self, query: str) -> Dict:
+        local = SYMBOL_INDEX.resolve(query)
+        if local:
+            return local
+        if not self.model:
+            return {"error": "AI not configured"}
+        try:
+            result = self._parse_response(await self._generate_async(_track_prompt("search", self._search_prompt(query))))
+            SYMBOL_INDEX.learn(query, result)
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[BRAIN] Search error: {e}")
+            return {"error": "Search failed"}
+
+    async def analyze_async(self, context: str, analysis_type: str = "Investment Decision") -> Dict:
+        """Non-blocking analyze(); shares the same response cache."""
+        if not self.model:
+            return self._fallback_response("AI model not available - GOOGLE_API_KEY missing")
+        
+        full_prompt = self._analysis_prompt(context)
+        cache_key = content_key(self.model_name, full_prompt)
+        cached = LLM_CACHE.get(cache_key)
+        if cached is not None:
+            return {**cached, "cache": "hit"}
+        
+        return await self._analyze_uncached(_track_prompt("analysis", full_prompt), cache_key)
+
+    async def _analyze_uncached(self, full_prompt: str, cache_key: str) -> Dict:
+        """Generate (with retries) and store; the caller checked the cache and recorded the prompt."""
+        try:
+            text = await self._generate_async(full_prompt)
+            return self._store_analysis(cache_key, text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[BRAIN] Analysis error: {str(e)}")
+            return self._fallback_response(str(e))
+
+    async def analyze_stream(self, context: str):
+        """
+        Stream an analysis. Yields ("token", text) for each chunk the model
+        produces, then exactly one ("analysis", result) with the parsed verdict.
+        Cache hits skip straight to the analysis event. If the stream fails
+        before any token arrives, falls back to a plain call (with retries).
+        """
+        if not self.model:
+            yield "analysis", self._fallback_response("AI model not available - GOOGLE_API_KEY missing")
+            return
+        
+        full_prompt = self._analysis_prompt(context)
+        cache_key = content_key(self.model_name, full_prompt)
+        cached = LLM_CACHE.get(cache_key)
+        if cached is not None:
+            yield "analysis", {**cached, "cache": "hit"}
+            return
+        
+        parts = []
+        _track_prompt("analysis", full_prompt)
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(full_prompt, stream=True), timeout=LLM_DEADLINE
+            )
+            async for chunk in response:
+                text = chunk.text
+                if text:
+                    parts.append(text)
+                    yield "token", text
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[BRAIN] Stream error: {e}")
+            if not parts:
+                yield "analysis", await self._analyze_uncached(full_prompt, cache_key)
+            else:
+                yield "analysis", self._fallback_response(str(e))
+            return
+        
+        yield "analysis", self._store_analysis(cache_key, "".join(parts))
+
+    # ------------------------------------------------------------------
+    # Batch API (many tickers, one model call)
+    # ------------------------------------------------------------------
+    def _batch_prompt(self, contexts: Dict[str, str]) -> str:
+        # Reuse the single-ticker instructions so verdict rules stay identical
+        system_prompt = self._analysis_prompt("").split("\n\nAnalyze this stock")[0]
+        sections = "\n\n".join(f"### TICKER: {ticker}\n{context.strip()}" for ticker, context in contexts.items())
+        user_prompt = f"""Analyze EACH of the following {len(contexts)} stocks independently.
+
+{sections}
+
+Respond with ONLY one JSON object whose keys are exactly these tickers: {json.dumps(list(contexts))}.
+Each value must be a verdict object with the structure described above. No other text."""
+        return f"{system_prompt}\n\n{user_prompt}"
+
+    def _split_batch(self, contexts: Dict[str, str], response_text: str) -> tuple:
+        """Return ({ticker: verdict} for valid entries, [malformed tickers])."""
+        try:
+            payload = json.loads(self._strip_markdown(response_text))
+        except json.JSONDecodeError as e:
+            print(f"[BRAIN] Batch JSON parse error: {e}")
+            payload = {}
+        if not isinstance(payload, dict):
+            payload = {}
+        
+        # Models sometimes change key casing; match case-insensitively
+        by_upper = {str(key).upper(): value for key, value in payload.items()}
+        results, malformed = {}, []
+        for ticker in contexts:
+            result = self._valid_verdict(by_upper.get(ticker.upper()))
+            if result is None:
+                malformed.append(ticker)
+            else:
+                results[ticker] = {**result, "cache": "miss", "batched": True}
+        return results, malformed
+
+    def analyze_batch(self, contexts: Dict[str, str]) -> Dict[str, Dict]:
+        """
+        Analyze several tickers ({ticker: context}) in one model call.
+        Entries that come back malformed are retried individually via analyze().
+        """
+        if not self.model:
+            return {ticker: self.analyze(context) for ticker, context in contexts.items()}
+        
+        try:
+            response = self.model.generate_content(_track_prompt("batch", self._batch_prompt(contexts)))
+            results, malformed = self._split_batch(contexts, response.text)
+        except Exception as e:
+            print(f"[BRAIN] Batch analysis error: {e}")
+            results, malformed = {}, list(contexts)
+        
+        for ticker in malformed:
+            results[ticker] = self.analyze(contexts[ticker])
+        return {ticker: results[ticker] for ticker in contexts}
+
+    async def analyze_batch_async(self, contexts: Dict[str, str]) -> Dict[str, Dict]:
+        """Non-blocking analyze_batch; malformed entries are retried concurrently."""
+        if not self.model:
+            return {ticker: self._fallback_response("AI model not available - GOOGLE_API_KEY missing") for ticker in contexts}
+        
+        try:
+            text = await self._generate_async(_track_prompt("batch", self._batch_prompt(contexts)))
+            results, malformed = self._split_batch(contexts, text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[BRAIN] Batch analysis error: {e}")
+            results, malformed = {}, list(contexts)
+        
+        if malformed:
+            print(f"[BRAIN] Retrying {len(malformed)} malformed batch entries individually")
+            retried = await asyncio.gather(*(self.analyze_async(contexts[t]) for t in malformed))
+            results.update(zip(malformed, retried))
+        return {ticker: results[ticker] for ticker in contexts}
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _store_analysis(self, cache_key: str, response_text: str) -> Dict:
+        """Parse a model answer; only clean parses go into the response cache."""
+        result = self._parse_response(response_text)
+        if "error" not in result:
+            LLM_CACHE.set(cache_key, result)
+        return {**result, "cache": "miss"}
+
+    def _store_identity(self, ticker: str, response_text: str, currency: Optional[Dict]) -> Dict:
+        """Build the identity from the LLM answer; only complete ones are stored."""
+        result = self._parse_response(response_text)
+        overview = result.get("overview")
+        if not isinstance(overview, str) or not overview.strip():
+            return self._identity_fallback(ticker)
+        
+        identity = {
+            "overview": overview.strip(),
+            "currency_symbol": result.get("currency_symbol") or "?",
+            "currency_code": result.get("currency_code") or "UNK"
+        }
+        if currency:
+            identity.update(currency)
+        store_identity(ticker, identity)
+        return identity
+
+    def _identity_fallback(self, ticker: str, missing_key: bool = False) -> Dict:
+        if missing_key:
+            fallback = {
+                "overview": "API Key missing, can't roast this stock.",
+                "currency_symbol": "$",
+                "currency_code": "USD"
+            }
+        else:
+            fallback = {
+                "overview": f"AI died trying to analyze {ticker}.",
+                "currency_symbol": "?",
+                "currency_code": "UNK"
+            }
+        # The currency is still right even when the prose isn't available
+        fallback.update(currency_for(ticker) or {})
+        return fallback
     
     def _parse_response(self, response_text: str) -> Dict:
         """Parse Gemini response and extract JSON."""
         try:
-            # Clean the response (remove markdown if present)
-            text = response_text.strip()
-            
-            # Remove markdown code blocks if present
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-            
-            text = text.strip()
-            
-            # Parse JSON
-            result = json.loads(text)
-            
-            # Validate required fields
-            required_fields = ["verdict", "confidence", "reasons", "ai_explanation"]
-            for field in required_fields:
-                if field not in result:
-                    result[field] = self._get_default_value(field)
-            
-            # Normalize verdict
-            if "verdict" in result and isinstance(result["verdict"], str):
-                result["verdict"] = result["verdict"].upper()
-                if result["verdict"] not in ["BUY", "SELL", "HOLD"]:
-                    result["verdict"] = "HOLD"
-            
-            # Ensure confidence is integer 0-100
-            if "confidence" in result:
-                result["confidence"] = max(0, min(100, int(result["confidence"])))
-            
-            return result
+            result = json.loads(self._strip_markdown(response_text))
+            return self._normalize_result(result)
             
         except json.JSONDecodeError as e:
             print(f"[BRAIN] JSON parse error: {str(e)}")
             print(f"[BRAIN] Raw response: {response_text[:500]}")
             return self._fallback_response("Failed to parse AI response")
+
+    def _strip_markdown(self, response_text: str) -> str:
+        # Clean the response (remove markdown if present)
+        text = response_text.strip()
+        
+        # Remove markdown code blocks if present
+        if text.startswith("```json"):
+            text = text[7:]
+        if text.startswith("```"):
+            text = text[3:]
+        if text.endswith("```"):
+            text = text[:-3]
+        
+        return text.strip()
+
+    def _normalize_result(self, result: Dict) -> Dict:
+        """Apply the verdict rules: defaults, verdict casing, confidence 0-100."""
+        # Validate required fields
+        required_fields = ["verdict", "confidence", "reasons", "ai_explanation"]
+        for field in required_fields:
+            if field not in result:
+                result[field] = self._get_default_value(field)
+        
+        # Normalize verdict
+        if "verdict" in result and isinstance(result["verdict"], str):
+            result["verdict"] = result["verdict"].upper()
+            if result["verdict"] not in ["BUY", "SELL", "HOLD"]:
+                result["verdict"] = "HOLD"
+        
+        # Ensure confidence is integer 0-100
+        if "confidence" in result:
+            result["confidence"] = max(0, min(100, int(result["confidence"])))
+        
+        return result
+
+    def _valid_verdict(self, result) -> Optional[Dict]:
+        """
+        Strict check for one entry of a batch answer: must be an object with
+        a BUY/SELL/HOLD verdict and a numeric confidence. Returns the
+        normalized result, or None if the entry is malformed.
+        """
+        if not isinstance(result, dict):
+            return None
+        verdict = result.get("verdict")
+        if not isinstance(verdict, str) or verdict.upper() not in ("BUY", "SELL", "HOLD"):
+            return None
+        try:
+            int(result.get("confidence"))
+        except (TypeError, ValueError):
+            return None
+        return self._normalize_result(result)
     
     def _get_default_value(self, field: str):
         """Get default value for missing fields."""
@@ -332,16 +748,62 @@ Remember: Respond with ONLY the JSON object, no other text."""
         }
 
 
+# ============================================================================
+# ANALYST REGISTRY
+# ============================================================================
+# Named model configurations; request handlers pick one by profile name.
+MODEL_PROFILES = {
+    "fast": os.getenv("GEMINI_FAST_MODEL", "gemini-2.5-flash"),
+    "deep": os.getenv("GEMINI_DEEP_MODEL", "gemini-2.5-pro"),
+}
+
+_analysts: Dict[str, FinancialAnalyst] = {}
+_registry_lock = threading.Lock()
+_configured_key: Optional[str] = None
+
+
+def _configure_genai(api_key: str) -> None:
+    """Call genai.configure once per process (again only if the key changes)."""
+    global _configured_key
+    with _registry_lock:
+        if _configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+
+
+def get_analyst(profile: str = "fast") -> FinancialAnalyst:
+    """
+    Process-wide FinancialAnalyst for a model profile, built on first use.
+    Unknown profiles fall back to "fast".
+    """
+    model_name = MODEL_PROFILES.get(profile, MODEL_PROFILES["fast"])
+    analyst = _analysts.get(model_name)
+    if analyst is None:
+        # Build outside the registry lock: __init__ takes it for configure()
+        candidate = FinancialAnalyst(model_name)
+        with _registry_lock:
+            analyst = _analysts.setdefault(model_name, candidate)
+    return analyst
+
+
+def warm_up(profiles: Optional[list] = None) -> None:
+    """Build the analysts up front so no request pays client setup cost."""
+    for profile in profiles or list(MODEL_PROFILES):
+        analyst = get_analyst(profile)
+        print(f"[BRAIN] Warmed up '{profile}' analyst ({analyst.model_name})")
+
+
 # ============================================================================
 # QUICK ANALYSIS FUNCTION (for simple use cases)
 # ============================================================================
-def quick_analyze(ticker: str, price_data: Dict, news: str, social: str) -> Dict:
+def build_context(ticker: str, price_data: Dict, news, social,
+                  indicators: Optional[Dict] = None, budget: Optional[int] = None) -> str:
     """
-    Quick analysis function that combines all data and runs through AI.
+    Build the analysis context string from fetched data.
+    news / social are item lists (see scrapers.get_news_items) or plain
+    strings; either way they are fitted into what is left of the token
+    budget (PROMPT_TOKEN_BUDGET) after the fixed sections.
     """
-    analyst = FinancialAnalyst()
-    
-    # Build context string
     currency = price_data.get("currency", "$")
     price = price_data.get("price", "N/A")
     change = price_data.get("change_percent", 0)
@@ -354,10 +816,13 @@ Current Price: {currency}{price}
 Daily Change: {change}%
 
 RECENT NEWS:
-{news}
+{{news}}
 
 SOCIAL SENTIMENT (Reddit/Twitter):
-{social}
+{{social}}
+
+TECHNICAL INDICATORS (daily):
+{format_indicators(indicators or {})}
 
 Additional Data:
 - Market Cap: {price_data.get('market_cap', 'N/A')}
@@ -365,11 +830,183 @@ Additional Data:
 - 52-Week Low: {price_data.get('52_week_low', 'N/A')}
 - Volume: {price_data.get('volume', 'N/A')}
 """
-    
-    return analyst.analyze(context)
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    terms = [ticker.split(".")[0], str(price_data.get("name") or "").split(" ")[0]]
+    news_text, social_text = budget_sections(news, social, budget - estimate_tokens(context), terms)
+    return context.replace("{news}", news_text, 1).replace("{social}", social_text, 1)
+
+
+def quick_analyze(ticker: str, price_data: Dict, news, social,
+                  indicators: Optional[Dict] = None, profile: str = "fast") -> Dict:
+    """
+    Quick analysis function that combines all data and runs through AI.
+    """
+    analyst = get_analyst(profile)
+    return analyst.analyze(build_context(ticker, price_data, news, social, indicators))
+
+
+async def quick_analyze_async(ticker: str, price_data: Dict, news, social,
+                              indicators: Optional[Dict] = None, profile: str = "fast") -> Dict:
+    """Non-blocking quick_analyze for async request handlers."""
+    analyst = get_analyst(profile)
+    return await analyst.analyze_async(build_context(ticker, price_data, news, social, indicators))
+
+
+async def quick_analyze_stream(ticker: str, price_data: Dict, news, social,
+                               indicators: Optional[Dict] = None, profile: str = "fast"):
+    """Streaming quick_analyze: yields ("token", text) ... then ("analysis", result)."""
+    analyst = get_analyst(profile)
+    async for event in analyst.analyze_stream(build_context(ticker, price_data, news, social, indicators)):
+        yield event
+
+
+# ============================================================================
+# LATENCY SLO
+# ============================================================================
+# Default latency budget for an analysis in ms (0 = wait for the LLM)
+ANALYZE_SLO_MS = float(os.getenv("ANALYZE_SLO_MS", "0"))
+
+# Latest finished LLM verdict per ticker, for polls and for later requests
+# that miss their budget (their prompt rarely matches the LLM cache byte-for-byte)
+VERDICT_STORE = TTLCache(
+    "verdicts",
+    ttl=float(os.getenv("VERDICT_TTL", "900")),
+    max_size=int(os.getenv("VERDICT_STORE_SIZE", "512"))
+)
+
+# A stored verdict younger than this is served as-is, without a new LLM
+# call (0 = always ask the LLM). Pairs with PREFETCH_VERDICT.
+VERDICT_REUSE_SECONDS = float(os.getenv("VERDICT_REUSE_SECONDS", "0"))
+
+# LLM calls that outlived their request, by ticker. Strong references keep
+# the tasks alive; they remove themselves when done.
+_PENDING_VERDICTS: Dict[str, "asyncio.Task"] = {}
+
+
+def rule_based_analysis(price_data: Dict, indicators: Optional[Dict] = None,
+                        sentiment: Optional[float] = None) -> Dict:
+    """Instant analysis-shaped verdict from the scoring engine, marked provisional."""
+    result = score_one(price_data, indicators, sentiment=sentiment)
+    atr_percent = (indicators or {}).get("atr_percent")
+    if atr_percent is None:
+        risk = "MEDIUM"
+    else:
+        risk = "HIGH" if atr_percent > 4 else "MEDIUM" if atr_percent > 2 else "LOW"
+    return {
+        "verdict": "HOLD" if result["signal"] == "WAIT" else result["signal"],
+        "confidence": result["confidence"],
+        "reasons": result["reasons"],
+        "ai_explanation": "Quick rule-based read on momentum, volatility, volume and valuation. "
+                          "The full AI analysis is still running and will replace this verdict.",
+        "risk_level": risk,
+        "target_price": None,
+        "timeframe": "Short-term",
+        "provisional": True,
+        "source": "rules"
+    }
+
+
+def _record_verdict(ticker: str, task: "asyncio.Task") -> None:
+    if _PENDING_VERDICTS.get(ticker) is task:
+        del _PENDING_VERDICTS[ticker]
+    if task.cancelled() or task.exception() is not None:
+        return
+    result = task.result()
+    if "error" not in result:
+        VERDICT_STORE.set(ticker, {**result, "completed_at": time.time()})
+
+
+def verdict_status(ticker: str) -> Dict:
+    """Poll result: 'ready' (with the analysis), 'pending' or 'unknown'."""
+    ticker = ticker.upper()
+    stored = VERDICT_STORE.get(ticker)
+    if ticker in _PENDING_VERDICTS:
+        return {"ticker": ticker, "status": "pending", "analysis": stored}
+    if stored is not None:
+        return {"ticker": ticker, "status": "ready", "analysis": stored}
+    return {"ticker": ticker, "status": "unknown", "analysis": None}
+
+
+async def quick_analyze_slo(ticker: str, price_data: Dict, news, social,
+                            indicators: Optional[Dict] = None, slo_ms: Optional[float] = None,
+                            profile: str = "fast", sentiment: Optional[float] = None,
+                            reuse: bool = True) -> Dict:
+    """
+    quick_analyze_async under a latency budget. If the LLM hasn't answered
+    within slo_ms, returns the latest stored LLM verdict for the ticker or,
+    failing that, the rule-based one (marked provisional; sentiment is the
+    Market Pulse overall_score, if known). The LLM call keeps running; its
+    result lands in the response cache and VERDICT_STORE (see verdict_status).
+    With reuse, a stored verdict younger than VERDICT_REUSE_SECONDS is
+    returned without calling the LLM at all.
+    """
+    ticker = ticker.upper()
+    slo_ms = ANALYZE_SLO_MS if slo_ms is None else slo_ms
+
+    stored = VERDICT_STORE.get(ticker)
+    if reuse and stored is not None and time.time() - stored["completed_at"] < VERDICT_REUSE_SECONDS:
+        return {**stored, "provisional": False, "source": "stored"}
+
+    task = _PENDING_VERDICTS.get(ticker)
+    if task is None:
+        task = asyncio.ensure_future(quick_analyze_async(ticker, price_data, news, social, indicators, profile))
+        _PENDING_VERDICTS[ticker] = task
+        task.add_done_callback(lambda t: _record_verdict(ticker, t))
+
+    if slo_ms <= 0:
+        return await asyncio.shield(task)
+
+    done, _ = await asyncio.wait({task}, timeout=slo_ms / 1000)
+    if done:
+        return task.result()
+
+    stored = VERDICT_STORE.get(ticker)
+    if stored is not None:
+        # A finished LLM verdict from the last VERDICT_TTL seconds is the upgrade
+        return {**stored, "provisional": False, "source": "previous"}
+    return rule_based_analysis(price_data, indicators, sentiment)
+
+
+# ============================================================================
+# BATCH ANALYSIS
+# ============================================================================
+# Tickers packed into one prompt; larger lists are split into chunks
+BATCH_ANALYZE_CHUNK = int(os.getenv("BATCH_ANALYZE_CHUNK", "10"))
+
+
+async def batch_analyze(data_by_ticker: Dict[str, Dict], profile: str = "fast") -> Dict[str, Dict]:
+    """
+    Analyze many tickers with one model call per chunk.
+    data_by_ticker maps ticker -> fetch_all_data() output. Tickers without
+    a live price (emergency mock) are not sent to the model; they get the
+    fallback response instead of a verdict on made-up numbers.
+    """
+    analyst = get_analyst(profile)
+    contexts = {
+        ticker: build_context(ticker, data['price_data'], data.get('news_items') or data['news'],
+                              data.get('social_items') or data['social'], data.get('indicators'))
+        for ticker, data in data_by_ticker.items()
+        if data['price_data'].get('source') != "Emergency Mock"
+    }
+    tickers = list(contexts)
+    chunks = [tickers[i:i + BATCH_ANALYZE_CHUNK] for i in range(0, len(tickers), BATCH_ANALYZE_CHUNK)]
+    results: Dict[str, Dict] = {
+        ticker: analyst._fallback_response(f"No live price data for {ticker}")
+        for ticker in data_by_ticker if ticker not in contexts
+    }
+    for chunk_result in await asyncio.gather(
+        *(analyst.analyze_batch_async({t: contexts[t] for t in chunk}) for chunk in chunks)
+    ):
+        results.update(chunk_result)
+    return {ticker: results[ticker] for ticker in data_by_ticker}
 
 
 # ============================================================================
 # EXPORTS
 # ============================================================================
-__all__ = ['FinancialAnalyst', 'quick_analyze', 'generate_flashcard', 'rule_based_verdict']
+__all__ = [
+    'FinancialAnalyst', 'get_analyst', 'warm_up', 'build_context',
+    'quick_analyze', 'quick_analyze_async', 'quick_analyze_stream', 'quick_analyze_slo',
+    'verdict_status', 'rule_based_analysis', 'batch_analyze',
+    'generate_flashcard', 'generate_flashcard_async', 'rule_based_verdict'
+]
@@ -0,0 +1,359 @@
+"""
+TrackBets Backend - Cache Module
+================================
+In-process TTL cache with LRU eviction and stale-while-revalidate.
+Used to keep repeated quote/history lookups off the network.
+Also hosts SingleFlight, which coalesces concurrent identical calls, and
+a small SQLite-backed store for values that should survive restarts.
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+# Background refreshes run here so request threads never wait on them.
+_REFRESH_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CACHE_REFRESH_WORKERS", "4")),
+    thread_name_prefix="cache-refresh"
+)
+
+# All named caches, so their counters can be reported in one place.
+_REGISTRY: Dict[str, "TTLCache"] = {}
+_FLIGHTS: Dict[str, "SingleFlight"] = {}
+
+
+# ============================================================================
+# TTL CACHE
+# ============================================================================
+class TTLCache:
+    """
+    Thread-safe LRU cache where every entry has a fresh window (ttl) and an
+    optional stale window (stale_ttl) after it.
+
+    - fresh: returned as-is (hit)
+    - stale: returned immediately, refreshed in the background (stale hit)
+    - expired / absent: loaded synchronously (miss)
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0.0, max_size: int = 512):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "evictions": 0}
+        _REGISTRY[name] = self
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value if it is still fresh, else None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (value, now + ttl, now + ttl + self.stale_ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached value for key, calling loader() on a miss.
+        Stale entries are served immediately while loader() runs in the
+        background. Values rejected by should_cache are returned but not stored.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry:
+                value, fresh_until, stale_until = entry
+                if now < fresh_until:
+                    self._data.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                if now < stale_until:
+                    self._data.move_to_end(key)
+                    self._stats["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        _REFRESH_POOL.submit(self._refresh, key, loader, should_cache)
+                    return value
+                del self._data[key]
+            self._stats["misses"] += 1
+
+        value = loader()
+        if should_cache is None or should_cache(value):
+            self.set(key, value)
+        return value
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any],
+                 should_cache: Optional[Callable[[Any], bool]]) -> None:
+        """Reload a stale entry; on failure the stale value is left in place."""
+        try:
+            value = loader()
+            if should_cache is None or should_cache(value):
+                self.set(key, value)
+            with self._lock:
+                self._stats["refreshes"] += 1
+        except Exception as e:
+            print(f"[CACHE] {self.name} refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._data)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0.0
+        stats["ttl"] = self.ttl
+        stats["stale_ttl"] = self.stale_ttl
+        stats["max_size"] = self.max_size
+        return stats
+
+
+# ============================================================================
+# SINGLE-FLIGHT (REQUEST COALESCING)
+# ============================================================================
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key.
+    The first caller (the leader) runs fn(); everyone who arrives while it
+    is in flight waits for and receives the same result or exception.
+    Nothing is remembered once the call finishes - that is TTLCache's job.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "shared": 0}
+        self._tasks = set()
+        _FLIGHTS[name] = self
+
+    def _join(self, key: Hashable) -> tuple:
+        """Return (future, is_leader) for key."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["shared"] += 1
+                return future, False
+            future = Future()
+            # Mark running so a cancelled waiter can't cancel it for everyone.
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+            self._stats["leaders"] += 1
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], Any]) -> None:
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Blocking variant: run fn() once per key across threads."""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Async variant: the leader runs the blocking fn() in the default
+        executor; waiters await it without holding a thread.
+        """
+        future, leader = self._join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(None, self._run, key, future, fn)
+        return await asyncio.wrap_future(future)
+
+    async def do_coroutine(self, key: Hashable, coro_fn: Callable[[], Any]) -> Any:
+        """
+        Coroutine variant: the leader schedules coro_fn() as its own task, so
+        a disconnecting leader doesn't cancel the work for everyone else.
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(coro_fn())
+            self._tasks.add(task)
+            task.add_done_callback(lambda t: self._settle(key, future, t))
+        return await asyncio.wrap_future(future)
+
+    def _settle(self, key: Hashable, future: Future, task: "asyncio.Task") -> None:
+        self._tasks.discard(task)
+        try:
+            if task.cancelled():
+                future.set_exception(asyncio.CancelledError())
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+# ============================================================================
+# PERSISTENT KEY-VALUE STORE (SQLite)
+# ============================================================================
+class SQLiteKV:
+    """
+    Tiny string key -> JSON value store with per-entry expiry, in one
+    SQLite file. Bounded by max_rows (oldest writes are pruned first).
+    """
+
+    def __init__(self, path: str, table: str = "kv", max_rows: int = 10000):
+        self.path = path
+        self.table = table
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, written_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, written_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now)
+            )
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                "ORDER BY written_at DESC LIMIT -1 OFFSET ?)", (self.max_rows,)
+            )
+            conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            conn.commit()
+
+
+class PersistentCache:
+    """
+    Memory TTLCache in front of an optional SQLiteKV (path=None keeps it
+    memory-only). Disk hits are promoted into memory.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = 512,
+                 path: Optional[str] = None, max_rows: int = 10000):
+        self.ttl = ttl
+        self.memory = TTLCache(name, ttl=ttl, max_size=max_size)
+        self.disk = SQLiteKV(path, table=name, max_rows=max_rows) if path else None
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except (sqlite3.Error, ValueError) as e:
+                print(f"[CACHE] {self.memory.name} disk read failed: {e}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value, self.ttl)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                print(f"[CACHE] {self.memory.name} disk write failed: {e}")
+
+    def invalidate(self, key: str) -> None:
+        self.memory.invalidate(key)
+        if self.disk is not None:
+            try:
+                self.disk.delete(key)
+            except sqlite3.Error as e:
+                print(f"[CACHE] {self.memory.name} disk delete failed: {e}")
+
+
+def content_key(*parts: str) -> str:
+    """Stable content address (sha256) for a sequence of strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def cache_stats() -> Dict:
+    """Hit/miss counters for every named cache and single-flight group."""
+    stats = {name: cache.stats() for name, cache in _REGISTRY.items()}
+    for name, flight in _FLIGHTS.items():
+        stats[name] = flight.stats()
+    return stats
+
+
+__all__ = ['TTLCache', 'SingleFlight', 'SQLiteKV', 'PersistentCache', 'content_key', 'cache_stats']
@@ -0,0 +1,247 @@
+"""
+TrackBets Backend - Prompt Context Module
+=========================================
+Token-budgeted context for LLM prompts. News and social items are merged
+when their headlines are near-duplicates, ranked by recency / relevance /
+reach, and added to the prompt until their share of the budget is spent.
+Token counts come from a local estimator (no tokenizer download).
+"""
+
+import os
+import re
+import json
+import math
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+# Budget for the data part of one analysis prompt (instructions excluded)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+FLASHCARD_TOKEN_BUDGET = int(os.getenv("FLASHCARD_TOKEN_BUDGET", "900"))
+
+# Most of the budget left after the fixed sections that social may take;
+# whatever it doesn't use rolls over to news
+SOCIAL_BUDGET_SHARE = float(os.getenv("SOCIAL_BUDGET_SHARE", "0.4"))
+
+# Recency weight halves every NEWS_HALF_LIFE_HOURS
+NEWS_HALF_LIFE_HOURS = float(os.getenv("NEWS_HALF_LIFE_HOURS", "24"))
+
+# Word-set Jaccard similarity at which two headlines are the same story
+DUPLICATE_SIMILARITY = float(os.getenv("DUPLICATE_SIMILARITY", "0.6"))
+
+_PIECE = re.compile(r"[A-Za-z]+|\d+|\S")
+_WORD = re.compile(r"[a-z0-9]+")
+_FILLER = {"a", "an", "the", "of", "to", "in", "on", "for", "and", "is", "as", "at", "with", "by", "its", "after"}
+
+
+# ============================================================================
+# TOKEN ESTIMATE
+# ============================================================================
+def estimate_tokens(text: str) -> int:
+    """Rough BPE-style count: ~4 letters or 3 digits per token, 1 per symbol."""
+    count = 0
+    for piece in _PIECE.findall(text or ""):
+        if piece[0].isalpha():
+            count += -(-len(piece) // 4)
+        elif piece[0].isdigit():
+            count += -(-len(piece) // 3)
+        else:
+            count += 1
+    return count
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut text at a line (or, failing that, word) boundary to fit budget."""
+    if estimate_tokens(text) <= budget:
+        return text
+    kept, used = [], 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    if kept:
+        return "\n".join(kept)
+    words, used = [], 0
+    for word in text.split():
+        used += estimate_tokens(word)
+        if used > max(0, budget - 1):
+            break
+        words.append(word)
+    return " ".join(words) + " ..."
+
+
+# ============================================================================
+# DEDUPE + RANKING
+# ============================================================================
+def title_words(title: str) -> set:
+    """Lowercase content words of a headline, for similarity checks."""
+    return {w for w in _WORD.findall(title.lower()) if w not in _FILLER}
+
+
+def similarity(words: set, other_words: set) -> float:
+    """Jaccard similarity of two title_words() sets."""
+    union = words | other_words
+    return len(words & other_words) / len(union) if union else 0.0
+
+
+def dedupe(items: List[Dict]) -> List[Dict]:
+    """
+    Merge near-identical headlines, keeping the first (most relevant) copy
+    with the latest publish time; each kept item gets a 'coverage' count
+    (items that are already clusters bring their own).
+    """
+    kept: List[tuple] = []
+    for item in items:
+        words = title_words(item.get("title", ""))
+        for other_words, other in kept:
+            if similarity(words, other_words) >= DUPLICATE_SIMILARITY:
+                other["coverage"] += item.get("coverage", 1)
+                # The story is as fresh as its latest copy
+                if (item.get("published") or "") > (other.get("published") or ""):
+                    other["published"] = item["published"]
+                break
+        else:
+            kept.append((words, {**item, "coverage": item.get("coverage", 1)}))
+    return [item for _, item in kept]
+
+
+def _age_hours(published: Optional[str], now: datetime) -> Optional[float]:
+    if not published:
+        return None
+    try:
+        when = datetime.fromisoformat(published)
+    except (TypeError, ValueError):
+        return None
+    reference = datetime.now(when.tzinfo) if when.tzinfo else now
+    return max(0.0, (reference - when).total_seconds() / 3600)
+
+
+def rank_items(items: List[Dict], terms: List[str]) -> List[Dict]:
+    """
+    Dedupe, then order by a blend of recency (exponential decay), relevance
+    (upstream position, mentions of the search terms) and reach (upvotes or
+    number of outlets carrying the story).
+    """
+    now = datetime.now()
+    terms = [t.lower() for t in terms if t]
+    scored = []
+    for position, item in enumerate(dedupe(items)):
+        age = _age_hours(item.get("published"), now)
+        recency = 0.5 if age is None else 0.5 ** (age / NEWS_HALF_LIFE_HOURS)
+
+        title = item.get("title", "").lower()
+        relevance = 1.0 / (1.0 + 0.25 * position)
+        if any(term in title for term in terms):
+            relevance = min(1.0, relevance + 0.5)
+
+        reach = min(1.0, (item["coverage"] - 1) / 3)
+        if item.get("upvotes") is not None:
+            reach = max(reach, min(1.0, math.log1p(max(0, item["upvotes"])) / math.log1p(1000)))
+
+        score = 0.35 * recency + 0.45 * relevance + 0.2 * reach
+        scored.append((-score, position, {**item, "age_hours": age}))
+    return [item for _, _, item in sorted(scored, key=lambda entry: entry[:2])]
+
+
+# ============================================================================
+# SECTIONS
+# ============================================================================
+def _age_label(age: Optional[float]) -> str:
+    if age is None:
+        return ""
+    if age < 1:
+        return " (<1h ago)"
+    if age < 48:
+        return f" ({int(age)}h ago)"
+    return f" ({int(age // 24)}d ago)"
+
+
+def render_news(item: Dict) -> str:
+    line = f"[{item.get('source') or 'Unknown'}] {item.get('title', '')}{_age_label(item.get('age_hours'))}"
+    if item.get("coverage", 1) > 1:
+        line += f" (+{item['coverage'] - 1} similar)"
+    return line
+
+
+def render_social(item: Dict) -> str:
+    if item.get("subreddit"):
+        return (f"[r/{item['subreddit']}] ({item.get('sentiment', '🟡 Neutral')}) {item.get('title', '')}"
+                f" | ⬆️ {item.get('upvotes', 0)}{_age_label(item.get('age_hours'))}")
+    return f"[Reddit] {item.get('title', '')}"
+
+
+def fit_section(items: Union[str, List[Dict]], render: Callable[[Dict], str],
+                budget: int, terms: List[str]) -> tuple:
+    """
+    Numbered lines for the best-ranked items that fit in budget tokens.
+    Plain strings (legacy or fallback text) are only truncated.
+    Returns (text, tokens_used).
+    """
+    if isinstance(items, str):
+        text = truncate_to_tokens(items, budget)
+        return text, estimate_tokens(text)
+
+    lines, used, omitted = [], 0, 0
+    for item in rank_items(items, terms):
+        line = render(item)
+        cost = estimate_tokens(line) + 2
+        if used + cost > budget:
+            omitted += 1
+            continue
+        lines.append(line)
+        used += cost
+    text = "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1))
+    if omitted:
+        text += f"\n({omitted} lower-ranked items omitted)"
+    return text, estimate_tokens(text)
+
+
+def _needed(items: Union[str, List[Dict]], render: Callable[[Dict], str]) -> int:
+    if isinstance(items, str):
+        return estimate_tokens(items)
+    return sum(estimate_tokens(render(item)) + 2 for item in items)
+
+
+def budget_sections(news: Union[str, List[Dict]], social: Union[str, List[Dict]],
+                    budget: int, terms: List[str]) -> tuple:
+    """
+    Split budget between news and social (social capped at its share,
+    unused tokens roll over) and fit both. Returns (news_text, social_text).
+    """
+    budget = max(0, budget)
+    social_budget = min(_needed(social, render_social), int(budget * SOCIAL_BUDGET_SHARE))
+    news_text, news_used = fit_section(news, render_news, budget - social_budget, terms)
+    social_text, _ = fit_section(social, render_social, budget - news_used, terms)
+    return news_text, social_text
+
+
+def fit_json(value: Any, budget: int) -> str:
+    """
+    Compact JSON for value within budget tokens: long strings and lists are
+    trimmed progressively, and the text is cut as a last resort.
+    """
+    def shrink(obj, max_chars: int, max_items: int):
+        if isinstance(obj, str):
+            return obj if len(obj) <= max_chars else obj[:max_chars] + "..."
+        if isinstance(obj, dict):
+            return {k: shrink(v, max_chars, max_items) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [shrink(v, max_chars, max_items) for v in list(obj)[:max_items]]
+        return obj
+
+    text = ""
+    for max_chars, max_items in ((400, 20), (200, 10), (100, 5), (50, 3), (20, 2)):
+        text = json.dumps(shrink(value, max_chars, max_items), ensure_ascii=False,
+                          separators=(",", ":"), default=str)
+        if estimate_tokens(text) <= budget:
+            return text
+    return truncate_to_tokens(text, budget)
+
+
+__all__ = [
+    'PROMPT_TOKEN_BUDGET', 'FLASHCARD_TOKEN_BUDGET', 'estimate_tokens', 'truncate_to_tokens',
+    'title_words', 'similarity', 'dedupe', 'rank_items', 'fit_section', 'budget_sections', 'fit_json',
+    'render_news', 'render_social'
+]
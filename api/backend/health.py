@@ -0,0 +1,194 @@
+"""
+TrackBets Backend - Provider Health Module
+==========================================
+Per-provider health tracking (rolling latency, error rate) with a circuit
+breaker and half-open probing. Used to route quote requests away from
+upstreams that are currently throttling or down.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_CONSECUTIVE = int(os.getenv("BREAKER_CONSECUTIVE", "3"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+
+# Providers above this error rate are tried after healthier ones
+DEGRADED_ERROR_RATE = float(os.getenv("DEGRADED_ERROR_RATE", "0.25"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _percentile_ms(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(q * len(sorted_values)))
+    return round(sorted_values[index] * 1000, 1)
+
+
+# ============================================================================
+# PROVIDER HEALTH
+# ============================================================================
+class ProviderHealth:
+    """
+    Rolling window of (ok, latency) samples plus a circuit breaker:
+    closed -> open after too many failures; open -> half_open after the
+    cooldown, letting a single probe through; the probe's outcome closes
+    or re-opens the breaker.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples = deque(maxlen=BREAKER_WINDOW)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    def _cooldown_over(self) -> bool:
+        return time.monotonic() - self.opened_at >= BREAKER_COOLDOWN
+
+    def available(self) -> bool:
+        """Could this provider be tried right now? (no side effects)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return self._cooldown_over()
+            return not self.probe_in_flight
+
+    def acquire(self) -> bool:
+        """Claim permission to call; in half-open only one probe is allowed."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self._cooldown_over():
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record(self, ok: bool, latency: float) -> None:
+        with self._lock:
+            self.samples.append((ok, latency))
+            self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = False
+                if ok:
+                    self.state = CLOSED
+                    self.samples.clear()
+                    self.samples.append((ok, latency))
+                else:
+                    self._open()
+                return
+
+            if self.state == CLOSED and not ok:
+                too_many = len(self.samples) >= BREAKER_MIN_CALLS and self.error_rate() >= BREAKER_ERROR_RATE
+                if too_many or self.consecutive_failures >= BREAKER_CONSECUTIVE:
+                    self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        print(f"[HEALTH] Circuit opened for {self.name}")
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latencies = sorted(latency for _, latency in self.samples)
+            snap = {
+                "state": self.state,
+                "calls": len(self.samples),
+                "error_rate": round(self.error_rate(), 3),
+                "consecutive_failures": self.consecutive_failures,
+                "latency_p50_ms": _percentile_ms(latencies, 0.50),
+                "latency_p95_ms": _percentile_ms(latencies, 0.95),
+            }
+            if self.state == OPEN:
+                snap["retry_in_s"] = round(max(0.0, BREAKER_COOLDOWN - (time.monotonic() - self.opened_at)), 1)
+            return snap
+
+
+# ============================================================================
+# ROUTER
+# ============================================================================
+class ProviderRouter:
+    """Keeps a ProviderHealth per provider name and orders calls by health."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._providers: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+
+    def health(self, provider: str) -> ProviderHealth:
+        with self._lock:
+            if provider not in self._providers:
+                self._providers[provider] = ProviderHealth(provider)
+            return self._providers[provider]
+
+    def ranked(self, providers: List[str]) -> List[str]:
+        """
+        Providers in the order they should be tried: healthy ones in their
+        declared priority, then degraded ones, then breakers due for a probe.
+        Open breakers still cooling down are skipped.
+        """
+        ranked = []
+        for index, provider in enumerate(providers):
+            health = self.health(provider)
+            if not health.available():
+                continue
+            if health.state != CLOSED:
+                rank = 2
+            elif health.error_rate() > DEGRADED_ERROR_RATE:
+                rank = 1
+            else:
+                rank = 0
+            ranked.append((rank, index, provider))
+        return [provider for _, _, provider in sorted(ranked)]
+
+    def call(self, provider: str, fn: Callable[[], Any]) -> Optional[Any]:
+        """
+        Run fn() through the provider's breaker. Only an exception (error,
+        timeout, throttling) counts as a failure. A None result means the
+        provider answered but has no data for this request (e.g. an unknown
+        symbol), which says nothing about its health and counts as a success.
+        Returns None in both cases.
+        """
+        health = self.health(provider)
+        if not health.acquire():
+            return None
+        start = time.monotonic()
+        ok = True
+        try:
+            result = fn()
+        except Exception as e:
+            print(f"[HEALTH] {provider} failed: {e}")
+            result, ok = None, False
+        health.record(ok, time.monotonic() - start)
+        return result
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            providers = dict(self._providers)
+        return {name: health.snapshot() for name, health in providers.items()}
+
+
+QUOTE_ROUTER = ProviderRouter("quotes")
+
+
+__all__ = ['ProviderHealth', 'ProviderRouter', 'QUOTE_ROUTER']
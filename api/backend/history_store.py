@@ -0,0 +1,187 @@
+"""
+TrackBets Backend - History Store Module
+========================================
+Persistent on-disk store of daily OHLCV bars, one .npy file per ticker.
+Bars are written once; later syncs only append the missing tail, and any
+period slice is served straight from disk (memory-mapped).
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+
+
+DATA_DIR = os.getenv("TRACKBETS_DATA_DIR", os.path.join(os.getcwd(), ".trackbets"))
+
+# How long a synced ticker is trusted before its tail is re-fetched (seconds)
+HISTORY_SYNC_INTERVAL = float(os.getenv("HISTORY_SYNC_INTERVAL", "3600"))
+
+BAR_DTYPE = np.dtype([
+    ("time", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+# yfinance-style period -> calendar days ("max" = everything)
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653,
+}
+
+
+def period_start(period: str, today: Optional[date] = None) -> Optional[date]:
+    """First calendar day covered by a period, or None for 'max'."""
+    today = today or date.today()
+    if period == "ytd":
+        return date(today.year, 1, 1)
+    if period == "max":
+        return None
+    return today - timedelta(days=PERIOD_DAYS.get(period, PERIOD_DAYS["1mo"]))
+
+
+def empty_bars() -> np.ndarray:
+    return np.empty(0, dtype=BAR_DTYPE)
+
+
+# ============================================================================
+# HISTORY STORE
+# ============================================================================
+class HistoryStore:
+    """
+    Ticker -> sorted structured array of daily bars, plus a small JSON
+    sidecar recording the source, covered range and last sync time.
+    Files are replaced atomically so readers never see a partial write.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _name(self, ticker: str) -> str:
+        return re.sub(r"[^A-Za-z0-9._^=&-]", "_", ticker.upper())
+
+    def _paths(self, ticker: str) -> tuple:
+        name = self._name(ticker)
+        return os.path.join(self.root, f"{name}.npy"), os.path.join(self.root, f"{name}.json")
+
+    def lock(self, ticker: str) -> threading.Lock:
+        """Per-ticker lock; hold it across a check-then-sync sequence."""
+        name = self._name(ticker)
+        with self._locks_guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def meta(self, ticker: str) -> Optional[Dict]:
+        _, meta_path = self._paths(ticker)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read(self, ticker: str, start: Optional[date] = None) -> np.ndarray:
+        """Bars on or after start (all bars if start is None)."""
+        bars_path, _ = self._paths(ticker)
+        try:
+            bars = np.load(bars_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return empty_bars()
+        if start is not None:
+            bars = bars[np.searchsorted(bars["time"], np.datetime64(start, "D")):]
+        # Copy out of the mapping so a concurrent rewrite can't affect callers
+        return np.array(bars)
+
+    def merge(self, ticker: str, new_bars: np.ndarray, source: str,
+              covered_from: Optional[date], backfill: bool) -> None:
+        """
+        Merge new bars into the stored series; new values win on overlapping
+        dates (the last stored bar may have been an intraday partial).
+        covered_from is the earliest date ever requested upstream; it only
+        moves on a backfill.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        bars_path, meta_path = self._paths(ticker)
+        existing = self.read(ticker)
+        old_meta = self.meta(ticker) or {}
+
+        if len(existing):
+            keep = existing[~np.isin(existing["time"], new_bars["time"])]
+            merged = np.concatenate([keep, new_bars])
+        else:
+            merged = new_bars
+        merged = merged[np.argsort(merged["time"], kind="stable")]
+
+        # covered_from of None means "max" - nothing earlier exists upstream
+        covered = covered_from.isoformat() if covered_from else None
+        if old_meta:
+            old_from = old_meta.get("covered_from")
+            if not backfill:
+                covered = old_from
+            elif old_from is None or covered is None:
+                covered = None
+            else:
+                covered = min(covered, old_from)
+
+        meta = {"source": source, "covered_from": covered, "synced_at": time.time(), "bars": int(len(merged))}
+
+        tmp_bars = bars_path + ".tmp"
+        with open(tmp_bars, "wb") as f:
+            np.save(f, merged)
+        os.replace(tmp_bars, bars_path)
+
+        tmp_meta = meta_path + ".tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    def plan_sync(self, ticker: str, period: str) -> Optional[tuple]:
+        """
+        Decide what (if anything) to fetch upstream for this period.
+        Returns None when the store already covers it, else
+        (fetch_from, covered_from, backfill) where fetch_from=None means 'max'.
+        """
+        start = period_start(period)
+        meta = self.meta(ticker)
+        if not meta:
+            return start, start, True
+
+        covered = meta.get("covered_from")
+        if covered is not None and (start is None or start.isoformat() < covered):
+            return start, start, True
+
+        if time.time() - meta.get("synced_at", 0) < HISTORY_SYNC_INTERVAL:
+            return None
+
+        bars = self.read(ticker)
+        if not len(bars):
+            return start, start, True
+        last = bars["time"][-1].astype(date)
+        # Re-fetch from the last stored bar: it may have been a partial day
+        return last, None, False
+
+
+def bars_from_columns(times, opens, highs, lows, closes, volumes) -> np.ndarray:
+    """Build a bar array from parallel column sequences."""
+    bars = np.empty(len(times), dtype=BAR_DTYPE)
+    bars["time"] = np.asarray(times, dtype="datetime64[D]")
+    bars["open"] = np.asarray(opens, dtype="f8")
+    bars["high"] = np.asarray(highs, dtype="f8")
+    bars["low"] = np.asarray(lows, dtype="f8")
+    bars["close"] = np.asarray(closes, dtype="f8")
+    bars["volume"] = np.asarray(volumes, dtype="f8")
+    return bars[~np.isnan(bars["close"])]
+
+
+HISTORY_STORE = HistoryStore(os.path.join(DATA_DIR, "history"))
+
+
+__all__ = ['HistoryStore', 'HISTORY_STORE', 'BAR_DTYPE', 'period_start', 'bars_from_columns', 'empty_bars']
@@ -0,0 +1,53 @@
+"""
+TrackBets Backend - HTTP Client Module
+======================================
+Shared, pooled keep-alive HTTP client for REST upstreams (Twelve Data etc).
+Reusing connections skips DNS + TCP + TLS on every call.
+"""
+
+import os
+import threading
+from typing import Dict, Optional
+
+
+# Pool sizing. requests pools connections per host, so HTTP_POOL_PER_HOST is
+# a hard per-host cap (callers block instead of opening extra sockets).
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "10"))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "10"))
+HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "TrackBets/1.0")
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# ============================================================================
+# SESSION (requests)
+# ============================================================================
+def get_session():
+    """Process-wide requests.Session with a bounded keep-alive pool."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_HOSTS,
+                    pool_maxsize=HTTP_POOL_PER_HOST,
+                    pool_block=True
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"User-Agent": HTTP_USER_AGENT})
+                _session = session
+    return _session
+
+
+def http_get(url: str, params: Optional[Dict] = None, timeout: float = 5):
+    """GET through the shared session. Raises like requests.get."""
+    return get_session().get(url, params=params, timeout=timeout)
+
+
+__all__ = ['get_session', 'http_get']
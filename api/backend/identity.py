@@ -0,0 +1,177 @@
+"""
+TrackBets Backend - Ticker Identity Module
+==========================================
+Long-lived store for ticker identities (overview prose + currency), which
+change rarely but cost a full LLM call to produce.
+
+Currency comes from a local exchange-suffix table whenever possible, so
+the LLM only writes the overview. Identities persist in SQLite across
+restarts, and can be prewarmed in bulk:
+
+    python -m api.backend.identity RELIANCE.NS TCS.NS AAPL
+    python -m api.backend.identity --listed --concurrency 8
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+from typing import Dict, Iterable, List, Optional
+
+from api.backend.cache import PersistentCache
+from api.backend.history_store import DATA_DIR
+from api.backend.symbols import SYMBOL_INDEX
+
+
+IDENTITY_TTL = float(os.getenv("IDENTITY_TTL", str(7 * 24 * 3600)))
+IDENTITY_CACHE_PATH = os.getenv("IDENTITY_CACHE_PATH", os.path.join(DATA_DIR, "identity.sqlite"))
+IDENTITY_PREWARM_CONCURRENCY = int(os.getenv("IDENTITY_PREWARM_CONCURRENCY", "4"))
+
+IDENTITY_CACHE = PersistentCache(
+    "identity",
+    ttl=IDENTITY_TTL,
+    max_size=int(os.getenv("IDENTITY_CACHE_SIZE", "1024")),
+    path=IDENTITY_CACHE_PATH or None,
+    max_rows=int(os.getenv("IDENTITY_CACHE_ROWS", "20000"))
+)
+
+
+# ============================================================================
+# CURRENCY TABLE
+# ============================================================================
+CURRENCY_SYMBOLS = {
+    "USD": "$", "INR": "₹", "GBP": "£", "EUR": "€", "JPY": "¥", "CNY": "¥",
+    "HKD": "HK$", "CAD": "C$", "AUD": "A$", "SGD": "S$", "CHF": "CHF",
+    "KRW": "₩", "BRL": "R$", "MXN": "$",
+}
+
+# Yahoo Finance exchange suffix -> ISO currency code
+EXCHANGE_CURRENCIES = {
+    ".NS": "INR", ".BO": "INR",
+    ".L": "GBP",
+    ".T": "JPY",
+    ".HK": "HKD",
+    ".SS": "CNY", ".SZ": "CNY",
+    ".TO": "CAD", ".V": "CAD",
+    ".AX": "AUD",
+    ".SI": "SGD",
+    ".SW": "CHF",
+    ".KS": "KRW", ".KQ": "KRW",
+    ".SA": "BRL",
+    ".MX": "MXN",
+    ".DE": "EUR", ".F": "EUR", ".PA": "EUR", ".AS": "EUR", ".MI": "EUR",
+    ".MC": "EUR", ".BR": "EUR", ".LS": "EUR", ".HE": "EUR", ".VI": "EUR",
+}
+
+
+def currency_for(ticker: str) -> Optional[Dict]:
+    """
+    {"currency_symbol", "currency_code"} from the ticker alone, or None
+    when it can't be told locally (unknown suffix or unlisted index).
+    """
+    ticker = ticker.strip().upper()
+    listed = SYMBOL_INDEX.lookup(ticker)
+    if listed and listed.get("currency"):
+        code = listed["currency"]
+    elif ticker.startswith("^"):
+        code = None
+    elif "." in ticker:
+        code = EXCHANGE_CURRENCIES.get("." + ticker.rsplit(".", 1)[1])
+    elif "-" in ticker:
+        # Crypto pairs quote in their second leg (BTC-USD); share classes (BRK-B) are US
+        leg = ticker.rsplit("-", 1)[1]
+        code = leg if leg in CURRENCY_SYMBOLS else ("USD" if len(leg) == 1 else None)
+    else:
+        # No suffix on Yahoo Finance means a US listing
+        code = "USD"
+
+    if not code or code not in CURRENCY_SYMBOLS:
+        return None
+    return {"currency_symbol": CURRENCY_SYMBOLS[code], "currency_code": code}
+
+
+# ============================================================================
+# STORE
+# ============================================================================
+def identity_key(ticker: str) -> str:
+    return ticker.strip().upper()
+
+
+def get_cached_identity(ticker: str) -> Optional[Dict]:
+    return IDENTITY_CACHE.get(identity_key(ticker))
+
+
+def store_identity(ticker: str, identity: Dict) -> None:
+    IDENTITY_CACHE.set(identity_key(ticker), identity)
+
+
+# ============================================================================
+# PREWARM
+# ============================================================================
+async def prewarm_identities(tickers: Iterable[str], concurrency: Optional[int] = None,
+                             force: bool = False) -> Dict[str, str]:
+    """
+    Populate identities for many tickers, at most `concurrency` LLM calls at
+    a time. Returns ticker -> "cached" | "stored" | "failed".
+    """
+    from api.backend.brain import get_analyst
+
+    analyst = get_analyst("fast")
+    limit = asyncio.Semaphore(concurrency or IDENTITY_PREWARM_CONCURRENCY)
+    tickers = list(dict.fromkeys(identity_key(t) for t in tickers if t.strip()))
+    if force:
+        for ticker in tickers:
+            IDENTITY_CACHE.invalidate(ticker)
+
+    async def warm(ticker: str) -> str:
+        if get_cached_identity(ticker) is not None:
+            return "cached"
+        async with limit:
+            await analyst.get_ticker_identity_async(ticker)
+        return "stored" if get_cached_identity(ticker) is not None else "failed"
+
+    results = await asyncio.gather(*(warm(t) for t in tickers), return_exceptions=True)
+    return {
+        ticker: result if isinstance(result, str) else "failed"
+        for ticker, result in zip(tickers, results)
+    }
+
+
+def _read_tickers(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.split(",")[0].strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prewarm the ticker identity cache.")
+    parser.add_argument("tickers", nargs="*", help="Tickers to warm (e.g. RELIANCE.NS AAPL)")
+    parser.add_argument("--file", help="File with one ticker per line (first CSV column)")
+    parser.add_argument("--listed", action="store_true", help="Warm every ticker in the bundled symbol index")
+    parser.add_argument("--concurrency", type=int, default=IDENTITY_PREWARM_CONCURRENCY)
+    parser.add_argument("--force", action="store_true", help="Regenerate even if cached")
+    args = parser.parse_args(argv)
+
+    tickers = list(args.tickers)
+    if args.file:
+        tickers += _read_tickers(args.file)
+    if args.listed:
+        tickers += SYMBOL_INDEX.tickers()
+    if not tickers:
+        parser.error("no tickers given")
+
+    results = asyncio.run(prewarm_identities(tickers, args.concurrency, args.force))
+    for ticker, status in results.items():
+        print(f"{ticker}: {status}")
+    failed = sum(1 for status in results.values() if status == "failed")
+    print(f"[IDENTITY] {len(results) - failed}/{len(results)} identities ready")
+    return 1 if failed else 0
+
+
+__all__ = [
+    'IDENTITY_CACHE', 'currency_for', 'get_cached_identity', 'store_identity',
+    'prewarm_identities'
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
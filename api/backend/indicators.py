@@ -0,0 +1,248 @@
+"""
+TrackBets Backend - Technical Indicators Module
+===============================================
+NumPy-vectorized indicators (RSI, MACD, SMA/EMA crossovers, Bollinger
+bands, ATR, volume z-score) computed over daily bars.
+
+Every function works along the last axis, so the same call handles one
+ticker (1-D series) or many tickers at once (2-D, one row per ticker,
+rows of equal length). Warm-up positions are NaN.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+
+# ============================================================================
+# BUILDING BLOCKS
+# ============================================================================
+def sma(x: np.ndarray, n: int) -> np.ndarray:
+    """
+    Simple moving average via cumulative sums. NaN bars (a missing volume
+    or high/low) are skipped: each window averages its valid values, and
+    is NaN only when it has none.
+    """
+    x = np.asarray(x, dtype="f8")
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < n:
+        return out
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=-1)
+    ccount = np.cumsum(valid, axis=-1)
+    sums = csum[..., n - 1:].copy()
+    counts = ccount[..., n - 1:].copy()
+    sums[..., 1:] -= csum[..., :-n]
+    counts[..., 1:] -= ccount[..., :-n]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[..., n - 1:] = np.where(counts > 0, sums / counts, np.nan)
+    return out
+
+
+def rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    """Population rolling standard deviation (matches Bollinger convention)."""
+    x = np.asarray(x, dtype="f8")
+    mean = sma(x, n)
+    mean_sq = sma(x * x, n)
+    return np.sqrt(np.clip(mean_sq - mean * mean, 0.0, None))
+
+
+def _smooth(x: np.ndarray, n: int, alpha: float) -> np.ndarray:
+    """
+    Exponential smoothing seeded with the SMA of the first n values.
+    A NaN bar carries the previous value forward instead of poisoning
+    everything after it.
+    """
+    x = np.asarray(x, dtype="f8")
+    out = np.full(x.shape, np.nan)
+    length = x.shape[-1]
+    if length < n:
+        return out
+    out[..., n - 1] = sma(x[..., :n], n)[..., -1]
+    # Loop over time only; each step is vectorized across tickers
+    for t in range(n, length):
+        prev, value = out[..., t - 1], x[..., t]
+        step = alpha * value + (1 - alpha) * prev
+        out[..., t] = np.where(np.isnan(value), prev, np.where(np.isnan(prev), value, step))
+    return out
+
+
+def ema(x: np.ndarray, n: int) -> np.ndarray:
+    """Exponential moving average, alpha = 2 / (n + 1)."""
+    return _smooth(x, n, 2.0 / (n + 1))
+
+
+def wilder(x: np.ndarray, n: int) -> np.ndarray:
+    """Wilder's smoothing, alpha = 1 / n (used by RSI and ATR)."""
+    return _smooth(x, n, 1.0 / n)
+
+
+# ============================================================================
+# INDICATORS
+# ============================================================================
+def rsi(close: np.ndarray, n: int = 14) -> np.ndarray:
+    close = np.asarray(close, dtype="f8")
+    delta = np.diff(close, axis=-1)
+    gains = wilder(np.clip(delta, 0.0, None), n)
+    losses = wilder(np.clip(-delta, 0.0, None), n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = gains / losses
+        values = 100.0 - 100.0 / (1.0 + rs)
+    values = np.where((losses == 0) & (gains > 0), 100.0, values)
+    values = np.where((losses == 0) & (gains == 0), 50.0, values)
+    # diff drops one bar; pad the front so output aligns with close
+    pad = np.full(close.shape[:-1] + (1,), np.nan)
+    return np.concatenate([pad, values], axis=-1)
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple:
+    """Returns (macd line, signal line, histogram)."""
+    line = ema(close, fast) - ema(close, slow)
+    sig = np.full(line.shape, np.nan)
+    start = slow - 1
+    if line.shape[-1] > start:
+        sig[..., start:] = ema(line[..., start:], signal)
+    return line, sig, line - sig
+
+
+def bollinger(close: np.ndarray, n: int = 20, k: float = 2.0) -> tuple:
+    """Returns (upper, middle, lower)."""
+    middle = sma(close, n)
+    width = k * rolling_std(close, n)
+    return middle + width, middle, middle - width
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, n: int = 14) -> np.ndarray:
+    high = np.asarray(high, dtype="f8")
+    low = np.asarray(low, dtype="f8")
+    close = np.asarray(close, dtype="f8")
+    prev_close = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return wilder(true_range, n)
+
+
+def volume_zscore(volume: np.ndarray, n: int = 20) -> np.ndarray:
+    volume = np.asarray(volume, dtype="f8")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (volume - sma(volume, n)) / rolling_std(volume, n)
+    return np.where(np.isfinite(z), z, np.nan)
+
+
+def crossover(fast: np.ndarray, slow: np.ndarray, lookback: int = 5) -> np.ndarray:
+    """
+    +1 if fast crossed above slow within the last `lookback` bars,
+    -1 if it crossed below, 0 otherwise (most recent cross wins).
+    """
+    valid = ~(np.isnan(fast) | np.isnan(slow))
+    above = np.where(valid, np.sign(fast - slow), 0)
+    # Only count changes between two bars where both lines exist
+    changes = np.where(valid[..., 1:] & valid[..., :-1], np.diff(above, axis=-1), 0)[..., -lookback:]
+    crossed = changes != 0
+    # Index of the last non-zero change along the window
+    idx = np.where(crossed.any(axis=-1), changes.shape[-1] - 1 - np.argmax(crossed[..., ::-1], axis=-1), -1)
+    last = np.take_along_axis(changes, np.clip(idx, 0, None)[..., None], axis=-1)[..., 0]
+    return np.where(idx >= 0, np.sign(last), 0).astype(int)
+
+
+# ============================================================================
+# SUMMARIES
+# ============================================================================
+def compute_indicators_batch(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                             volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Latest indicator values for many tickers at once.
+    Inputs are 2-D (tickers x bars); every output is 1-D (one per ticker).
+    """
+    close = np.asarray(close, dtype="f8")
+    sma_20, sma_50 = sma(close, 20), sma(close, 50)
+    ema_12, ema_26 = ema(close, 12), ema(close, 26)
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_upper, bb_middle, bb_lower = bollinger(close)
+    atr_14 = atr(high, low, close)
+
+    last_close = close[..., -1]
+    band = bb_upper[..., -1] - bb_lower[..., -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_b = (last_close - bb_lower[..., -1]) / band
+        atr_percent = atr_14[..., -1] / last_close * 100
+
+    return {
+        "rsi_14": rsi(close)[..., -1],
+        "macd": macd_line[..., -1],
+        "macd_signal": macd_signal[..., -1],
+        "macd_hist": macd_hist[..., -1],
+        "sma_20": sma_20[..., -1],
+        "sma_50": sma_50[..., -1],
+        "ema_12": ema_12[..., -1],
+        "ema_26": ema_26[..., -1],
+        "sma_cross": crossover(sma_20, sma_50),
+        "ema_cross": crossover(ema_12, ema_26),
+        "bb_upper": bb_upper[..., -1],
+        "bb_middle": bb_middle[..., -1],
+        "bb_lower": bb_lower[..., -1],
+        "bb_percent_b": percent_b,
+        "atr_14": atr_14[..., -1],
+        "atr_percent": atr_percent,
+        "volume_z": volume_zscore(volume)[..., -1],
+    }
+
+
+def _clean(value) -> Optional[float]:
+    value = float(value)
+    return round(value, 2) if np.isfinite(value) else None
+
+
+def compute_indicators(bars: np.ndarray) -> Dict:
+    """
+    Indicator snapshot for one ticker's bar array (see history_store.BAR_DTYPE).
+    Returns a JSON-safe dict; values that need more history are None.
+    """
+    if bars is None or len(bars) < 2:
+        return {}
+
+    raw = compute_indicators_batch(bars["high"], bars["low"], bars["close"], bars["volume"])
+    result = {key: _clean(value) for key, value in raw.items() if key not in ("sma_cross", "ema_cross")}
+
+    cross_names = {1: "bullish", -1: "bearish", 0: None}
+    result["sma_cross"] = cross_names[int(raw["sma_cross"])]
+    result["ema_cross"] = cross_names[int(raw["ema_cross"])]
+
+    rsi_value = result["rsi_14"]
+    if rsi_value is None:
+        result["rsi_state"] = None
+    elif rsi_value >= 70:
+        result["rsi_state"] = "Overbought"
+    elif rsi_value <= 30:
+        result["rsi_state"] = "Oversold"
+    else:
+        result["rsi_state"] = "Neutral"
+
+    result["as_of"] = str(bars["time"][-1])
+    return result
+
+
+def format_indicators(ind: Dict) -> str:
+    """Render an indicator snapshot for the LLM context string."""
+    if not ind:
+        return "Technical indicators unavailable."
+
+    def show(key, suffix=""):
+        value = ind.get(key)
+        return "N/A" if value is None else f"{value}{suffix}"
+
+    lines = [
+        f"- RSI(14): {show('rsi_14')} ({ind.get('rsi_state') or 'N/A'})",
+        f"- MACD: {show('macd')} | Signal: {show('macd_signal')} | Histogram: {show('macd_hist')}",
+        f"- SMA20 / SMA50: {show('sma_20')} / {show('sma_50')} (recent cross: {ind.get('sma_cross') or 'none'})",
+        f"- EMA12 / EMA26: {show('ema_12')} / {show('ema_26')} (recent cross: {ind.get('ema_cross') or 'none'})",
+        f"- Bollinger(20,2): {show('bb_lower')} - {show('bb_upper')} (%B: {show('bb_percent_b')})",
+        f"- ATR(14): {show('atr_14')} ({show('atr_percent', '%')} of price)",
+        f"- Volume z-score (20d): {show('volume_z')}",
+    ]
+    return "\n".join(lines)
+
+
+__all__ = [
+    'sma', 'ema', 'rsi', 'macd', 'bollinger', 'atr', 'volume_zscore', 'crossover',
+    'compute_indicators', 'compute_indicators_batch', 'format_indicators'
+]
@@ -1,14 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Body
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 import os
 import uvicorn
-from api.backend.brain import quick_analyze
-from api.backend.scrapers import fetch_all_data
+import json
+import time
+import asyncio
+from typing import Optional
+from api.backend.brain import (
+    ANALYZE_SLO_MS, quick_analyze_slo, quick_analyze_stream, verdict_status, batch_analyze, warm_up, get_analyst
+)
+from api.backend.scrapers import (
+    fetch_all_data, fetch_all_data_many, iter_all_data, get_stock_prices, get_historical_data,
+    get_technical_indicators_many, get_aggregated_sentiment
+)
+from api.backend.history_store import PERIOD_DAYS
+from api.backend.cache import SingleFlight, cache_stats
+from api.backend.health import QUOTE_ROUTER
+from api.backend.symbols import SYMBOL_INDEX
+from api.backend.metrics import metrics_snapshot
+from api.backend.scoring import market_factors, score_many, score_one
+from api.backend.prefetch import PREFETCH_ENABLED, PREFETCHER, record_request
+from api.backend.sentiment import shutdown_pool
 
 app = FastAPI()
 
+# Upper bound on symbols per /api/quotes and /api/batch-analyze call
+MAX_BATCH_TICKERS = int(os.getenv("MAX_BATCH_TICKERS", "50"))
+
+# Concurrent /api/analyze calls for the same ticker share one computation
+ANALYSIS_FLIGHT = SingleFlight("analysis")
+
+# Always kept warm by the prefetcher, on top of trending tickers
+MOCK_TICKERS = ["ZOMATO.NS", "RELIANCE.NS", "TATA.NS", "BTC-USD", "TSLA"]
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -18,6 +45,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def warm_up_analysts():
+    await run_in_threadpool(warm_up)
+
+@app.on_event("startup")
+async def start_prefetcher():
+    if PREFETCH_ENABLED:
+        PREFETCHER.start(MOCK_TICKERS)
+
+@app.on_event("shutdown")
+async def stop_prefetcher():
+    await PREFETCHER.stop()
+
+@app.on_event("shutdown")
+async def stop_sentiment_pool():
+    await run_in_threadpool(shutdown_pool)
+
 # API Routes
 @app.get("/api/health")
 async def health_check():
@@ -25,37 +69,231 @@ async def health_check():
 
 @app.get("/api/mock-tickers")
 async def get_mock_tickers():
-    return {"mock_tickers": ["ZOMATO.NS", "RELIANCE.NS", "TATA.NS", "BTC-USD", "TSLA"]}
+    return {"mock_tickers": MOCK_TICKERS}
+
+@app.get("/api/quotes")
+async def get_quotes(tickers: str):
+    symbols = [t.strip() for t in tickers.split(",") if t.strip()]
+    if not symbols:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+    if len(symbols) > MAX_BATCH_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TICKERS} tickers per request")
+
+    quotes = await run_in_threadpool(get_stock_prices, symbols)
+    return {"success": True, "quotes": quotes}
+
+@app.get("/api/signals")
+async def get_signals(tickers: str):
+    """Deterministic multi-factor signals (no LLM) for many tickers."""
+    symbols = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+    if len(symbols) > MAX_BATCH_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TICKERS} tickers per request")
+
+    quotes, indicators = await asyncio.gather(
+        run_in_threadpool(get_stock_prices, symbols),
+        run_in_threadpool(get_technical_indicators_many, symbols)
+    )
+    rows = [market_factors(quotes.get(t), indicators.get(t)) for t in symbols]
+    return {"success": True, "signals": dict(zip(symbols, score_many(rows)))}
+
+@app.get("/api/history")
+async def get_history(ticker: str, period: str = "1mo", fmt: str = Query("points", alias="format"),
+                      ohlcv: bool = False):
+    if period not in PERIOD_DAYS and period not in ("ytd", "max"):
+        raise HTTPException(status_code=400, detail=f"Unsupported period: {period}")
+    if fmt not in ("points", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be 'points' or 'columnar'")
+
+    record_request(ticker)
+    history = await run_in_threadpool(get_historical_data, ticker, period, fmt, ohlcv)
+    return {"success": True, "ticker": ticker.upper(), "period": period, **history}
+
+@app.post("/api/search")
+async def search_ticker(query: str = Body(..., embed=True)):
+    query = query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Query is required")
+    # Local index first; only unresolved queries reach the LLM
+    return await get_analyst("fast").search_ticker_async(query)
+
+@app.get("/api/search/suggest")
+async def suggest_tickers(q: str, limit: int = Query(8, ge=1, le=25)):
+    return {"query": q, "suggestions": SYMBOL_INDEX.suggest(q, limit)}
+
+@app.get("/api/identity")
+async def get_identity(ticker: str):
+    if not ticker.strip():
+        raise HTTPException(status_code=400, detail="Ticker is required")
+    identity = await get_analyst("fast").get_ticker_identity_async(ticker.strip())
+    return {"ticker": ticker.strip().upper(), **identity}
+
+@app.get("/api/sentiment")
+async def get_sentiment(ticker: str):
+    """Market Pulse: VADER-scored news and Reddit, blended into overall_score."""
+    if not ticker.strip():
+        raise HTTPException(status_code=400, detail="Ticker is required")
+    sentiment = await run_in_threadpool(get_aggregated_sentiment, ticker.strip())
+    return {"ticker": ticker.strip().upper(), **sentiment}
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return {"caches": cache_stats()}
+
+async def _run_analysis(ticker: str, slo_ms: float = 0) -> dict:
+    """
+    Fetch all data (thread pool) and run the AI analysis (async). With an
+    SLO budget, the fetch time counts against it and a slow LLM yields a
+    provisional rule-based verdict (see quick_analyze_slo).
+    """
+    started = time.perf_counter()
+
+    # 1. Fetch Data
+    data = await run_in_threadpool(fetch_all_data, ticker)
+
+    # 2. Run AI Analysis, within what is left of the budget
+    remaining_ms = 0
+    if slo_ms > 0:
+        remaining_ms = max(1.0, slo_ms - (time.perf_counter() - started) * 1000)
+    sentiment = data.get('sentiment', {})
+    analysis = await quick_analyze_slo(
+        ticker,
+        data['price_data'],
+        data.get('news_items') or data['news'],
+        data.get('social_items') or data['social'],
+        data['indicators'],
+        slo_ms=remaining_ms,
+        sentiment=sentiment.get('overall_score')
+    )
+
+    # 3. Construct Response
+    return {
+        "success": True,
+        "ticker": ticker,
+        "currency": data['price_data'].get('currency', '$'),
+        "price_data": data['price_data'],
+        "graph_data": data['graph_data'],
+        "indicators": data['indicators'],
+        "signal": score_one(data['price_data'], data['indicators'], sentiment=sentiment.get('overall_score')),
+        "sentiment": sentiment,
+        "news": data['news'],
+        "social": data['social'],
+        "analysis": analysis,
+        "provisional": bool(analysis.get("provisional")),
+        "source": "live"
+    }
+
+@app.get("/api/batch-analyze")
+async def batch_analyze_stocks(tickers: str):
+    symbols = list(dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip()))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+    if len(symbols) > MAX_BATCH_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TICKERS} tickers per request")
+
+    try:
+        # Bulk quotes/indicators and bounded searches, not one fan-out per ticker
+        data_by_ticker = await run_in_threadpool(fetch_all_data_many, symbols)
+        analyses = await batch_analyze(data_by_ticker)
+
+        return {
+            "success": True,
+            "results": {
+                ticker: {
+                    "currency": data['price_data'].get('currency', '$'),
+                    "price_data": data['price_data'],
+                    "indicators": data['indicators'],
+                    "analysis": analyses[ticker],
+                }
+                for ticker, data in data_by_ticker.items()
+            }
+        }
+    except Exception as e:
+        print(f"Batch Analysis Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+async def _analysis_events(ticker: str):
+    """
+    SSE stream for one analysis: each data section as soon as it is fetched,
+    then the model's tokens, then the parsed analysis.
+    """
+    try:
+        yield _sse("start", {"ticker": ticker.upper()})
+
+        # 1. Data sections, in completion order
+        data = {}
+        sections = iter_all_data(ticker)
+        while True:
+            item = await run_in_threadpool(next, sections, None)
+            if item is None:
+                break
+            key, value, elapsed = item
+            data[key] = value
+            yield _sse(key, {"ticker": ticker.upper(), "elapsed": elapsed, "data": value})
+
+        # 2. Model tokens, then the parsed verdict
+        async for kind, payload in quick_analyze_stream(
+            ticker,
+            data['price_data'],
+            data.get('news_items') or data['news'],
+            data.get('social_items') or data['social'],
+            data['indicators']
+        ):
+            if kind == "token":
+                yield _sse("token", {"text": payload})
+            else:
+                yield _sse("analysis", payload)
+
+        yield _sse("done", {"success": True, "currency": data['price_data'].get('currency', '$')})
+    except Exception as e:
+        print(f"Stream Error: {e}")
+        yield _sse("error", {"detail": str(e)})
+
+@app.get("/api/analyze/stream")
+async def analyze_stock_stream(ticker: str):
+    if not ticker.strip():
+        raise HTTPException(status_code=400, detail="Ticker is required")
+    ticker = ticker.strip()
+    record_request(ticker)
+    return StreamingResponse(
+        _analysis_events(ticker),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/metrics")
+async def get_metrics():
+    return {**metrics_snapshot(), "prefetch": PREFETCHER.snapshot()}
+
+@app.get("/api/providers/health")
+async def get_provider_health():
+    return {"quotes": QUOTE_ROUTER.snapshot()}
+
+@app.get("/api/analyze/verdict")
+async def get_analysis_verdict(ticker: str):
+    """Poll for the LLM verdict behind a provisional /api/analyze response."""
+    if not ticker.strip():
+        raise HTTPException(status_code=400, detail="Ticker is required")
+    return verdict_status(ticker.strip())
 
 @app.get("/api/analyze")
-async def analyze_stock(ticker: str):
+async def analyze_stock(ticker: str, slo_ms: Optional[float] = Query(None, ge=0)):
     try:
         if not ticker:
             raise HTTPException(status_code=400, detail="Ticker is required")
-            
-        # 1. Fetch Data
-        data = fetch_all_data(ticker)
-        
-        # 2. Run AI Analysis
-        analysis = quick_analyze(
-            ticker, 
-            data['price_data'], 
-            data['news'], 
-            data['social']
+
+        record_request(ticker)
+        slo = ANALYZE_SLO_MS if slo_ms is None else slo_ms
+        return await ANALYSIS_FLIGHT.do_coroutine(
+            (ticker.upper(), slo), lambda: _run_analysis(ticker, slo)
         )
-        
-        # 3. Construct Response
-        return {
-            "success": True,
-            "ticker": ticker,
-            "currency": data['price_data'].get('currency', '$'),
-            "price_data": data['price_data'],
-            "graph_data": data['graph_data'],
-            "news": data['news'],
-            "social": data['social'],
-            "analysis": analysis,
-            "source": "live"
-        }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Analysis Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,61 @@
+"""
+TrackBets Backend - Metrics Module
+==================================
+In-process counters reported by /api/metrics. Currently: the estimated
+token count of every prompt sent to the LLM, grouped by prompt kind.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Dict, List
+
+
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "500"))
+
+
+def _percentile(sorted_values: List[int], q: float) -> int:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class PromptMetrics:
+    """Per-kind totals plus a rolling window of recent prompt sizes."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self._recent: Dict[str, deque] = {}
+        self._totals: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, tokens: int) -> None:
+        with self._lock:
+            recent = self._recent.setdefault(kind, deque(maxlen=self.window))
+            recent.append(tokens)
+            totals = self._totals.setdefault(kind, {"prompts": 0, "tokens": 0, "max": 0})
+            totals["prompts"] += 1
+            totals["tokens"] += tokens
+            totals["max"] = max(totals["max"], tokens)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            snap = {}
+            for kind, totals in self._totals.items():
+                recent = sorted(self._recent[kind])
+                snap[kind] = {
+                    **totals,
+                    "last": self._recent[kind][-1],
+                    "mean": round(totals["tokens"] / totals["prompts"], 1),
+                    "p50": _percentile(recent, 0.50),
+                    "p95": _percentile(recent, 0.95),
+                }
+            return snap
+
+
+PROMPT_METRICS = PromptMetrics()
+
+
+def metrics_snapshot() -> Dict:
+    return {"prompt_tokens": PROMPT_METRICS.snapshot()}
+
+
+__all__ = ['PromptMetrics', 'PROMPT_METRICS', 'metrics_snapshot']
@@ -0,0 +1,233 @@
+"""
+TrackBets Backend - News Store Module
+=====================================
+Persistent local store of news articles per ticker (SQLite). Articles are
+keyed by a hash of their canonical URL (and, separately, of their headline
+and outlet), so a poll only ingests headlines it hasn't seen. Each new article joins
+the story it repeats (similar headline from another outlet) or starts a
+new one; readers get one item per story with its outlet count.
+
+Sentiment is scored once, at ingest, and analyses read stories from the
+store; the upstream search only runs when a ticker's last poll is older
+than NEWS_SYNC_INTERVAL.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from api.backend.cache import content_key
+from api.backend.context import DUPLICATE_SIMILARITY, similarity, title_words
+from api.backend.history_store import DATA_DIR
+from api.backend.sentiment import vader_scores
+
+
+NEWS_STORE_PATH = os.getenv("NEWS_STORE_PATH", os.path.join(DATA_DIR, "news.sqlite"))
+
+# A ticker polled more recently than this is served from the store alone
+NEWS_SYNC_INTERVAL = float(os.getenv("NEWS_SYNC_INTERVAL", "300"))
+# New articles are matched against stories seen within this window
+NEWS_CLUSTER_HOURS = float(os.getenv("NEWS_CLUSTER_HOURS", "72"))
+# Stories older than this are not returned; articles older than retention are deleted
+NEWS_MAX_AGE_HOURS = float(os.getenv("NEWS_MAX_AGE_HOURS", str(7 * 24)))
+NEWS_RETENTION_DAYS = float(os.getenv("NEWS_RETENTION_DAYS", "30"))
+
+# Tracking parameters that don't change which article a URL points to:
+# any utm_* plus these exact names (a prefix match would also drop "eid" etc.)
+_TRACKING_PREFIX = "utm_"
+_TRACKING_PARAMS = frozenset({"ved", "usg", "sa", "ei", "fbclid", "gclid"})
+
+
+def canonical_link(link: Optional[str]) -> Optional[str]:
+    """Lowercased host, no fragment, no tracking params (GoogleNews appends &ved=...)."""
+    if not link:
+        return None
+    parts = urlsplit(link.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not (k.lower().startswith(_TRACKING_PREFIX) or k.lower() in _TRACKING_PARAMS)]
+    path = parts.path.split("&", 1)[0].rstrip("/")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def article_keys(item: Dict) -> tuple:
+    """
+    (article_id, title_key): hash of the canonical URL (of the title key when
+    there is none), and hash of the headline's words plus outlet. The same
+    headline from another outlet is a new article (it joins the same story).
+    """
+    words = " ".join(sorted(title_words(item.get("title", ""))))
+    title_key = content_key("title", words, (item.get("source") or "").lower())
+    link = canonical_link(item.get("link"))
+    article_id = content_key("url", link) if link else title_key
+    return article_id, title_key
+
+
+# ============================================================================
+# NEWS STORE
+# ============================================================================
+class NewsStore:
+    """Ticker -> articles, clustered into stories; one SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "ticker TEXT NOT NULL, id TEXT NOT NULL, title_key TEXT NOT NULL, story_id TEXT NOT NULL, "
+                "title TEXT NOT NULL, source TEXT, link TEXT, published TEXT, first_seen REAL NOT NULL, "
+                "score REAL, PRIMARY KEY (ticker, id), UNIQUE (ticker, title_key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS articles_seen ON articles (ticker, first_seen)")
+            conn.execute("CREATE TABLE IF NOT EXISTS syncs (ticker TEXT PRIMARY KEY, synced_at REAL NOT NULL)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def lock(self, ticker: str) -> threading.Lock:
+        """Per-ticker lock; hold it across a check-then-poll sequence."""
+        with self._locks_guard:
+            return self._locks.setdefault(ticker.upper(), threading.Lock())
+
+    def synced_at(self, ticker: str) -> Optional[float]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT synced_at FROM syncs WHERE ticker = ?", (ticker.upper(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def ingest(self, ticker: str, items: List[Dict]) -> List[Dict]:
+        """
+        Store the articles not seen before for this ticker, each assigned to
+        a story, and mark the ticker as polled. Returns only the new
+        articles (with story_id and score): the delta of this poll.
+        """
+        ticker = ticker.upper()
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            keys = [article_keys(item) for item in items]
+            seen = set()
+            for article_id, title_key in keys:
+                row = conn.execute(
+                    "SELECT 1 FROM articles WHERE ticker = ? AND (id = ? OR title_key = ?)",
+                    (ticker, article_id, title_key)
+                ).fetchone()
+                if row:
+                    seen.add(article_id)
+
+            # Recent stories (representative + member titles) to cluster into
+            stories: Dict[str, List[set]] = {}
+            for story_id, title in conn.execute(
+                "SELECT story_id, title FROM articles WHERE ticker = ? AND first_seen >= ?",
+                (ticker, now - NEWS_CLUSTER_HOURS * 3600)
+            ):
+                stories.setdefault(story_id, []).append(title_words(title))
+
+            fresh, batch_keys = [], set()
+            for item, (article_id, title_key) in zip(items, keys):
+                if article_id in seen or article_id in batch_keys or title_key in batch_keys:
+                    continue
+                batch_keys.update((article_id, title_key))
+                words = title_words(item.get("title", ""))
+                best, best_similarity = None, DUPLICATE_SIMILARITY
+                for story_id, members in stories.items():
+                    match = max(similarity(words, member) for member in members)
+                    if match >= best_similarity:
+                        best, best_similarity = story_id, match
+                story_id = best or article_id
+                stories.setdefault(story_id, []).append(words)
+                fresh.append({**item, "id": article_id, "title_key": title_key, "story_id": story_id})
+
+        # Sentiment is scored for the delta only
+        for article, score in zip(fresh, vader_scores([a.get("title", "") for a in fresh])):
+            article["score"] = round(score, 3)
+
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles (ticker, id, title_key, story_id, title, source, link, "
+                "published, first_seen, score) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(ticker, a["id"], a["title_key"], a["story_id"], a.get("title") or "", a.get("source"),
+                  a.get("link"), a.get("published"), now, a["score"]) for a in fresh]
+            )
+            conn.execute("INSERT OR REPLACE INTO syncs (ticker, synced_at) VALUES (?, ?)", (ticker, now))
+            conn.execute("DELETE FROM articles WHERE first_seen < ?", (now - NEWS_RETENTION_DAYS * 86400,))
+            conn.commit()
+
+        return [{k: v for k, v in a.items() if k not in ("id", "title_key")} for a in fresh]
+
+    def stories(self, ticker: str, limit: int = 10, max_age_hours: Optional[float] = None) -> List[Dict]:
+        """
+        One item per story, newest first: the first-seen headline with its
+        source and link, the latest publish time, outlet count ('coverage'),
+        sources and mean sentiment score.
+        """
+        since = time.time() - (NEWS_MAX_AGE_HOURS if max_age_hours is None else max_age_hours) * 3600
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT story_id, title, source, link, published, first_seen, score FROM articles "
+                "WHERE ticker = ? AND story_id IN (SELECT story_id FROM articles WHERE ticker = ? "
+                "AND first_seen >= ?) ORDER BY first_seen, rowid",
+                (ticker.upper(), ticker.upper(), since)
+            ).fetchall()
+
+        stories: Dict[str, Dict] = {}
+        for story_id, title, source, link, published, first_seen, score in rows:
+            story = stories.get(story_id)
+            if story is None:
+                stories[story_id] = {
+                    "title": title, "source": source or "Unknown", "published": published, "link": link,
+                    "story_id": story_id, "sources": [], "scores": [], "last_seen": first_seen,
+                }
+                story = stories[story_id]
+            if source and source not in story["sources"]:
+                story["sources"].append(source)
+            if score is not None:
+                story["scores"].append(score)
+            if (published or "") > (story["published"] or ""):
+                story["published"] = published
+            story["last_seen"] = first_seen
+
+        ranked = []
+        for story in stories.values():
+            scores = story.pop("scores")
+            last_seen = story.pop("last_seen")
+            story["coverage"] = max(1, len(story["sources"]))
+            story["score"] = round(sum(scores) / len(scores), 3) if scores else None
+            ranked.append(((story["published"] or "", last_seen), story))
+        ranked.sort(key=lambda entry: entry[0], reverse=True)
+        return [story for _, story in ranked[:limit]]
+
+    def sync(self, ticker: str, poll: Callable[[Optional[float]], List[Dict]],
+             force: bool = False) -> List[Dict]:
+        """
+        Poll upstream when the ticker's last poll is older than
+        NEWS_SYNC_INTERVAL (or force), ingesting only unseen articles.
+        poll(last_synced_at) fetches raw items; returns the delta ([] when
+        the store was fresh enough).
+        """
+        with self.lock(ticker):
+            last = self.synced_at(ticker)
+            if not force and last is not None and time.time() - last < NEWS_SYNC_INTERVAL:
+                return []
+            return self.ingest(ticker, poll(last))
+
+
+NEWS_STORE = NewsStore(NEWS_STORE_PATH)
+
+
+__all__ = ['NewsStore', 'NEWS_STORE', 'canonical_link', 'article_keys']
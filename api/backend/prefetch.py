@@ -0,0 +1,266 @@
+"""
+TrackBets Backend - Prefetch Module
+===================================
+Background refresh of hot tickers, run inside the FastAPI lifecycle when
+PREFETCH_ENABLED=1.
+
+Requests feed a popularity tracker (decaying hit counts). Every kind of
+data (price, history, news, social, optionally the LLM verdict) has its own
+loop that periodically re-fetches it for the seed tickers plus the top-N
+trending ones, a little faster than the matching cache or store expires,
+so requests for hot tickers are pure cache reads. Upstream calls are paced
+by per-provider token buckets.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from api.backend.history_store import HISTORY_SYNC_INTERVAL
+from api.backend.news_store import NEWS_SYNC_INTERVAL
+from api.backend.scrapers import (
+    QUOTE_CACHE, SOCIAL_CACHE, fetch_all_data, refresh_history, refresh_news, refresh_quote, refresh_quotes,
+    refresh_social
+)
+
+
+# Off by default: the scheduler spends upstream quota on its own
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "0") == "1"
+# Also refresh the LLM verdict (costs tokens). Requests serve it when
+# VERDICT_REUSE_SECONDS covers the interval, or in SLO mode on a slow LLM.
+PREFETCH_VERDICT = os.getenv("PREFETCH_VERDICT", "0") == "1"
+
+# Trending tickers refreshed on top of the seeds
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "10"))
+# Decayed hits a ticker needs before it counts as trending
+PREFETCH_MIN_HITS = float(os.getenv("PREFETCH_MIN_HITS", "2"))
+POPULARITY_HALF_LIFE = float(os.getenv("POPULARITY_HALF_LIFE", "1800"))
+POPULARITY_MAX_TRACKED = int(os.getenv("POPULARITY_MAX_TRACKED", "1000"))
+
+# Seconds between refreshes per kind; each runs ahead of what it keeps warm
+PREFETCH_INTERVALS = {
+    "price": float(os.getenv("PREFETCH_INTERVAL_PRICE", str(QUOTE_CACHE.ttl * 0.8))),
+    "history": float(os.getenv("PREFETCH_INTERVAL_HISTORY", str(HISTORY_SYNC_INTERVAL * 0.9))),
+    "news": float(os.getenv("PREFETCH_INTERVAL_NEWS", str(NEWS_SYNC_INTERVAL * 0.8))),
+    "social": float(os.getenv("PREFETCH_INTERVAL_SOCIAL", str(SOCIAL_CACHE.ttl * 0.8))),
+    "verdict": float(os.getenv("PREFETCH_INTERVAL_VERDICT", "600")),
+}
+
+# Upstream calls per minute the prefetcher may spend, per provider
+PREFETCH_RATES = {
+    "quotes": float(os.getenv("PREFETCH_RATE_QUOTES", "12")),
+    "history": float(os.getenv("PREFETCH_RATE_HISTORY", "30")),
+    "news": float(os.getenv("PREFETCH_RATE_NEWS", "10")),
+    "social": float(os.getenv("PREFETCH_RATE_SOCIAL", "30")),
+    "llm": float(os.getenv("PREFETCH_RATE_LLM", "4")),
+}
+
+
+# ============================================================================
+# POPULARITY
+# ============================================================================
+class PopularityTracker:
+    """Per-ticker hit counts that halve every half_life seconds."""
+
+    def __init__(self, half_life: float = POPULARITY_HALF_LIFE, max_tracked: int = POPULARITY_MAX_TRACKED):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self._scores: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, entry: tuple, now: float) -> float:
+        score, updated = entry
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def record(self, ticker: str, weight: float = 1.0) -> None:
+        ticker = ticker.strip().upper()
+        if not ticker:
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._scores.get(ticker)
+            self._scores[ticker] = ((self._decayed(entry, now) if entry else 0.0) + weight, now)
+            if len(self._scores) > self.max_tracked:
+                # Forget the coldest half
+                ranked = sorted(self._scores.items(), key=lambda kv: self._decayed(kv[1], now))
+                for name, _ in ranked[:len(ranked) // 2]:
+                    del self._scores[name]
+
+    def top(self, n: int, min_score: float = 0.0) -> List[tuple]:
+        """[(ticker, decayed score)] for the n hottest tickers."""
+        now = time.time()
+        with self._lock:
+            scored = [(ticker, self._decayed(entry, now)) for ticker, entry in self._scores.items()]
+        scored = [(ticker, score) for ticker, score in scored if score >= min_score]
+        return sorted(scored, key=lambda ts: -ts[1])[:n]
+
+
+POPULARITY = PopularityTracker()
+
+
+# ============================================================================
+# RATE LIMIT
+# ============================================================================
+class TokenBucket:
+    """Async token bucket: rate_per_minute sustained, bursts up to capacity."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = max(rate_per_minute, 1e-6) / 60.0
+        self.capacity = capacity or max(1.0, rate_per_minute / 6)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        # Single event loop: no await between check and take, so no lock
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# ============================================================================
+# SCHEDULER
+# ============================================================================
+async def _refresh_verdict(ticker: str) -> None:
+    """Analysis on warm data; the finished verdict lands in VERDICT_STORE."""
+    from api.backend.brain import quick_analyze_slo
+
+    data = await run_in_threadpool(fetch_all_data, ticker)
+    await quick_analyze_slo(
+        ticker,
+        data['price_data'],
+        data.get('news_items') or data['news'],
+        data.get('social_items') or data['social'],
+        data['indicators'],
+        slo_ms=0,
+        sentiment=data.get('sentiment', {}).get('overall_score'),
+        reuse=False
+    )
+
+
+class PrefetchScheduler:
+    """
+    One asyncio loop per data kind. Each round refreshes the current
+    targets (seeds + trending), taking a token from its provider's bucket
+    per upstream call, then sleeps for the kind's interval.
+    """
+
+    def __init__(self, tracker: PopularityTracker, top_n: int = PREFETCH_TOP_N,
+                 intervals: Optional[Dict[str, float]] = None, rates: Optional[Dict[str, float]] = None,
+                 verdict: bool = PREFETCH_VERDICT):
+        self.tracker = tracker
+        self.top_n = top_n
+        self.intervals = dict(PREFETCH_INTERVALS, **(intervals or {}))
+        self.buckets = {name: TokenBucket(rate) for name, rate in dict(PREFETCH_RATES, **(rates or {})).items()}
+        self.verdict = verdict
+        self.seeds: List[str] = []
+        self._tasks: Dict[str, "asyncio.Task"] = {}
+        self._stats: Dict[str, Dict] = {}
+
+    def targets(self) -> List[str]:
+        trending = [t for t, _ in self.tracker.top(self.top_n + len(self.seeds), PREFETCH_MIN_HITS)]
+        extra = [t for t in trending if t not in self.seeds][:self.top_n]
+        return self.seeds + extra
+
+    def _failed(self, kind: str, ticker: str, error: Exception) -> None:
+        stats = self._stats[kind]
+        stats["errors"] += 1
+        stats["last_error"] = f"{ticker}: {error}"
+        print(f"[PREFETCH] {kind} refresh failed for {ticker}: {error}")
+
+    def _kinds(self) -> Dict[str, Callable]:
+        """kind -> async refresh(tickers); one ticker failing doesn't stop the round."""
+        def per_ticker(kind: str, bucket: str, refresh):
+            async def run(tickers: List[str]) -> None:
+                for ticker in tickers:
+                    await self.buckets[bucket].acquire()
+                    try:
+                        await refresh(ticker)
+                    except Exception as e:
+                        self._failed(kind, ticker, e)
+            return run
+
+        def threaded(fn: Callable[[str], object]):
+            return lambda ticker: run_in_threadpool(fn, ticker)
+
+        async def quotes(tickers: List[str]) -> None:
+            # One light bulk call for every target, then a full quote for
+            # those without a recent one to lay the bulk prices over
+            await self.buckets["quotes"].acquire()
+            missing = await run_in_threadpool(refresh_quotes, tickers)
+            await full_quotes(missing)
+
+        full_quotes = per_ticker("price", "quotes", threaded(refresh_quote))
+        kinds = {
+            "price": quotes,
+            "history": per_ticker("history", "history", threaded(refresh_history)),
+            "news": per_ticker("news", "news", threaded(refresh_news)),
+            "social": per_ticker("social", "social", threaded(refresh_social)),
+        }
+        if self.verdict:
+            kinds["verdict"] = per_ticker("verdict", "llm", _refresh_verdict)
+        return kinds
+
+    async def _loop(self, kind: str, refresh) -> None:
+        stats = self._stats[kind]
+        while True:
+            started = time.monotonic()
+            tickers = self.targets()
+            try:
+                if tickers:
+                    await refresh(tickers)
+                stats["runs"] += 1
+                stats["tickers"] = len(tickers)
+            except Exception as e:
+                self._failed(kind, ",".join(tickers), e)
+            stats["last_run"] = time.time()
+            stats["last_duration"] = round(time.monotonic() - started, 3)
+            await asyncio.sleep(max(0.0, self.intervals[kind] - (time.monotonic() - started)))
+
+    def start(self, seeds: Iterable[str] = ()) -> None:
+        """Start every kind's loop on the running event loop (idempotent)."""
+        self.seeds = list(dict.fromkeys(t.strip().upper() for t in seeds if t.strip()))
+        for kind, refresh in self._kinds().items():
+            if kind in self._tasks:
+                continue
+            self._stats[kind] = {"interval": self.intervals[kind], "runs": 0, "errors": 0, "tickers": 0,
+                                 "last_run": None, "last_duration": None, "last_error": None}
+            self._tasks[kind] = asyncio.ensure_future(self._loop(kind, refresh))
+        print(f"[PREFETCH] Started {', '.join(self._tasks)} for {len(self.seeds)} seed tickers")
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict:
+        return {
+            "running": bool(self._tasks),
+            "targets": self.targets(),
+            "trending": [{"ticker": t, "score": round(s, 2)} for t, s in self.tracker.top(self.top_n)],
+            "kinds": {kind: dict(stats) for kind, stats in self._stats.items()},
+        }
+
+
+PREFETCHER = PrefetchScheduler(POPULARITY)
+
+
+def record_request(ticker: str) -> None:
+    """Count a request for ticker towards its popularity."""
+    POPULARITY.record(ticker)
+
+
+__all__ = [
+    'PopularityTracker', 'POPULARITY', 'TokenBucket', 'PrefetchScheduler', 'PREFETCHER',
+    'PREFETCH_ENABLED', 'record_request'
+]
@@ -0,0 +1,237 @@
+"""
+TrackBets Backend - Scoring Engine Module
+========================================
+Deterministic multi-factor BUY / SELL / WAIT signals, NumPy-vectorized
+across tickers (thousands per call in a few milliseconds).
+
+Each raw factor is mapped to a signal in [-1, 1] (positive = bullish),
+combined as a weighted mean over the factors that are present, and
+thresholded. Missing factors (NaN / None) drop out of the mean and lower
+the confidence instead of biasing the score.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+FACTORS = ("sentiment", "valuation", "momentum", "volatility", "volume")
+
+DEFAULT_WEIGHTS = {
+    "sentiment": 0.35,
+    "valuation": 0.25,
+    "momentum": 0.20,
+    "volatility": 0.10,
+    "volume": 0.10,
+}
+
+SCORE_BUY_THRESHOLD = float(os.getenv("SCORE_BUY_THRESHOLD", "0.25"))
+SCORE_SELL_THRESHOLD = float(os.getenv("SCORE_SELL_THRESHOLD", "-0.15"))
+
+# P/E above this is a SELL whatever the other factors say
+PE_SELL_ABOVE = float(os.getenv("PE_SELL_ABOVE", "100"))
+# P/E at which valuation is neutral; half / double it maps to +/-1
+PE_NEUTRAL = float(os.getenv("PE_NEUTRAL", "50"))
+# Percent move that maps to ~0.76 momentum (tanh(1))
+MOMENTUM_SCALE = float(os.getenv("MOMENTUM_SCALE", "5"))
+# Daily ATR% treated as normal volatility
+VOLATILITY_NORMAL = float(os.getenv("VOLATILITY_NORMAL", "2.5"))
+
+REASONS = {
+    "sentiment": ("Strong positive sentiment", "Negative sentiment trend"),
+    "valuation": ("Attractive valuation", "Valuation concerns"),
+    "momentum": ("Positive price momentum", "Weak price momentum"),
+    "volatility": ("Low volatility", "Elevated volatility"),
+    "volume": ("Volume confirms the rally", "Heavy volume on the decline"),
+}
+
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """'sentiment=0.5,momentum=0.3' -> weights (unlisted factors keep defaults)."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name in weights and value.strip():
+            weights[name] = max(0.0, float(value))
+    return weights
+
+
+SCORING_WEIGHTS = parse_weights(os.getenv("SCORING_WEIGHTS"))
+
+
+def _column(values, n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, np.nan)
+    if isinstance(values, (list, tuple)):
+        values = [np.nan if v is None else v for v in values]
+    return np.broadcast_to(np.asarray(values, dtype="f8"), (n,)).astype("f8")
+
+
+# ============================================================================
+# FACTORS
+# ============================================================================
+def factor_signals(sentiment=None, pe=None, momentum=None, volatility=None,
+                   volume_change=None) -> np.ndarray:
+    """
+    Raw factors -> (len(FACTORS), n) array of signals in [-1, 1], NaN where
+    the factor is missing.
+
+    sentiment      overall sentiment score, -1..1
+    pe             trailing P/E (<= 0 means loss-making)
+    momentum       percent move (e.g. price vs 50-day average)
+    volatility     daily ATR as percent of price
+    volume_change  volume z-score; confirms or contradicts the price move
+    """
+    given = [v for v in (sentiment, pe, momentum, volatility, volume_change) if v is not None]
+    n = max((np.size(v) for v in given), default=1)
+
+    sentiment = np.clip(_column(sentiment, n), -1.0, 1.0)
+    pe = _column(pe, n)
+    momentum = _column(momentum, n)
+    volatility = _column(volatility, n)
+    volume_change = _column(volume_change, n)
+
+    with np.errstate(invalid="ignore"):
+        valuation = np.where(pe > 0, np.clip((PE_NEUTRAL - pe) / PE_NEUTRAL, -1.0, 1.0), -0.5)
+        valuation = np.where(np.isnan(pe), np.nan, valuation)
+
+        momentum_signal = np.tanh(momentum / MOMENTUM_SCALE)
+        volatility_signal = -np.tanh((volatility - VOLATILITY_NORMAL) / VOLATILITY_NORMAL)
+
+        # Volume only says something relative to the direction of the move
+        direction = np.sign(np.where(np.isnan(momentum), sentiment, momentum))
+        volume_signal = np.tanh(volume_change / 2.0) * direction
+
+    return np.vstack([sentiment, valuation, momentum_signal, volatility_signal, volume_signal])
+
+
+# ============================================================================
+# SCORING
+# ============================================================================
+def score_signals(signals: np.ndarray, weights: Optional[Dict[str, float]] = None,
+                  pe: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Combine factor signals (see factor_signals) into per-ticker results:
+    score (-1..1), signal (BUY/SELL/WAIT), confidence (0-100), coverage
+    (share of total weight that was available) and contributions.
+    """
+    weights = weights or SCORING_WEIGHTS
+    w = np.array([weights.get(name, 0.0) for name in FACTORS], dtype="f8")[:, None]
+    present = ~np.isnan(signals)
+
+    weighted = np.where(present, signals * w, 0.0)
+    available = (present * w).sum(axis=0)
+    total = w.sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(available > 0, weighted.sum(axis=0) / available, 0.0)
+        contributions = np.where(available > 0, weighted / available, 0.0)
+    coverage = available / total if total > 0 else np.zeros_like(available)
+
+    signal = np.select(
+        [score >= SCORE_BUY_THRESHOLD, score <= SCORE_SELL_THRESHOLD],
+        ["BUY", "SELL"],
+        default="WAIT"
+    ).astype("<U4")
+    if pe is not None:
+        with np.errstate(invalid="ignore"):
+            signal = np.where(np.asarray(pe, dtype="f8") > PE_SELL_ABOVE, "SELL", signal)
+
+    # Directional calls: stronger score -> higher confidence.
+    # WAIT: closer to zero -> more confidently neutral.
+    strength = np.where(signal == "WAIT",
+                        1.0 - np.abs(score) / max(SCORE_BUY_THRESHOLD, -SCORE_SELL_THRESHOLD),
+                        np.abs(score))
+    confidence = np.rint(100 * coverage * (0.5 + 0.5 * np.clip(strength, 0.0, 1.0))).astype(int)
+
+    return {
+        "score": score,
+        "signal": signal,
+        "confidence": confidence,
+        "coverage": coverage,
+        "contributions": contributions,
+    }
+
+
+def score_factors(sentiment=None, pe=None, momentum=None, volatility=None, volume_change=None,
+                  weights: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+    """Vectorized entry point: raw factor arrays in, per-ticker arrays out."""
+    signals = factor_signals(sentiment, pe, momentum, volatility, volume_change)
+    pe_column = None if pe is None else _column(pe, signals.shape[1])
+    return score_signals(signals, weights, pe_column)
+
+
+def reasons_for(contributions: np.ndarray, signal: str, limit: int = 2) -> List[str]:
+    """Human-readable reasons for one ticker: its largest supporting factors."""
+    if signal == "WAIT":
+        return ["Mixed indicators", "Fairly valued"]
+    sign = 1.0 if signal == "BUY" else -1.0
+    order = np.argsort(-sign * contributions)
+    reasons = [REASONS[FACTORS[i]][0 if sign > 0 else 1] for i in order[:limit] if sign * contributions[i] > 0]
+    return reasons or (["Valuation concerns"] if signal == "SELL" else ["Positive overall signal"])
+
+
+# ============================================================================
+# MARKET DATA ADAPTERS
+# ============================================================================
+def market_factors(price_data: Optional[Dict] = None, indicators: Optional[Dict] = None,
+                   sentiment: Optional[float] = None, pe: Optional[float] = None) -> Dict[str, Optional[float]]:
+    """Raw factors for one ticker from a quote contract and indicator snapshot."""
+    price_data = price_data or {}
+    indicators = indicators or {}
+
+    def number(value) -> Optional[float]:
+        return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+    price = number(price_data.get("price", price_data.get("current")))
+    sma_50 = number(indicators.get("sma_50"))
+    # Trend vs the 50-day average when history allows, else today's move
+    if price and sma_50:
+        momentum = (price / sma_50 - 1) * 100
+    else:
+        momentum = number(price_data.get("change_percent"))
+
+    return {
+        "sentiment": number(sentiment),
+        "pe": number(pe if pe is not None else price_data.get("pe")),
+        "momentum": momentum,
+        "volatility": number(indicators.get("atr_percent")),
+        "volume_change": number(indicators.get("volume_z")),
+    }
+
+
+def score_many(rows: Sequence[Dict[str, Optional[float]]],
+               weights: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """Score a list of market_factors() dicts; one JSON-safe result per row."""
+    if not rows:
+        return []
+    columns = {name: [row.get(name) for row in rows]
+               for name in ("sentiment", "pe", "momentum", "volatility", "volume_change")}
+    result = score_factors(weights=weights, **columns)
+    return [
+        {
+            "signal": str(result["signal"][i]),
+            "confidence": int(result["confidence"][i]),
+            "score": round(float(result["score"][i]), 3),
+            "coverage": round(float(result["coverage"][i]), 2),
+            "reasons": reasons_for(result["contributions"][:, i], str(result["signal"][i])),
+            "factors": {
+                name: round(float(value), 3)
+                for name, value in zip(FACTORS, result["contributions"][:, i]) if value != 0
+            },
+        }
+        for i in range(len(rows))
+    ]
+
+
+def score_one(price_data: Optional[Dict] = None, indicators: Optional[Dict] = None,
+              sentiment: Optional[float] = None, pe: Optional[float] = None) -> Dict:
+    return score_many([market_factors(price_data, indicators, sentiment, pe)])[0]
+
+
+__all__ = [
+    'FACTORS', 'DEFAULT_WEIGHTS', 'SCORING_WEIGHTS', 'parse_weights',
+    'factor_signals', 'score_signals', 'score_factors', 'reasons_for',
+    'market_factors', 'score_many', 'score_one'
+]
@@ -6,81 +6,217 @@ All functions have try-except blocks to prevent crashing.
 """
 
 import os
+import time
+import threading
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Optional, List, Dict
 from datetime import datetime
 
+from api.backend.cache import SingleFlight, TTLCache
+from api.backend.health import QUOTE_ROUTER
+from api.backend.http_client import http_get
+from api.backend.history_store import HISTORY_STORE, bars_from_columns, empty_bars, period_start
+from api.backend.identity import currency_for
+from api.backend.indicators import compute_indicators
+from api.backend.news_store import NEWS_STORE
+from api.backend.sentiment import aggregate_sentiment, label_many, score_text, sentiment_label, vader_scores
+
+
+# ============================================================================
+# CACHES
+# ============================================================================
+# Quotes go stale in seconds; daily bars only change once per session.
+QUOTE_CACHE = TTLCache(
+    "quotes",
+    ttl=float(os.getenv("QUOTE_CACHE_TTL", "15")),
+    stale_ttl=float(os.getenv("QUOTE_CACHE_STALE_TTL", "60")),
+    max_size=int(os.getenv("QUOTE_CACHE_SIZE", "512"))
+)
+HISTORY_CACHE = TTLCache(
+    "history",
+    ttl=float(os.getenv("HISTORY_CACHE_TTL", str(6 * 3600))),
+    stale_ttl=float(os.getenv("HISTORY_CACHE_STALE_TTL", str(24 * 3600))),
+    max_size=int(os.getenv("HISTORY_CACHE_SIZE", "256"))
+)
+# Raw Reddit / DuckDuckGo search results, per search term and source.
+SOCIAL_CACHE = TTLCache(
+    "social",
+    ttl=float(os.getenv("SOCIAL_CACHE_TTL", "120")),
+    stale_ttl=float(os.getenv("SOCIAL_CACHE_STALE_TTL", "600")),
+    max_size=int(os.getenv("SOCIAL_CACHE_SIZE", "256"))
+)
+SOCIAL_FLIGHT = SingleFlight("social_search")
+# Last full quote per ticker (name, market cap, P/E...). Background refreshes
+# lay light bulk prices over it and re-fetch it once it is this old.
+QUOTE_BASES = TTLCache(
+    "quote_bases",
+    ttl=float(os.getenv("QUOTE_FULL_REFRESH", "900")),
+    max_size=int(os.getenv("QUOTE_CACHE_SIZE", "512"))
+)
+
 
 # ============================================================================
 # ============================================================================
 # ============================================================================
 # 1. STOCK PRICE SCRAPER (yfinance + Twelve Data)
 # ============================================================================
+# Hedged quotes: "off" (sequential fallback), "hedge" (fire Twelve Data if
+# yfinance hasn't answered within QUOTE_HEDGE_DELAY seconds) or "race".
+QUOTE_HEDGE_MODE = os.getenv("QUOTE_HEDGE_MODE", "off").lower()
+QUOTE_HEDGE_DELAY = float(os.getenv("QUOTE_HEDGE_DELAY", "0.8"))
+
+_HEDGE_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("QUOTE_HEDGE_WORKERS", "8")),
+    thread_name_prefix="hedge"
+)
+
+
 def get_stock_price(ticker: str) -> Dict:
     """
-    Fetch current stock price with strict priority:
-    1. yfinance (Real)
-    2. Twelve Data (Real Backup)
-    3. Realistic Mock (Last Resort)
+    Cached wrapper around _fetch_stock_price.
+    Emergency mocks are never cached so a real quote replaces them ASAP.
+    """
+    key = (ticker.upper(), "quote", None)
+    return QUOTE_CACHE.get_or_load(
+        key,
+        lambda: _load_full_quote(ticker),
+        should_cache=lambda data: data.get("source") != "Emergency Mock"
+    )
+
+
+def _load_full_quote(ticker: str) -> Dict:
+    """_fetch_stock_price, remembering real quotes in QUOTE_BASES."""
+    quote = _fetch_stock_price(ticker)
+    if quote.get("source") != "Emergency Mock":
+        QUOTE_BASES.set(ticker.upper(), quote)
+    return quote
+
+
+def _fetch_stock_price(ticker: str) -> Dict:
+    """
+    Fetch current stock price with priority:
+    1. yfinance .info (Real)
+    2. yfinance .history (Real)
+    3. Twelve Data (Real Backup)
+    4. Realistic Mock (Last Resort)
+    Providers whose circuit breaker is open are skipped, and degraded ones
+    are tried after healthy ones (see health.QUOTE_ROUTER).
+    With QUOTE_HEDGE_MODE=hedge|race, Twelve Data is raced against yfinance.
     """
     ticker_upper = ticker.upper()
     is_indian = ".NS" in ticker_upper or ".BO" in ticker_upper
 
+    providers = _quote_providers(ticker_upper)
+    ranked = QUOTE_ROUTER.ranked(list(providers))
+    
+    if QUOTE_HEDGE_MODE in ("hedge", "race") and "twelvedata" in ranked and ranked[0] != "twelvedata":
+        result = _hedged_quote(providers, ranked)
+        if result:
+            return result
+    else:
+        for name in ranked:
+            result = QUOTE_ROUTER.call(name, providers[name])
+            if result:
+                return result
+
     # =========================================================
-    # ATTEMPT 1: yfinance (Primary)
+    # LAST RESORT: Emergency Mock (Realistic Values)
     # =========================================================
-    yf_ticker = ticker_upper.replace("/", "-") # BTC/USD -> BTC-USD
+    print(f"[SCRAPER] All APIs failed. Generating realistic mock for {ticker_upper}...")
+    return _get_realistic_mock(ticker_upper, is_indian)
+
+
+def _hedged_quote(providers: Dict, ranked: List[str]) -> Optional[Dict]:
+    """
+    Run the yfinance chain as the primary; if it hasn't produced a quote
+    within QUOTE_HEDGE_DELAY (immediately in race mode), fire Twelve Data
+    too and return the first valid result. The loser is cancelled if it
+    hasn't started; a call already on the wire is abandoned and its result
+    ignored (it still feeds the provider health stats).
+    """
+    primary_names = [name for name in ranked if name != "twelvedata"]
+    
+    def primary_chain():
+        for name in primary_names:
+            result = QUOTE_ROUTER.call(name, providers[name])
+            if result:
+                return result
+        return None
+    
+    delay = 0.0 if QUOTE_HEDGE_MODE == "race" else QUOTE_HEDGE_DELAY
+    primary = _HEDGE_POOL.submit(primary_chain)
+    pending = {primary}
+    
+    wait([primary], timeout=delay)
+    if not _safe_result(primary):
+        pending.add(_HEDGE_POOL.submit(QUOTE_ROUTER.call, "twelvedata", providers["twelvedata"]))
+    
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = _safe_result(future)
+            if result:
+                for loser in pending:
+                    loser.cancel()
+                return result
+    return None
+
+
+def _safe_result(future) -> Optional[Dict]:
     try:
-        import yfinance as yf
-        stock = yf.Ticker(yf_ticker)
-        
-        # Try .info first (sometimes faster/richer)
-        try:
-            info = stock.info
-            if info and 'regularMarketPrice' in info and info['regularMarketPrice'] is not None:
-                return _format_contract(info, source="yfinance")
-        except:
-            pass
-            
-        # Fallback to .history (more reliable for price)
-        hist = stock.history(period="1d")
-        if not hist.empty:
-            current = float(hist['Close'].iloc[-1])
-            prev = float(hist['Open'].iloc[-1]) # usage as approximation
-            return {
-                "price": round(current, 2),
-                "change_percent": round(((current - prev)/prev)*100, 2),
-                "is_up": current >= prev,
-                "currency": "₹" if is_indian else "$",
-                "name": yf_ticker,
-                "market_cap": "N/A",
-                "volume": int(hist['Volume'].iloc[-1]),
-                "day_high": float(hist['High'].iloc[-1]),
-                "day_low": float(hist['Low'].iloc[-1]),
-                "52_week_high": "N/A",
-                "52_week_low": "N/A",
-                "source": "yfinance"
-            }
-            
-    except Exception as e:
-        print(f"[SCRAPER] yfinance failed for {yf_ticker}: {e}")
+        return future.result(timeout=0)
+    except Exception:
+        return None
 
-    # =========================================================
-    # ATTEMPT 2: Twelve Data (Backup)
-    # =========================================================
-    td_ticker = ticker_upper.replace("-", "/") # BTC-USD -> BTC/USD
+
+def _quote_providers(ticker_upper: str) -> Dict:
+    """Provider name -> zero-arg fetcher, in declared priority order."""
+    providers = {
+        "yfinance.info": lambda: _price_yfinance_info(ticker_upper),
+        "yfinance.history": lambda: _price_yfinance_history(ticker_upper),
+    }
     twelve_data_key = os.getenv("TWELVE_DATA_API_KEY")
-    
     if twelve_data_key:
-        print(f"[SCRAPER] Trying Twelve Data backup for {td_ticker}...")
-        td_data = get_price_twelve_data(td_ticker, twelve_data_key)
-        if td_data:
-            return td_data
+        td_ticker = ticker_upper.replace("-", "/") # BTC-USD -> BTC/USD
+        providers["twelvedata"] = lambda: get_price_twelve_data(td_ticker, twelve_data_key)
+    return providers
 
-    # =========================================================
-    # ATTEMPT 3: Emergency Mock (Realistic Values)
-    # =========================================================
-    print(f"[SCRAPER] All APIs failed. Generating realistic mock for {ticker_upper}...")
-    return _get_realistic_mock(ticker_upper, is_indian)
+
+def _price_yfinance_info(ticker_upper: str) -> Optional[Dict]:
+    """yfinance .info (sometimes faster/richer)."""
+    import yfinance as yf
+    yf_ticker = ticker_upper.replace("/", "-") # BTC/USD -> BTC-USD
+    info = yf.Ticker(yf_ticker).info
+    if info and 'regularMarketPrice' in info and info['regularMarketPrice'] is not None:
+        return _format_contract(info, source="yfinance")
+    return None
+
+
+def _price_yfinance_history(ticker_upper: str) -> Optional[Dict]:
+    """yfinance .history (more reliable for price)."""
+    import yfinance as yf
+    yf_ticker = ticker_upper.replace("/", "-")
+    is_indian = ".NS" in ticker_upper or ".BO" in ticker_upper
+    hist = yf.Ticker(yf_ticker).history(period="1d")
+    if hist.empty:
+        return None
+    current = float(hist['Close'].iloc[-1])
+    prev = float(hist['Open'].iloc[-1]) # usage as approximation
+    return {
+        "price": round(current, 2),
+        "change_percent": round(((current - prev)/prev)*100, 2),
+        "is_up": current >= prev,
+        "currency": "₹" if is_indian else "$",
+        "name": yf_ticker,
+        "market_cap": "N/A",
+        "volume": int(hist['Volume'].iloc[-1]),
+        "day_high": float(hist['High'].iloc[-1]),
+        "day_low": float(hist['Low'].iloc[-1]),
+        "52_week_high": "N/A",
+        "52_week_low": "N/A",
+        "source": "yfinance"
+    }
 
 
 def _format_contract(info: Dict, source: str) -> Dict:
@@ -104,6 +240,7 @@ def _format_contract(info: Dict, source: str) -> Dict:
         "day_low": info.get('dayLow', "N/A"),
         "52_week_high": info.get('fiftyTwoWeekHigh', "N/A"),
         "52_week_low": info.get('fiftyTwoWeekLow', "N/A"),
+        "pe": info.get('trailingPE'),
         "source": source
     }
 
@@ -151,80 +288,288 @@ def _get_realistic_mock(ticker: str, is_indian: bool) -> Dict:
 
 
 def get_price_twelve_data(ticker: str, api_key: str) -> Optional[Dict]:
-    """Fetch real-time price from Twelve Data API."""
+    """
+    Fetch real-time price from Twelve Data API.
+    Raises on transport errors, throttling and server errors so the
+    provider's circuit breaker sees them; None means no quote for ticker.
+    """
+    response = http_get(
+        "https://api.twelvedata.com/quote",
+        params={"symbol": ticker, "apikey": api_key},
+        timeout=5
+    )
+    _raise_for_twelve_data(response.status_code)
+    
+    data = response.json()
+    # Errors also come back as HTTP 200 with {"status": "error", "code": ...}
+    if isinstance(data, dict) and data.get("status") == "error":
+        _raise_for_twelve_data(data.get("code"))
+        return None
+    
+    return _twelve_data_contract(data, ticker)
+
+
+def _raise_for_twelve_data(code) -> None:
+    """Raise for rate limiting (429) and server errors (5xx)."""
     try:
-        import requests
-        url = f"https://api.twelvedata.com/quote?symbol={ticker}&apikey={api_key}"
-        response = requests.get(url, timeout=5)
+        code = int(code)
+    except (TypeError, ValueError):
+        return
+    if code == 429 or code >= 500:
+        raise RuntimeError(f"Twelve Data returned {code}")
+
+
+def _twelve_data_contract(data: Dict, ticker: str) -> Optional[Dict]:
+    """Format one Twelve Data quote object to our standard, or None if invalid."""
+    # /quote reports the last trade as "close"; "price" comes from /price
+    raw_price = data.get('price') or data.get('close')
+    if raw_price is None:
+        return None
         
+    current_price = float(raw_price)
+    change_percent = float(data.get('percent_change', 0))
+    
+    return {
+        "price": round(current_price, 2),
+        "change_percent": round(change_percent, 2),
+        "is_up": change_percent >= 0,
+        "currency": "$", 
+        "name": data.get('name', ticker),
+        "market_cap": "N/A", 
+        "volume": data.get('volume'),
+        "day_high": data.get('high'),
+        "day_low": data.get('low'),
+        "52_week_high": data.get('fifty_two_week', {}).get('high', "N/A"),
+        "52_week_low": data.get('fifty_two_week', {}).get('low', "N/A"),
+        "source": "TwelveData"
+    }
+
+
+# ============================================================================
+# 1b. BATCH QUOTES (multi-ticker)
+# ============================================================================
+def get_stock_prices(tickers: List[str], refresh: bool = False) -> Dict[str, Dict]:
+    """
+    Fetch quotes for many tickers with bulk upstream calls:
+    1. Quote cache (fresh entries only; skipped when refresh=True)
+    2. yfinance multi-ticker download (one request for all misses)
+    3. Twelve Data comma-separated /quote (one request for what's left)
+    4. Realistic Mock (Last Resort)
+    Returns {TICKER: contract} in the order given, same shape as get_stock_price.
+    Bulk quotes carry no name, market cap or P/E, so they are cached under
+    their own key: a full quote is served when one is fresh, but a bulk
+    quote never replaces it.
+    """
+    ordered = list(dict.fromkeys(t.upper() for t in tickers if t and t.strip()))
+    results: Dict[str, Dict] = {}
+    
+    for ticker in ([] if refresh else ordered):
+        cached = QUOTE_CACHE.get((ticker, "quote", None)) or QUOTE_CACHE.get((ticker, "quote", "bulk"))
+        if cached is not None:
+            results[ticker] = cached
+    
+    missing = [t for t in ordered if t not in results]
+    if missing:
+        results.update(_get_prices_yfinance_bulk(missing))
+    
+    missing = [t for t in ordered if t not in results]
+    twelve_data_key = os.getenv("TWELVE_DATA_API_KEY")
+    if missing and twelve_data_key:
+        results.update(_get_prices_twelve_data_bulk(missing, twelve_data_key))
+    
+    for ticker in ordered:
+        if ticker not in results:
+            is_indian = ".NS" in ticker or ".BO" in ticker
+            results[ticker] = _get_realistic_mock(ticker, is_indian)
+        elif results[ticker].get("source") != "Emergency Mock":
+            QUOTE_CACHE.set((ticker, "quote", "bulk"), results[ticker])
+    
+    return {t: results[t] for t in ordered}
+
+
+def _get_prices_yfinance_bulk(tickers: List[str], period: str = "1y") -> Dict[str, Dict]:
+    """
+    One yf.download call for all tickers; the 52-week range comes from the
+    bars, so it is only meaningful with the default 1y period.
+    """
+    yf_map = {t.replace("/", "-"): t for t in tickers}
+    try:
+        import yfinance as yf
+        data = yf.download(
+            list(yf_map), period=period, interval="1d",
+            group_by="ticker", progress=False, threads=True, auto_adjust=False
+        )
+    except Exception as e:
+        print(f"[SCRAPER] yfinance bulk download failed: {e}")
+        return {}
+    
+    if data is None or data.empty:
+        return {}
+    
+    results = {}
+    for yf_ticker, ticker in yf_map.items():
         try:
-            data = response.json()
-        except:
-            return None
-        
-        if "price" not in data:
-            return None
+            frame = data[yf_ticker] if yf_ticker in data.columns.get_level_values(0) else data
+            frame = frame.dropna(subset=["Close"])
+            if frame.empty:
+                continue
             
-        current_price = float(data['price'])
-        change_percent = float(data.get('percent_change', 0))
-        
-        return {
-            "price": round(current_price, 2),
-            "change_percent": round(change_percent, 2),
-            "is_up": change_percent >= 0,
-            "currency": "$", 
-            "name": data.get('name', ticker),
-            "market_cap": "N/A", 
-            "volume": data.get('volume'),
-            "day_high": data.get('high'),
-            "day_low": data.get('low'),
-            "52_week_high": data.get('fifty_two_week', {}).get('high', "N/A"),
-            "52_week_low": data.get('fifty_two_week', {}).get('low', "N/A"),
-            "source": "TwelveData"
-        }
+            is_indian = ".NS" in ticker or ".BO" in ticker
+            currency = (currency_for(ticker) or {}).get("currency_code") or ("INR" if is_indian else "USD")
+            last = frame.iloc[-1]
+            prev_close = float(frame["Close"].iloc[-2]) if len(frame) > 1 else float(last["Open"])
+            info = {
+                "regularMarketPrice": float(last["Close"]),
+                "previousClose": prev_close,
+                "currency": currency,
+                "shortName": yf_ticker,
+                "volume": int(last["Volume"]),
+                "dayHigh": float(last["High"]),
+                "dayLow": float(last["Low"]),
+                "fiftyTwoWeekHigh": round(float(frame["High"].max()), 2),
+                "fiftyTwoWeekLow": round(float(frame["Low"].min()), 2),
+            }
+            results[ticker] = _format_contract(info, source="yfinance")
+        except Exception as e:
+            print(f"[SCRAPER] yfinance bulk parse failed for {yf_ticker}: {e}")
+    
+    return results
+
+
+def _get_prices_twelve_data_bulk(tickers: List[str], api_key: str) -> Dict[str, Dict]:
+    """One Twelve Data /quote call with comma-separated symbols."""
+    td_map = {t.replace("-", "/"): t for t in tickers}
+    try:
+        response = http_get(
+            "https://api.twelvedata.com/quote",
+            params={"symbol": ",".join(td_map), "apikey": api_key},
+            timeout=5
+        )
+        data = response.json()
     except Exception as e:
-        print(f"[TwelveData] Exception: {e}")
-        return None
+        print(f"[TwelveData] Bulk quote failed: {e}")
+        return {}
+    
+    # A single symbol comes back as one quote object instead of a mapping
+    if len(td_map) == 1:
+        data = {next(iter(td_map)): data}
+    
+    results = {}
+    for td_ticker, ticker in td_map.items():
+        quote = data.get(td_ticker)
+        if isinstance(quote, dict):
+            try:
+                contract = _twelve_data_contract(quote, td_ticker)
+            except (TypeError, ValueError):
+                contract = None
+            if contract:
+                results[ticker] = contract
+    
+    return results
 
 
 # ============================================================================
 # 2. NEWS SCRAPER (GoogleNews)
 # ============================================================================
+# Articles requested per upstream poll (the store keeps the rest)
+NEWS_POLL_RESULTS = int(os.getenv("NEWS_POLL_RESULTS", "20"))
+
+
 def get_news(ticker: str, max_results: int = 5) -> str:
     """
     Fetch top news headlines for a stock ticker.
     Returns a formatted string of headlines.
     """
     try:
-        from GoogleNews import GoogleNews
-        
-        # Clean ticker for search
-        search_term = ticker.replace(".NS", "").replace(".BO", "").replace(".NYSE", "")
-        
-        # Initialize GoogleNews
-        gn = GoogleNews(lang='en', period='7d')
-        gn.clear()
-        gn.search(f"{search_term} stock")
-        
-        results = gn.results()[:max_results]
-        
-        if not results:
-            return f"No recent news found for {search_term}."
-        
-        # Format headlines
-        headlines = []
-        for i, article in enumerate(results, 1):
-            title = article.get('title', 'No title')
-            source = article.get('media', 'Unknown')
-            headlines.append(f"{i}. [{source}] {title}")
-        
-        return "\n".join(headlines)
-        
+        return format_news(ticker, get_news_items(ticker)[:max_results])
     except Exception as e:
         print(f"[SCRAPER ERROR] get_news({ticker}): {str(e)}")
         return f"News unavailable for {ticker}. Error: {str(e)}"
 
 
+def get_news_items(ticker: str, max_results: int = 10) -> List[Dict]:
+    """
+    News stories as structured items (title, source, published, link, plus
+    coverage, sources and sentiment score), newest first, read from the
+    local news store. Upstream is polled at most every NEWS_SYNC_INTERVAL
+    and only unseen articles are ingested. Raises on upstream errors only
+    when the store has nothing for the ticker.
+    """
+    try:
+        NEWS_STORE.sync(ticker, _news_poll(ticker))
+    except Exception as e:
+        stories = NEWS_STORE.stories(ticker, max_results)
+        if not stories:
+            raise
+        print(f"[SCRAPER] News poll failed for {ticker}, serving stored stories: {e}")
+        return stories
+    return NEWS_STORE.stories(ticker, max_results)
+
+
+def _news_poll(ticker: str):
+    return lambda last_synced: _scrape_news_items(ticker, NEWS_POLL_RESULTS, last_synced)
+
+
+def _scrape_news_items(ticker: str, max_results: int = 10, last_synced: Optional[float] = None) -> List[Dict]:
+    """
+    One GoogleNews search (title, source, published, link), in relevance
+    order. Searches the last day when the store was polled within it,
+    else the last week. Raises on upstream errors.
+    """
+    from GoogleNews import GoogleNews
+    
+    # Clean ticker for search
+    search_term = _search_term(ticker)
+    
+    # Initialize GoogleNews
+    recent = last_synced is not None and time.time() - last_synced < 24 * 3600
+    gn = GoogleNews(lang='en', period='1d' if recent else '7d')
+    gn.clear()
+    gn.search(f"{search_term} stock")
+    
+    items = []
+    for article in gn.results()[:max_results]:
+        published = article.get('datetime')
+        items.append({
+            "title": article.get('title') or 'No title',
+            "source": article.get('media') or 'Unknown',
+            "published": published.isoformat() if isinstance(published, datetime) else None,
+            "link": article.get('link'),
+        })
+    return items
+
+
+def format_news(ticker: str, items: List[Dict]) -> str:
+    if not items:
+        return f"No recent news found for {_search_term(ticker)}."
+    
+    # Format headlines
+    return "\n".join(f"{i}. [{item['source']}] {item['title']}" for i, item in enumerate(items, 1))
+
+
+def _search_term(ticker: str) -> str:
+    return ticker.replace(".NS", "").replace(".BO", "").replace(".NYSE", "")
+
+
+def fetch_news_headlines(query: str, max_results: int = 10) -> List[Dict]:
+    """
+    News items with a VADER score per headline (sentiment_score, -1..1, and
+    sentiment_label). Returns [] when the news source is unavailable.
+    """
+    try:
+        items = get_news_items(query, max_results)
+    except Exception as e:
+        print(f"[SCRAPER ERROR] fetch_news_headlines({query}): {str(e)}")
+        return []
+    # Stored stories were scored at ingest
+    fresh = iter(vader_scores([item["title"] for item in items if item.get("score") is None]))
+    scores = [item["score"] if item.get("score") is not None else next(fresh) for item in items]
+    return [
+        {**item, "sentiment_score": round(score, 3), "sentiment_label": sentiment_label(score)}
+        for item, score in zip(items, scores)
+    ]
+
+
 # ============================================================================
 # 3. REDDIT/SOCIAL SCRAPER (praw)
 # ============================================================================
@@ -234,123 +579,281 @@ def get_reddit_posts(ticker: str, max_posts: int = 5) -> str:
     Returns a formatted string of posts with sentiment hints.
     """
     try:
-        import praw
-        
-        # Check for Reddit API credentials
-        client_id = os.getenv("REDDIT_CLIENT_ID")
-        client_secret = os.getenv("REDDIT_CLIENT_SECRET")
-        user_agent = os.getenv("REDDIT_USER_AGENT", "TrackBets/1.0")
-        
-        if not client_id or not client_secret:
+        return format_social(ticker, get_social_items(ticker)[:max_posts])
+    except Exception as e:
+        print(f"[SCRAPER ERROR] DuckDuckGo fallback: {str(e)}")
+        return "Social media data unavailable (API limit reached)."
+
+
+# Subreddits searched together in one combined ("a+b+c") query
+REDDIT_SUBREDDITS = os.getenv(
+    "REDDIT_SUBREDDITS", "IndianStreetBets+wallstreetbets+stocks+investing"
+).replace(",", "+")
+REDDIT_SEARCH_LIMIT = int(os.getenv("REDDIT_SEARCH_LIMIT", "10"))
+
+_reddit = None
+_reddit_lock = threading.Lock()
+# praw instances are not thread-safe: searches on the shared client take turns
+_reddit_search_lock = threading.Lock()
+_ddgs = None
+_ddgs_lock = threading.Lock()
+
+
+def _reddit_client():
+    """One authenticated praw client per process (None without credentials)."""
+    global _reddit
+    with _reddit_lock:
+        if _reddit is None:
+            import praw
+            
+            # Check for Reddit API credentials
+            client_id = os.getenv("REDDIT_CLIENT_ID")
+            client_secret = os.getenv("REDDIT_CLIENT_SECRET")
+            if not client_id or not client_secret:
+                return None
+            
+            _reddit = praw.Reddit(
+                client_id=client_id,
+                client_secret=client_secret,
+                user_agent=os.getenv("REDDIT_USER_AGENT", "TrackBets/1.0")
+            )
+        return _reddit
+
+
+def get_social_items(ticker: str, max_posts: int = 10) -> List[Dict]:
+    """
+    Reddit posts as structured items (title, subreddit, upvotes, sentiment,
+    published), most upvoted first. Falls back to DuckDuckGo when praw is
+    not configured or fails; raises only if the fallback fails too.
+    """
+    try:
+        if _reddit_client() is None:
             # Fallback: Use DuckDuckGo search for Reddit posts
             return _get_reddit_via_duckduckgo(ticker)
         
-        # Initialize Reddit client
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
-        )
-        
-        # Clean ticker
-        search_term = ticker.replace(".NS", "").replace(".BO", "")
-        
-        # Search relevant subreddits
-        subreddits = ["IndianStreetBets", "wallstreetbets", "stocks", "investing"]
-        posts = []
+        posts = _cached_social(_search_term(ticker), "reddit", _search_reddit)
         
-        for sub_name in subreddits:
-            try:
-                subreddit = reddit.subreddit(sub_name)
-                for post in subreddit.search(search_term, limit=2, time_filter="week"):
-                    sentiment = _quick_sentiment(post.title + " " + (post.selftext[:200] if post.selftext else ""))
-                    posts.append({
-                        "title": post.title[:100],
-                        "subreddit": sub_name,
-                        "upvotes": post.score,
-                        "sentiment": sentiment
-                    })
-            except:
-                continue
-        
-        if not posts:
-            return f"No Reddit discussions found for {search_term} in the past week."
-        
-        # Sort by upvotes and format
-        posts = sorted(posts, key=lambda x: x['upvotes'], reverse=True)[:max_posts]
-        
-        formatted = []
-        for i, p in enumerate(posts, 1):
-            formatted.append(f"{i}. [r/{p['subreddit']}] ({p['sentiment']}) {p['title']} | ⬆️ {p['upvotes']}")
+        # Score all posts in one batch
+        sentiments = label_many(p["text"] for p in posts)
+        items = [
+            {k: v for k, v in {**post, "sentiment": sentiment}.items() if k != "text"}
+            for post, sentiment in zip(posts, sentiments)
+        ]
         
-        return "\n".join(formatted)
+        # Sort by upvotes
+        return sorted(items, key=lambda x: x['upvotes'], reverse=True)[:max_posts]
         
     except Exception as e:
         print(f"[SCRAPER ERROR] get_reddit_posts({ticker}): {str(e)}")
         return _get_reddit_via_duckduckgo(ticker)
 
 
-def _get_reddit_via_duckduckgo(ticker: str) -> str:
+def _cached_social(search_term: str, source: str, search) -> List[Dict]:
+    """Raw search results, shared for SOCIAL_CACHE_TTL; concurrent misses search once."""
+    key = (search_term.upper(), source)
+    return SOCIAL_CACHE.get_or_load(
+        key,
+        lambda: SOCIAL_FLIGHT.do(key, lambda: search(search_term))
+    )
+
+
+def _search_reddit(search_term: str) -> List[Dict]:
+    """
+    One combined multi-subreddit search (a single API round-trip).
+    Serialized on the shared client; results are cached anyway.
+    """
+    reddit = _reddit_client()
+    posts = []
+    with _reddit_search_lock:
+        subreddit = reddit.subreddit(REDDIT_SUBREDDITS)
+        for post in subreddit.search(search_term, limit=REDDIT_SEARCH_LIMIT, time_filter="week"):
+            posts.append({
+                "title": post.title[:100],
+                "subreddit": post.subreddit.display_name,
+                "upvotes": post.score,
+                "published": datetime.fromtimestamp(post.created_utc).isoformat(),
+                "text": post.title + " " + (post.selftext[:200] if post.selftext else "")
+            })
+    return posts
+
+
+def format_social(ticker: str, items: List[Dict]) -> str:
+    search_term = ticker.replace(".NS", "").replace(".BO", "")
+    if not items:
+        return f"No Reddit posts found for {search_term}."
+    
+    formatted = []
+    for i, p in enumerate(items, 1):
+        if p.get("subreddit"):
+            formatted.append(f"{i}. [r/{p['subreddit']}] ({p['sentiment']}) {p['title']} | ⬆️ {p['upvotes']}")
+        else:
+            formatted.append(f"{i}. [Reddit] {p['title']}")
+    
+    return "\n".join(formatted)
+
+
+def _get_reddit_via_duckduckgo(ticker: str) -> List[Dict]:
     """
     Fallback: Scrape Reddit mentions via DuckDuckGo search.
     """
-    try:
-        from duckduckgo_search import DDGS
-        
-        search_term = ticker.replace(".NS", "").replace(".BO", "")
-        
-        with DDGS() as ddgs:
-            results = list(ddgs.text(
-                f"{search_term} stock site:reddit.com",
-                max_results=5
-            ))
-        
-        if not results:
-            return f"No Reddit posts found for {search_term}."
-        
-        formatted = []
-        for i, r in enumerate(results, 1):
-            title = r.get('title', '')[:80]
-            formatted.append(f"{i}. [Reddit] {title}")
-        
-        return "\n".join(formatted)
-        
-    except Exception as e:
-        print(f"[SCRAPER ERROR] DuckDuckGo fallback: {str(e)}")
-        return "Social media data unavailable (API limit reached)."
+    return [dict(r) for r in _cached_social(_search_term(ticker), "duckduckgo", _search_duckduckgo)]
+
+
+def _search_duckduckgo(search_term: str) -> List[Dict]:
+    """
+    One shared DDGS session per process. Searches are serialized: DuckDuckGo
+    rate-limits bursts, and results are cached anyway.
+    """
+    global _ddgs
+    with _ddgs_lock:
+        if _ddgs is None:
+            from duckduckgo_search import DDGS
+            _ddgs = DDGS()
+        results = list(_ddgs.text(
+            f"{search_term} stock site:reddit.com",
+            max_results=5
+        ))
+    
+    return [{"title": r.get('title', '')[:80], "link": r.get('href')} for r in results]
 
 
 def _quick_sentiment(text: str) -> str:
     """
-    Quick rule-based sentiment detection.
+    Quick rule-based sentiment detection (compiled lexicon, see sentiment.py).
     Returns: 🟢 Bullish, 🔴 Bearish, 🟡 Neutral
     """
-    text = text.lower()
-    
-    bullish_words = ['buy', 'bullish', 'moon', 'rocket', 'undervalued', 'long', 'calls', 'breakout', 'strong', 'growth']
-    bearish_words = ['sell', 'bearish', 'crash', 'puts', 'overvalued', 'short', 'dump', 'avoid', 'weak', 'decline']
-    
-    bullish_count = sum(1 for word in bullish_words if word in text)
-    bearish_count = sum(1 for word in bearish_words if word in text)
-    
-    if bullish_count > bearish_count:
-        return "🟢 Bullish"
-    elif bearish_count > bullish_count:
-        return "🔴 Bearish"
-    return "🟡 Neutral"
+    return sentiment_label(score_text(text))
+
+
+# ============================================================================
+# 4. SENTIMENT (VADER Market Pulse)
+# ============================================================================
+def get_aggregated_sentiment(ticker: str) -> Dict:
+    """
+    Market Pulse for a ticker: news and Reddit fetched in parallel, scored
+    with VADER and blended into overall_score (-1..1). See
+    sentiment.aggregate_sentiment for the shape.
+    """
+    sources = {"news": get_news_items, "social": get_social_items}
+    futures = {key: _FETCH_POOL.submit(fn, ticker) for key, fn in sources.items()}
+    items = {}
+    for key, future in futures.items():
+        try:
+            items[key] = future.result(timeout=FETCH_TIMEOUTS[key])
+        except Exception as e:
+            print(f"[SCRAPER ERROR] get_aggregated_sentiment({ticker}) {key}: {str(e)}")
+            items[key] = []
+    return aggregate_sentiment(items["news"], items["social"])
+
+
+# Older name, kept for callers of the previous scraper API
+fetch_aggregated_sentiment = get_aggregated_sentiment
 
 
 # ============================================================================
 # 5. HISTORICAL DATA SCRAPER (Graph)
 # ============================================================================
-def get_historical_data(ticker: str, period: str = "1mo") -> Dict:
+def get_historical_data(ticker: str, period: str = "1mo", fmt: str = "points",
+                        ohlcv: bool = False) -> Dict:
+    """
+    Cached wrapper around _fetch_historical_data.
+    fmt="points" (default) returns [{"time", "value"}, ...];
+    fmt="columnar" returns parallel "time" / "value" arrays, plus
+    open/high/low/close/volume arrays when ohlcv=True.
+    Empty or failed histories are not cached.
+    """
+    key = (ticker.upper(), "history", period, fmt, ohlcv)
+    return HISTORY_CACHE.get_or_load(
+        key,
+        lambda: _fetch_historical_data(ticker, period, fmt, ohlcv),
+        should_cache=lambda data: bool(data.get("points") or data.get("time"))
+    )
+
+
+def _fetch_historical_data(ticker: str, period: str = "1mo", fmt: str = "points",
+                           ohlcv: bool = False) -> Dict:
     """
     Fetch historical data for graphing.
-    Priority: Twelve Data -> yfinance
+    Bars come from the local history store; only the missing tail (or a
+    missing older range) is downloaded, with priority Twelve Data -> yfinance.
     """
     ticker = ticker.upper()
     
-    # Format Tickers
+    bars, source, error = _sync_history(ticker, period)
+    if not len(bars):
+        if fmt == "columnar":
+            return {"format": "columnar", "time": [], "value": [], "error": error or "No history found"}
+        return {"points": [], "error": error or "No history found"}
+    
+    times = bars["time"].astype(str).tolist()
+    closes = _json_column(bars["close"])
+    
+    if fmt == "columnar":
+        result = {"format": "columnar", "time": times, "value": closes, "source": source}
+        if ohlcv:
+            for field in ("open", "high", "low", "close", "volume"):
+                result[field] = _json_column(bars[field], 0 if field == "volume" else 2)
+        return result
+    
+    points = [{"time": t, "value": v} for t, v in zip(times, closes)]
+    return {"points": points, "source": source}
+
+
+def _json_column(values: np.ndarray, decimals: int = 2) -> List:
+    """Round a float column and turn NaN into None (JSON has no NaN)."""
+    rounded = np.round(values, decimals)
+    if np.isnan(rounded).any():
+        return np.where(np.isnan(rounded), None, rounded).tolist()
+    return rounded.tolist()
+
+
+def get_technical_indicators(ticker: str, period: str = "1y") -> Dict:
+    """
+    Indicator snapshot (RSI, MACD, SMA/EMA, Bollinger, ATR, volume z-score)
+    computed over the stored daily bars. Returns {} if there is no history.
+    """
+    try:
+        bars, _, _ = _sync_history(ticker.upper(), period)
+        return compute_indicators(bars)
+    except Exception as e:
+        print(f"[Indicators] failed for {ticker}: {e}")
+        return {}
+
+
+def get_technical_indicators_many(tickers: List[str], period: str = "1y") -> Dict[str, Dict]:
+    """Indicator snapshots for many tickers; history syncs run in parallel."""
+    ordered = list(dict.fromkeys(t.upper() for t in tickers if t and t.strip()))
+    snapshots = _FETCH_POOL.map(lambda ticker: get_technical_indicators(ticker, period), ordered)
+    return dict(zip(ordered, snapshots))
+
+
+def _sync_history(ticker: str, period: str) -> tuple:
+    """
+    Bring the stored bars for ticker up to date for this period.
+    Returns (bars, source, error). If the upstream fetch fails, whatever is
+    already on disk is still served.
+    """
+    with HISTORY_STORE.lock(ticker):
+        plan = HISTORY_STORE.plan_sync(ticker, period)
+        error = None
+        if plan is not None:
+            fetch_from, covered_from, backfill = plan
+            new_bars, source = _download_bars(ticker, fetch_from)
+            if len(new_bars):
+                HISTORY_STORE.merge(ticker, new_bars, source, covered_from, backfill)
+            else:
+                error = source
+        
+        meta = HISTORY_STORE.meta(ticker) or {}
+        bars = HISTORY_STORE.read(ticker, period_start(period))
+        return bars, meta.get("source"), error
+
+
+def _download_bars(ticker: str, start) -> tuple:
+    """
+    Download daily bars from start (None = full history).
+    Returns (bars, source) or (empty, error message).
+    """
     yf_ticker = ticker.replace("/", "-")
     td_ticker = ticker.replace("-", "/")
     
@@ -358,18 +861,24 @@ def get_historical_data(ticker: str, period: str = "1mo") -> Dict:
     twelve_data_key = os.getenv("TWELVE_DATA_API_KEY")
     if twelve_data_key:
         try:
-            import requests
-            # interval: 1day for 1mo, maybe 1h for shorter periods? logic can be enhanced.
-            # outputsize=30 for roughly 1 month of trading days
-            url = f"https://api.twelvedata.com/time_series?symbol={td_ticker}&interval=1day&outputsize=30&apikey={twelve_data_key}"
-            response = requests.get(url, timeout=5)
+            params = {"symbol": td_ticker, "interval": "1day", "outputsize": 5000, "apikey": twelve_data_key}
+            if start is not None:
+                params["start_date"] = start.isoformat()
+            response = http_get("https://api.twelvedata.com/time_series", params=params, timeout=5)
             data = response.json()
             
             if "values" in data:
                 # Twelve Data returns newest first. We usually want oldest first for graphs.
-                values = data["values"][::-1] 
-                points = [{"time": v["datetime"], "value": float(v["close"])} for v in values]
-                return {"points": points, "source": "TwelveData"}
+                values = data["values"][::-1]
+                bars = bars_from_columns(
+                    [v["datetime"][:10] for v in values],
+                    [v.get("open", "nan") for v in values],
+                    [v.get("high", "nan") for v in values],
+                    [v.get("low", "nan") for v in values],
+                    [v.get("close", "nan") for v in values],
+                    [v.get("volume", "nan") for v in values],
+                )
+                return bars, "TwelveData"
                 
         except Exception as e:
             print(f"[Graph] Twelve Data failed for {td_ticker}: {e}")
@@ -378,42 +887,242 @@ def get_historical_data(ticker: str, period: str = "1mo") -> Dict:
     try:
         import yfinance as yf
         stock = yf.Ticker(yf_ticker)
-        # period="1mo" is standard
-        hist = stock.history(period=period)
+        if start is None:
+            hist = stock.history(period="max")
+        else:
+            hist = stock.history(start=start.isoformat())
         
         if hist.empty:
-            return {"points": [], "error": "No history found"}
-            
-        points = []
-        for date, row in hist.iterrows():
-            points.append({
-                "time": date.strftime("%Y-%m-%d"),
-                "value": round(float(row["Close"]), 2)
-            })
-            
-        return {"points": points, "source": "yfinance"}
+            return empty_bars(), "No history found"
+        
+        bars = bars_from_columns(
+            hist.index.strftime("%Y-%m-%d").to_numpy(),
+            hist["Open"].to_numpy(),
+            hist["High"].to_numpy(),
+            hist["Low"].to_numpy(),
+            hist["Close"].to_numpy(),
+            hist["Volume"].to_numpy(),
+        )
+        return bars, "yfinance"
         
     except Exception as e:
         print(f"[Graph] yfinance failed for {yf_ticker}: {e}")
-        return {"points": [], "error": str(e)}
+        return empty_bars(), str(e)
 
 
 # ============================================================================
 # 6. COMBINED DATA FETCHER
 # ============================================================================
-def fetch_all_data(ticker: str) -> Dict:
+# Per-source deadlines in seconds, measured from the start of the fan-out.
+# Override with FETCH_TIMEOUT_PRICE / _HISTORY / _INDICATORS / _NEWS / _SOCIAL.
+FETCH_TIMEOUTS = {
+    "price_data": float(os.getenv("FETCH_TIMEOUT_PRICE", "6")),
+    "graph_data": float(os.getenv("FETCH_TIMEOUT_HISTORY", "8")),
+    "indicators": float(os.getenv("FETCH_TIMEOUT_INDICATORS", "8")),
+    "news": float(os.getenv("FETCH_TIMEOUT_NEWS", "6")),
+    "social": float(os.getenv("FETCH_TIMEOUT_SOCIAL", "6")),
+}
+
+# Overall budget for one fetch_all_data call; no source may run past it.
+FETCH_BUDGET = float(os.getenv("FETCH_BUDGET", "10"))
+
+# Shared, bounded pool so a burst of analyses can't spawn unbounded threads.
+_FETCH_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FETCH_WORKERS", "16")),
+    thread_name_prefix="fetch"
+)
+
+
+def _timeout_fallback(key: str, ticker: str):
+    """Placeholder value for a source that missed its deadline."""
+    ticker_upper = ticker.upper()
+    if key == "price_data":
+        is_indian = ".NS" in ticker_upper or ".BO" in ticker_upper
+        return _get_realistic_mock(ticker_upper, is_indian)
+    if key == "graph_data":
+        return {"points": [], "error": "Timed out"}
+    if key == "indicators":
+        return {}
+    if key == "news":
+        return f"News unavailable for {ticker}. Error: timed out"
+    return "Social media data unavailable (timed out)."
+
+
+# News and social are fetched as item lists (ranked into the prompt by
+# api.backend.context) and also exposed as the legacy formatted strings.
+_ITEM_SOURCES = {
+    "news": ("news_items", lambda ticker, items: format_news(ticker, items[:5])),
+    "social": ("social_items", lambda ticker, items: format_social(ticker, items[:5])),
+}
+
+
+def _sections(key: str, value, ticker: str) -> list:
+    """Expand one finished source into the (key, value) pairs it provides."""
+    if key not in _ITEM_SOURCES:
+        return [(key, value)]
+    items_key, fmt = _ITEM_SOURCES[key]
+    if isinstance(value, list):
+        return [(items_key, value), (key, fmt(ticker, value))]
+    # A fallback string: no items to rank
+    return [(items_key, []), (key, value)]
+
+
+def fetch_all_data(ticker: str, timeouts: Optional[Dict[str, float]] = None,
+                   budget: Optional[float] = None) -> Dict:
     """
     Fetch all data for a ticker in one call.
+    All sources run in parallel on a shared thread pool; each one gets
+    its own deadline and the whole call is capped by an overall budget.
+    A source that misses its deadline is replaced by its fallback value.
     Returns a comprehensive data dictionary.
     """
-    return {
+    result = {
         "ticker": ticker.upper(),
         "timestamp": datetime.now().isoformat(),
-        "price_data": get_stock_price(ticker),
-        "graph_data": get_historical_data(ticker),
-        "news": get_news(ticker),
-        "social": get_reddit_posts(ticker)
     }
+    timings = {}
+
+    for key, value, elapsed in iter_all_data(ticker, timeouts, budget):
+        result[key] = value
+        timings[key] = elapsed
+
+    result["timings"] = timings
+    return result
+
+
+def iter_all_data(ticker: str, timeouts: Optional[Dict[str, float]] = None,
+                  budget: Optional[float] = None):
+    """
+    Same fan-out as fetch_all_data, but yields (key, value, elapsed_seconds)
+    for each source the moment it completes (or misses its deadline).
+    News and social yield their item list first, then the formatted string;
+    once both are in, a "sentiment" section (Market Pulse) follows.
+    Used for streaming responses.
+    """
+    deadlines = dict(FETCH_TIMEOUTS)
+    if timeouts:
+        deadlines.update(timeouts)
+    budget = FETCH_BUDGET if budget is None else budget
+
+    sources = {
+        "price_data": get_stock_price,
+        "graph_data": get_historical_data,
+        "indicators": get_technical_indicators,
+        "news": get_news_items,
+        "social": get_social_items,
+    }
+
+    start = time.monotonic()
+    pending = {_FETCH_POOL.submit(fn, ticker): key for key, fn in sources.items()}
+    limit = {key: min(deadlines[key], budget) for key in sources}
+    scored = {}
+
+    def pulse(section: str, value):
+        # Emit the sentiment section once news and social items are both known
+        if section in ("news_items", "social_items"):
+            scored[section] = value
+            if len(scored) == 2:
+                yield "sentiment", aggregate_sentiment(scored["news_items"], scored["social_items"])
+
+    while pending:
+        elapsed = time.monotonic() - start
+        next_deadline = min(limit[key] for key in pending.values())
+        done, _ = wait(list(pending), timeout=max(0.0, next_deadline - elapsed), return_when=FIRST_COMPLETED)
+        elapsed = time.monotonic() - start
+
+        for future in done:
+            key = pending.pop(future)
+            try:
+                value = future.result()
+            except Exception as e:
+                print(f"[FETCH] {key} failed for {ticker}: {e}")
+                value = _timeout_fallback(key, ticker)
+            for section, section_value in _sections(key, value, ticker):
+                yield section, section_value, round(elapsed, 3)
+                for extra, extra_value in pulse(section, section_value):
+                    yield extra, extra_value, round(time.monotonic() - start, 3)
+
+        for future, key in list(pending.items()):
+            if elapsed >= limit[key]:
+                print(f"[FETCH] {key} timed out for {ticker}")
+                future.cancel()
+                del pending[future]
+                for section, section_value in _sections(key, _timeout_fallback(key, ticker), ticker):
+                    yield section, section_value, round(elapsed, 3)
+                    for extra, extra_value in pulse(section, section_value):
+                        yield extra, extra_value, round(time.monotonic() - start, 3)
+
+
+# News/social searches one batch keeps in flight at once, and its overall budget
+BATCH_FETCH_CONCURRENCY = int(os.getenv("BATCH_FETCH_CONCURRENCY", "4"))
+BATCH_FETCH_BUDGET = float(os.getenv("BATCH_FETCH_BUDGET", "20"))
+
+
+def fetch_all_data_many(tickers: List[str], budget: Optional[float] = None) -> Dict[str, Dict]:
+    """
+    fetch_all_data for many tickers without one fan-out per ticker: quotes
+    come from one bulk call (get_stock_prices), indicators from one task
+    per ticker, and the news / social searches run at most
+    BATCH_FETCH_CONCURRENCY at a time on the shared pool. No task here
+    waits on other pool tasks, and the whole call is bounded by the
+    budget: anything still pending then gets its fallback value.
+    Returns {TICKER: data} with the same keys the analysis reads from
+    fetch_all_data (price_data, indicators, news/_items, social/_items,
+    sentiment).
+    """
+    ordered = list(dict.fromkeys(t.upper() for t in tickers if t and t.strip()))
+    budget = BATCH_FETCH_BUDGET if budget is None else budget
+    deadline = time.monotonic() + budget
+
+    quotes = _FETCH_POOL.submit(get_stock_prices, ordered)
+    indicators = {ticker: _FETCH_POOL.submit(get_technical_indicators, ticker) for ticker in ordered}
+
+    sources = {"news": get_news_items, "social": get_social_items}
+    jobs = [(ticker, key) for ticker in ordered for key in sources]
+    running, fetched = {}, {}
+    while jobs or running:
+        while jobs and len(running) < BATCH_FETCH_CONCURRENCY:
+            ticker, key = jobs.pop(0)
+            running[_FETCH_POOL.submit(sources[key], ticker)] = (ticker, key)
+        done, _ = wait(list(running), timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            ticker, key = running.pop(future)
+            try:
+                fetched[(ticker, key)] = future.result()
+            except Exception as e:
+                print(f"[FETCH] {key} failed for {ticker}: {e}")
+    for future, (ticker, key) in running.items():
+        future.cancel()
+        print(f"[FETCH] {key} timed out for {ticker} (batch)")
+
+    prices = _batch_result(quotes, deadline, "quotes") or {}
+    results = {}
+    for ticker in ordered:
+        data = {
+            "ticker": ticker,
+            "price_data": prices.get(ticker) or _timeout_fallback("price_data", ticker),
+            "indicators": _batch_result(indicators[ticker], deadline, f"indicators {ticker}") or {},
+        }
+        for key in sources:
+            value = fetched.get((ticker, key))
+            if value is None:
+                value = _timeout_fallback(key, ticker)
+            data.update(_sections(key, value, ticker))
+        data["sentiment"] = aggregate_sentiment(data["news_items"], data["social_items"])
+        results[ticker] = data
+    return results
+
+
+def _batch_result(future, deadline: float, label: str):
+    """future's result within what is left of the batch budget, else None."""
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except Exception as e:
+        future.cancel()
+        print(f"[FETCH] {label} missed the batch budget: {e or type(e).__name__}")
+        return None
 
 
 # ============================================================================
@@ -492,14 +1201,94 @@ def get_mock_tweets(ticker: str) -> List[Dict]:
         
     return tweets
 
+# ============================================================================
+# 8. REFRESH HOOKS (background prefetch)
+# ============================================================================
+# Re-fetch one kind of data and overwrite its cache, so request-path reads
+# for the same ticker stay hits. Used by api.backend.prefetch.
+# Fields a light bulk quote brings up to date on top of a full quote
+_LIVE_QUOTE_FIELDS = ("price", "change_percent", "is_up", "volume", "day_high", "day_low")
+
+
+def refresh_quotes(tickers: List[str]) -> List[str]:
+    """
+    One light bulk call (5 days of daily bars) for all tickers, laid over
+    each ticker's full quote so the cache keeps full contracts. Returns the
+    tickers with no recent full quote to lay it over (see refresh_quote).
+    """
+    ordered = list(dict.fromkeys(t.upper() for t in tickers if t and t.strip()))
+    bases = {t: QUOTE_BASES.get(t) for t in ordered}
+    stale = [t for t in ordered if bases[t] is None]
+    
+    fresh = [t for t in ordered if bases[t] is not None]
+    if fresh:
+        for ticker, live in _get_prices_yfinance_bulk(fresh, period="5d").items():
+            quote = {**bases[ticker], **{k: live[k] for k in _LIVE_QUOTE_FIELDS}}
+            QUOTE_CACHE.set((ticker, "quote", None), quote)
+    return stale
+
+
+def refresh_quote(ticker: str) -> Dict:
+    """Fetch one full quote (same chain as get_stock_price) and cache it."""
+    quote = _load_full_quote(ticker)
+    if quote.get("source") != "Emergency Mock":
+        QUOTE_CACHE.set((ticker.upper(), "quote", None), quote)
+    return quote
+
+
+def refresh_history(ticker: str) -> bool:
+    """Sync the stored bars (1y, as the indicators use) and the default graph."""
+    get_technical_indicators(ticker)
+    history = _fetch_historical_data(ticker)
+    if history.get("points"):
+        HISTORY_CACHE.set((ticker.upper(), "history", "1mo", "points", False), history)
+        return True
+    return False
+
+
+def refresh_news(ticker: str) -> List[Dict]:
+    """Poll news now; returns the newly ingested articles."""
+    return NEWS_STORE.sync(ticker, _news_poll(ticker), force=True)
+
+
+def refresh_social(ticker: str) -> int:
+    """Re-run the social search and replace the cached raw results."""
+    search_term = _search_term(ticker)
+    try:
+        reddit = _reddit_client()
+    except ImportError:
+        reddit = None
+    if reddit is not None:
+        source, posts = "reddit", _search_reddit(search_term)
+    else:
+        source, posts = "duckduckgo", _search_duckduckgo(search_term)
+    SOCIAL_CACHE.set((search_term.upper(), source), posts)
+    return len(posts)
+
+
 # ============================================================================
 # EXPORTS
 # ============================================================================
 __all__ = [
     'get_stock_price',
+    'get_stock_prices',
     'get_historical_data',
+    'get_technical_indicators',
+    'get_technical_indicators_many',
     'get_news', 
+    'get_news_items',
+    'fetch_news_headlines',
+    'get_aggregated_sentiment',
+    'fetch_aggregated_sentiment',
     'get_reddit_posts',
+    'get_social_items',
     'get_mock_tweets',
-    'fetch_all_data'
+    'fetch_all_data',
+    'fetch_all_data_many',
+    'iter_all_data',
+    'refresh_quotes',
+    'refresh_quote',
+    'refresh_history',
+    'refresh_news',
+    'refresh_social'
 ]
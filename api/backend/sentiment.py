@@ -0,0 +1,329 @@
+"""
+TrackBets Backend - Lexicon Sentiment Module
+============================================
+Fast rule-based sentiment for social posts and headlines. One compiled
+regex tokenizes each text and every token is a single dict lookup, so cost
+grows with the text, not with the lexicon.
+
+Terms only match whole words ("long" does not fire on "belong"), a
+negation ("not", "don't", "never", ...) flips the terms in the next few
+words of its clause, and the summed weights are squashed into a compound
+score in [-1, 1].
+
+Headlines and posts for the "Market Pulse" are scored with VADER in
+batches: scores are memoized by text hash, and large backfills fan out
+across a process pool. aggregate_sentiment() turns them into the
+overall_score consumed by the rule-based verdict.
+"""
+
+import os
+import re
+import math
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from api.backend.cache import TTLCache, content_key
+
+
+# Weighted terms; multi-word phrases win over the words inside them
+TERMS = {
+    # Bullish
+    "buy": 1.5, "buying": 1.2, "bullish": 2.0, "moon": 2.0, "to the moon": 2.5,
+    "rocket": 1.5, "undervalued": 2.0, "long": 1.0, "calls": 1.0, "breakout": 1.5,
+    "strong": 1.0, "growth": 1.0, "rally": 1.5, "surge": 1.5, "soar": 1.5,
+    "upgrade": 1.5, "upgraded": 1.5, "outperform": 1.5, "beat": 1.2, "beats": 1.2,
+    "record high": 1.5, "all time high": 1.5, "buy the dip": 2.0, "short squeeze": 1.5,
+    "profit": 1.0, "gains": 1.0,
+    # Bearish
+    "sell": -1.5, "selling": -1.2, "bearish": -2.0, "crash": -2.5, "puts": -1.0,
+    "overvalued": -2.0, "short": -1.0, "dump": -2.0, "avoid": -1.5, "weak": -1.0,
+    "decline": -1.5, "plunge": -2.0, "sell off": -2.0, "selloff": -2.0,
+    "downgrade": -1.5, "downgraded": -1.5, "underperform": -1.5, "miss": -1.2,
+    "misses": -1.2, "loss": -1.0, "losses": -1.0, "bagholder": -1.5, "bag holder": -1.5,
+    "fraud": -3.0, "bankrupt": -3.0, "bankruptcy": -3.0, "scam": -2.5,
+}
+
+EMOJI = {
+    "🚀": 2.0, "🌙": 1.0, "📈": 1.5, "🐂": 1.5, "💎": 1.0, "💰": 1.0, "🟢": 1.0,
+    "📉": -1.5, "🐻": -1.5, "🩸": -1.5, "💀": -1.0, "🤡": -1.0, "🔴": -1.0,
+}
+
+NEGATIONS = (
+    "not", "no", "never", "neither", "nor", "without", "hardly", "barely", "cannot",
+    # n't contractions are caught by suffix; these are the apostrophe-less spellings
+    "dont", "doesnt", "didnt", "isnt", "arent", "wasnt", "werent", "wont", "wouldnt",
+    "cant", "couldnt", "shouldnt", "havent", "hasnt", "hadnt", "aint",
+)
+
+# Words after a negation that it still applies to (a clause break ends it sooner)
+NEGATION_SCOPE = 3
+# Negated terms flip and weaken ("not bad" is mildly good, not very good)
+NEGATION_FACTOR = -0.75
+# Compound = total / sqrt(total^2 + alpha)
+NORMALIZATION_ALPHA = 15.0
+# |compound| at which a text counts as bullish / bearish
+LABEL_THRESHOLD = 0.05
+
+_BREAKS = ".!?;:,\n"
+
+
+class LexiconScorer:
+    """
+    Single-pass scorer for a term / emoji lexicon: one compiled tokenizer
+    regex, then a dict lookup per token (phrases are checked only at tokens
+    that start one).
+    """
+
+    def __init__(self, terms: Dict[str, float], emoji: Optional[Dict[str, float]] = None,
+                 negations: Iterable[str] = NEGATIONS):
+        self.terms = {" ".join(term.lower().split()): weight for term, weight in terms.items()}
+        self.emoji = dict(emoji or {})
+        self.negations = frozenset(n.lower() for n in negations)
+
+        # First word -> lengths of the phrases starting with it, longest first
+        self._phrases: Dict[str, List[int]] = {}
+        for term in self.terms:
+            words = term.split()
+            if len(words) > 1:
+                self._phrases.setdefault(words[0], []).append(len(words))
+        for lengths in self._phrases.values():
+            lengths.sort(reverse=True)
+
+        emoji_class = "".join(re.escape(e) for e in self.emoji if len(e) == 1)
+        emoji_multi = "|".join(re.escape(e) for e in self.emoji if len(e) > 1)
+        parts = [r"\w+(?:['’]\w+)*", f"[{re.escape(_BREAKS)}]"]
+        if emoji_multi:
+            parts.append(emoji_multi)
+        if emoji_class:
+            parts.append(f"[{emoji_class}]")
+        self._token = re.compile("|".join(parts))
+
+    def _is_negation(self, token: str) -> bool:
+        return token in self.negations or token.endswith(("n't", "n’t"))
+
+    def raw_score(self, text: str) -> float:
+        """Sum of matched weights, with negation applied."""
+        tokens = self._token.findall((text or "").lower())
+        terms, emoji, phrases = self.terms, self.emoji, self._phrases
+        total = 0.0
+        negated = 0  # words left in the current negation's scope
+        i, n = 0, len(tokens)
+        while i < n:
+            token = tokens[i]
+            i += 1
+            weight = terms.get(token)
+            if token in phrases:
+                for length in phrases[token]:
+                    phrase = " ".join(tokens[i - 1:i - 1 + length])
+                    if phrase in terms:
+                        weight = terms[phrase]
+                        i += length - 1
+                        break
+            if weight is not None:
+                total += weight * NEGATION_FACTOR if negated else weight
+                negated = max(0, negated - 1)
+            elif token in emoji:
+                total += emoji[token]
+            elif token in _BREAKS or token == "but":
+                negated = 0
+            elif self._is_negation(token):
+                negated = NEGATION_SCOPE
+            else:
+                negated = max(0, negated - 1)
+        return total
+
+    def score(self, text: str) -> float:
+        """Compound sentiment in [-1, 1]."""
+        total = self.raw_score(text)
+        return total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+
+    def score_many(self, texts: Iterable[str]) -> List[float]:
+        score = self.score
+        return [score(text) for text in texts]
+
+
+def sentiment_label(score: float) -> str:
+    """Compound score -> 🟢 Bullish / 🔴 Bearish / 🟡 Neutral."""
+    if score >= LABEL_THRESHOLD:
+        return "🟢 Bullish"
+    if score <= -LABEL_THRESHOLD:
+        return "🔴 Bearish"
+    return "🟡 Neutral"
+
+
+LEXICON_SCORER = LexiconScorer(TERMS, EMOJI)
+
+
+def score_text(text: str) -> float:
+    return LEXICON_SCORER.score(text)
+
+
+def score_many(texts: Iterable[str]) -> List[float]:
+    """Compound scores for many texts (thousands per call is fine)."""
+    return LEXICON_SCORER.score_many(texts)
+
+
+def label_many(texts: Iterable[str]) -> List[str]:
+    return [sentiment_label(score) for score in score_many(texts)]
+
+
+# ============================================================================
+# VADER BATCH PIPELINE
+# ============================================================================
+# Scores are pure functions of the text, so they can live long
+VADER_CACHE = TTLCache(
+    "sentiment",
+    ttl=float(os.getenv("SENTIMENT_CACHE_TTL", str(24 * 3600))),
+    max_size=int(os.getenv("SENTIMENT_CACHE_SIZE", "20000"))
+)
+
+# Uncached texts in one call from which scoring moves to the process pool
+SENTIMENT_POOL_MIN = int(os.getenv("SENTIMENT_POOL_MIN", "2000"))
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Share of the overall score taken by news when social posts are present too
+NEWS_SENTIMENT_WEIGHT = float(os.getenv("NEWS_SENTIMENT_WEIGHT", "0.6"))
+
+_vader = None
+_vader_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _analyzer():
+    """VADER with the trading lexicon layered on top (built once per process)."""
+    global _vader
+    with _vader_lock:
+        if _vader is None:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+            analyzer = SentimentIntensityAnalyzer()
+            # VADER valences run -4..4. Adds the strong single-word trading
+            # terms it doesn't know ("bullish", "undervalued", ...); weak,
+            # ambiguous ones like "long" / "short" stay out of headlines.
+            analyzer.lexicon.update({
+                term: max(-4.0, min(4.0, weight * 1.5))
+                for term, weight in TERMS.items()
+                if " " not in term and abs(weight) >= 1.5 and term not in analyzer.lexicon
+            })
+            _vader = analyzer
+        return _vader
+
+
+def _vader_chunk(texts: List[str]) -> List[float]:
+    """Worker entry point: compound scores for a chunk of texts."""
+    analyzer = _analyzer()
+    return [analyzer.polarity_scores(text)["compound"] for text in texts]
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    """
+    Created on first large batch, usually from a request worker thread.
+    Workers are spawned, not forked: forking a threaded server can copy
+    locks that some other thread holds.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SENTIMENT_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the scoring workers, if any were started (app shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def vader_scores(texts: Iterable[str]) -> List[float]:
+    """
+    VADER compound scores (-1..1) for many texts. Repeated texts (in this
+    call or earlier ones) are scored once; large batches of new texts are
+    split across a process pool. Falls back to the lexicon scorer when
+    vaderSentiment is not installed.
+    """
+    texts = [text or "" for text in texts]
+    keys = [content_key(text) for text in texts]
+    scores: Dict[str, float] = {}
+    missing: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key in scores or key in missing:
+            continue
+        cached = VADER_CACHE.get(key)
+        if cached is None:
+            missing[key] = text
+        else:
+            scores[key] = cached
+
+    if missing:
+        batch = list(missing.values())
+        try:
+            if len(batch) >= SENTIMENT_POOL_MIN and SENTIMENT_WORKERS > 1:
+                size = -(-len(batch) // SENTIMENT_WORKERS)
+                chunks = [batch[i:i + size] for i in range(0, len(batch), size)]
+                fresh = [score for chunk in _process_pool().map(_vader_chunk, chunks) for score in chunk]
+            else:
+                fresh = _vader_chunk(batch)
+        except ImportError:
+            fresh = score_many(batch)
+        for key, score in zip(missing, fresh):
+            VADER_CACHE.set(key, score)
+            scores[key] = score
+
+    return [scores[key] for key in keys]
+
+
+def _weighted_mean(scores: List[float], weights: List[float]) -> Optional[float]:
+    total = sum(weights)
+    if not scores or total <= 0:
+        return None
+    return sum(s * w for s, w in zip(scores, weights)) / total
+
+
+def aggregate_sentiment(news_items: Optional[List[Dict]] = None,
+                        social_items: Optional[List[Dict]] = None) -> Dict:
+    """
+    "Market Pulse" for one ticker. Each news / social item gets a VADER
+    score (unless it carries one already); news is averaged evenly, posts
+    by log upvotes, and the two blend NEWS_SENTIMENT_WEIGHT : rest. Returns
+    overall_score (-1..1, 0 when there is nothing to score), label, and the
+    scored items.
+    """
+    news_items = [item for item in news_items or [] if item.get("title")]
+    social_items = [item for item in social_items or [] if item.get("title")]
+    # Items from the news store arrive already scored
+    items = news_items + social_items
+    fresh = iter(vader_scores([item["title"] for item in items if item.get("score") is None]))
+    scores = [item["score"] if item.get("score") is not None else next(fresh) for item in items]
+    news_scores, social_scores = scores[:len(news_items)], scores[len(news_items):]
+
+    news_score = _weighted_mean(news_scores, [1.0] * len(news_scores))
+    social_score = _weighted_mean(
+        social_scores, [1.0 + math.log1p(max(0, item.get("upvotes") or 0)) for item in social_items]
+    )
+    if news_score is not None and social_score is not None:
+        overall = NEWS_SENTIMENT_WEIGHT * news_score + (1 - NEWS_SENTIMENT_WEIGHT) * social_score
+    else:
+        overall = news_score if news_score is not None else (social_score or 0.0)
+
+    return {
+        "overall_score": round(overall, 3),
+        "label": sentiment_label(overall),
+        "news_score": None if news_score is None else round(news_score, 3),
+        "social_score": None if social_score is None else round(social_score, 3),
+        "news": [{**item, "score": round(score, 3)} for item, score in zip(news_items, news_scores)],
+        "social": [{**item, "score": round(score, 3)} for item, score in zip(social_items, social_scores)],
+    }
+
+
+__all__ = [
+    'LexiconScorer', 'LEXICON_SCORER', 'TERMS', 'EMOJI',
+    'score_text', 'score_many', 'label_many', 'sentiment_label',
+    'VADER_CACHE', 'vader_scores', 'aggregate_sentiment', 'shutdown_pool'
+]
@@ -0,0 +1,339 @@
+"""
+TrackBets Backend - Symbol Index Module
+=======================================
+Local ticker resolver: company name / symbol / brand -> Yahoo Finance
+ticker, answered from the bundled listings file (data/symbols.csv) with
+alias and rebrand tables, prefix lookup and trigram fuzzy matching.
+
+The LLM is only asked when nothing here matches confidently; its answers
+are written back into a learned overlay under DATA_DIR.
+"""
+
+import os
+import re
+import csv
+import json
+import bisect
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from api.backend.history_store import DATA_DIR
+
+
+SYMBOLS_PATH = os.getenv("SYMBOLS_PATH", os.path.join(os.path.dirname(__file__), "data", "symbols.csv"))
+LEARNED_SYMBOLS_PATH = os.getenv("LEARNED_SYMBOLS_PATH", os.path.join(DATA_DIR, "symbols_learned.json"))
+
+# Best match must score at least this to skip the LLM
+RESOLVER_MIN_SCORE = float(os.getenv("RESOLVER_MIN_SCORE", "0.85"))
+
+# Tie-break between listings of the same company (NSE first, BSE last)
+EXCHANGE_PRIORITY = {"NSE": 0, "NASDAQ": 1, "NYSE": 1, "CRYPTO": 2, "INDEX": 2, "BSE": 3}
+
+# Ambiguous brands -> the listing people almost always mean
+ALIASES = {
+    "tata": "TATAMOTORS.NS",
+    "reliance": "RELIANCE.NS",
+    "adani": "ADANIENT.NS",
+    "mahindra": "M&M.NS",
+    "hdfc": "HDFCBANK.NS",
+    "icici": "ICICIBANK.NS",
+    "sbi": "SBIN.NS",
+    "airtel": "BHARTIARTL.NS",
+    "bajaj": "BAJFINANCE.NS",
+    "larsen": "LT.NS",
+    "l and t": "LT.NS",
+    "hul": "HINDUNILVR.NS",
+    "maruti": "MARUTI.NS",
+    "lic": "LICI.NS",
+    "jio": "JIOFIN.NS",
+    "vodafone": "IDEA.NS",
+    "vi": "IDEA.NS",
+    "naukri": "NAUKRI.NS",
+    "google": "GOOGL",
+    "alphabet": "GOOGL",
+    "berkshire": "BRK-B",
+    "btc": "BTC-USD",
+    "eth": "ETH-USD",
+    "nifty": "^NSEI",
+    "sensex": "^BSESN",
+    "s and p": "^GSPC",
+    "nasdaq": "^IXIC",
+}
+
+# Renamed companies / retired symbols -> current symbol (exchange suffix kept)
+REBRANDS = {
+    "ZOMATO": "ETERNAL",
+    "MINDTREE": "LTIM",
+    "CADILAHC": "ZYDUSLIFE",
+    "FB": "META",
+}
+REBRAND_NAMES = {
+    "zomato": "ETERNAL.NS",
+    "mindtree": "LTIM.NS",
+    "cadila": "ZYDUSLIFE.NS",
+    "facebook": "META",
+}
+
+_STOPWORDS = {"ltd", "limited", "inc", "corp", "corporation", "co", "com", "plc", "the"}
+_VALID_TICKER = re.compile(r"^[A-Z0-9^][A-Z0-9.&^=-]{0,19}$")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, '&' -> 'and', punctuation and legal suffixes dropped."""
+    text = text.lower().replace("&", " and ")
+    words = re.sub(r"[^a-z0-9]+", " ", text).split()
+    return " ".join(w for w in words if w not in _STOPWORDS)
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _base_symbol(ticker: str) -> str:
+    """'RELIANCE.NS' -> 'RELIANCE'; symbols without a suffix are unchanged."""
+    return ticker.rsplit(".", 1)[0] if "." in ticker else ticker
+
+
+def _apply_rebrand(ticker: str) -> str:
+    base = _base_symbol(ticker)
+    if base in REBRANDS:
+        return REBRANDS[base] + ticker[len(base):]
+    return ticker
+
+
+# ============================================================================
+# SYMBOL INDEX
+# ============================================================================
+class SymbolIndex:
+    """
+    In-memory listings index. Every entry is reachable through several keys
+    (normalized name, bracketed brand, bare symbol); keys are kept sorted
+    for prefix lookup and posted by trigram for fuzzy lookup.
+    Loaded lazily on first use.
+    """
+
+    def __init__(self, path: str, learned_path: Optional[str] = None):
+        self.path = path
+        self.learned_path = learned_path
+        self._entries: List[Dict] = []
+        self._by_ticker: Dict[str, int] = {}
+        self._keys: List[tuple] = []            # sorted (key, entry index)
+        self._exact: Dict[str, List[int]] = {}  # key -> entry indexes
+        self._grams: Dict[str, List[str]] = {}  # trigram -> keys
+        self._gram_counts: Dict[str, int] = {}  # key -> trigram count
+        self._aliases: Dict[str, str] = {}
+        self._learned: Dict = {"aliases": {}, "entries": []}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._aliases.update(REBRAND_NAMES)
+            self._aliases.update(ALIASES)
+            try:
+                with open(self.path, "r", encoding="utf-8", newline="") as f:
+                    for row in csv.DictReader(f):
+                        self._add_entry(row["symbol"], row["name"], row["exchange"], row["currency"])
+            except OSError as e:
+                print(f"[SYMBOLS] Could not read {self.path}: {e}")
+            self._load_learned()
+            self._keys.sort()
+            self._loaded = True
+
+    def _load_learned(self) -> None:
+        if not self.learned_path:
+            return
+        try:
+            with open(self.learned_path, "r", encoding="utf-8") as f:
+                learned = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._learned = {"aliases": learned.get("aliases", {}), "entries": learned.get("entries", [])}
+        for entry in self._learned["entries"]:
+            self._add_entry(entry["ticker"], entry["name"], entry.get("exchange", ""), entry.get("currency", ""))
+        self._aliases.update(self._learned["aliases"])
+
+    def _add_entry(self, ticker: str, name: str, exchange: str, currency: str, sort: bool = False) -> None:
+        ticker = ticker.strip().upper()
+        if not ticker or ticker in self._by_ticker:
+            return
+        index = len(self._entries)
+        self._entries.append({"ticker": ticker, "name": name.strip(), "currency": currency, "exchange": exchange})
+        self._by_ticker[ticker] = index
+
+        keys = {normalize(name), normalize(re.sub(r"\(.*?\)", " ", name)), normalize(_base_symbol(ticker))}
+        keys.update(normalize(inner) for inner in re.findall(r"\((.*?)\)", name))
+        for key in keys:
+            if not key:
+                continue
+            if sort:
+                bisect.insort(self._keys, (key, index))
+            else:
+                self._keys.append((key, index))
+            self._exact.setdefault(key, []).append(index)
+            if key not in self._gram_counts:
+                grams = _trigrams(key)
+                self._gram_counts[key] = len(grams)
+                for gram in grams:
+                    self._grams.setdefault(gram, []).append(key)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def _candidates(self, query: str) -> Dict[int, float]:
+        """Entry index -> best score in [0, 1] for this query."""
+        scores: Dict[int, float] = {}
+
+        def offer(index: int, score: float) -> None:
+            if score > scores.get(index, 0.0):
+                scores[index] = score
+
+        ticker = _apply_rebrand(query.strip().upper())
+        if ticker in self._by_ticker:
+            offer(self._by_ticker[ticker], 1.0)
+
+        q = normalize(query)
+        if not q:
+            return scores
+
+        if q in self._aliases and self._aliases[q] in self._by_ticker:
+            offer(self._by_ticker[self._aliases[q]], 1.0)
+
+        for index in self._exact.get(q, []):
+            offer(index, 0.95)
+
+        # Prefix: longer share of the key -> higher score; a word fragment
+        # that only one company starts with is treated as confident. A whole
+        # word ("tech", "power") is too generic to skip the LLM on.
+        if len(q) >= 2:
+            start = bisect.bisect_left(self._keys, (q, -1))
+            prefixed = []
+            whole_word = False
+            for key, index in self._keys[start:]:
+                if not key.startswith(q):
+                    break
+                prefixed.append(index)
+                whole_word = whole_word or key[len(q):len(q) + 1] == " "
+                offer(index, 0.6 + 0.3 * len(q) / len(key))
+            companies = {self._entries[i]["name"] for i in prefixed}
+            if len(q) >= 4 and len(companies) == 1 and not whole_word:
+                for index in prefixed:
+                    offer(index, 0.9)
+
+        # Trigram (Dice) similarity against every key sharing a trigram
+        grams = _trigrams(q)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        for key, overlap in shared.items():
+            dice = 2.0 * overlap / (len(grams) + self._gram_counts[key])
+            if dice >= 0.3:
+                for index in self._exact[key]:
+                    offer(index, 0.9 * dice)
+        return scores
+
+    def _ranked(self, query: str) -> List[tuple]:
+        scores = self._candidates(query)
+        return sorted(
+            scores.items(),
+            key=lambda item: (-round(item[1], 3), EXCHANGE_PRIORITY.get(self._entries[item[0]]["exchange"], 2),
+                              self._entries[item[0]]["ticker"])
+        )
+
+    def lookup(self, ticker: str) -> Optional[Dict]:
+        """Exact listing for a ticker, or None."""
+        self._ensure_loaded()
+        index = self._by_ticker.get(ticker.strip().upper())
+        return dict(self._entries[index]) if index is not None else None
+
+    def tickers(self) -> List[str]:
+        self._ensure_loaded()
+        with self._lock:
+            return [entry["ticker"] for entry in self._entries]
+
+    def suggest(self, query: str, limit: int = 8) -> List[Dict]:
+        """Best matches first, each with a 'score' (search-as-you-type)."""
+        self._ensure_loaded()
+        with self._lock:
+            ranked = self._ranked(query)[:limit]
+            return [{**self._entries[index], "score": round(score, 3)} for index, score in ranked]
+
+    def resolve(self, query: str) -> Optional[Dict]:
+        """The confident best match for query, or None (ask the LLM)."""
+        best = self.suggest(query, limit=1)
+        if best and best[0]["score"] >= RESOLVER_MIN_SCORE:
+            return {**best[0], "source": "index"}
+        return None
+
+    # ------------------------------------------------------------------
+    # Learning
+    # ------------------------------------------------------------------
+    def learn(self, query: str, result: Dict) -> bool:
+        """
+        Record an LLM resolution so the same query is answered locally next
+        time. Unknown tickers are added as new entries. Returns False if the
+        result doesn't look like a ticker.
+        """
+        if not isinstance(result, dict) or result.get("error"):
+            return False
+        ticker = _apply_rebrand(str(result.get("ticker") or "").strip().upper())
+        key = normalize(query)
+        if not key or not _VALID_TICKER.match(ticker):
+            return False
+
+        self._ensure_loaded()
+        with self._lock:
+            if ticker not in self._by_ticker:
+                entry = {
+                    "ticker": ticker,
+                    "name": str(result.get("name") or ticker),
+                    "currency": str(result.get("currency") or ""),
+                    "exchange": str(result.get("exchange") or ""),
+                }
+                self._add_entry(entry["ticker"], entry["name"], entry["exchange"], entry["currency"], sort=True)
+                self._learned["entries"].append(entry)
+            elif self._aliases.get(key) == ticker:
+                return True
+            self._aliases[key] = ticker
+            self._learned["aliases"][key] = ticker
+            self._save_learned()
+        return True
+
+    def _save_learned(self) -> None:
+        if not self.learned_path:
+            return
+        try:
+            directory = os.path.dirname(self.learned_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.learned_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._learned, f, indent=1)
+            os.replace(tmp_path, self.learned_path)
+        except OSError as e:
+            print(f"[SYMBOLS] Could not save learned symbols: {e}")
+
+    def stats(self) -> Dict:
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "keys": len(self._exact),
+                "aliases": len(self._aliases),
+                "learned": len(self._learned["aliases"]),
+            }
+
+
+SYMBOL_INDEX = SymbolIndex(SYMBOLS_PATH, LEARNED_SYMBOLS_PATH)
+
+
+__all__ = ['SymbolIndex', 'SYMBOL_INDEX', 'ALIASES', 'REBRANDS', 'normalize']
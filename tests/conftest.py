@@ -0,0 +1,29 @@
+import time
+import types
+
+import pytest
+
+
+class Clock:
+    """Fake clock for modules that `import time`; tests move it with clock.now += seconds."""
+
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        self._monkeypatch = monkeypatch
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def install(self, module, wall=False):
+        """Point module.time at this clock: monotonic only, or wall time too."""
+        fake = types.SimpleNamespace(monotonic=self.monotonic, time=self.time if wall else time.time)
+        self._monkeypatch.setattr(module, "time", fake)
+        return self
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    return Clock(monkeypatch)
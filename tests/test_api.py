@@ -0,0 +1,17 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.backend import main
+
+
+@pytest.mark.parametrize("ticker", ["", "  "])
+def test_stream_rejects_blank_ticker(ticker, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(main, "record_request", recorded.append)
+    response = TestClient(main.app).get("/api/analyze/stream", params={"ticker": ticker})
+    assert response.status_code == 400
+    assert recorded == []
@@ -0,0 +1,244 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from api.backend import brain
+from api.backend.cache import content_key
+from api.backend.metrics import PROMPT_METRICS
+
+
+VERDICT = json.dumps({"verdict": "BUY", "confidence": 70, "reasons": ["a", "b", "c"], "ai_explanation": "ok"})
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Plays back scripted outcomes: a string answers, an exception raises, a number hangs that long."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def generate_content(self, prompt):
+        self.calls.append((prompt, False))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return Response(outcome)
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.calls.append((prompt, stream))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, (int, float)):
+            await asyncio.sleep(outcome)
+            return Response(VERDICT)
+        return Response(outcome)
+
+
+@pytest.fixture
+def analyst(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    brain.LLM_CACHE.memory.clear()
+    analyst = brain.FinancialAnalyst()
+    yield analyst
+    brain.LLM_CACHE.memory.clear()
+
+
+@pytest.fixture
+def jitter(monkeypatch):
+    """Record each backoff bound and skip the sleep itself."""
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append(high)
+        return 0.0
+
+    monkeypatch.setattr(brain.random, "uniform", uniform)
+    return bounds
+
+
+def test_retries_back_off_exponentially_up_to_the_cap(analyst, jitter, monkeypatch):
+    monkeypatch.setattr(brain, "LLM_BACKOFF_BASE", 1.0)
+    monkeypatch.setattr(brain, "LLM_BACKOFF_CAP", 3.0)
+    analyst.model = StubModel(RuntimeError("429"), RuntimeError("503"), RuntimeError("500"), VERDICT)
+
+    text = asyncio.run(analyst._generate_async("prompt", deadline=5, retries=4))
+    assert text == VERDICT
+    assert jitter == [1.0, 2.0, 3.0]
+    assert len(analyst.model.calls) == 4
+
+
+def test_out_of_retries_raises_last_error(analyst, jitter):
+    analyst.model = StubModel(RuntimeError("first"), RuntimeError("last"))
+    with pytest.raises(RuntimeError, match="last"):
+        asyncio.run(analyst._generate_async("prompt", deadline=5, retries=2))
+    # No backoff after the final attempt
+    assert len(jitter) == 1
+
+
+def test_deadline_covers_all_attempts(analyst, jitter):
+    # Each attempt hangs; a per-attempt deadline would take 3 x 0.2s
+    analyst.model = StubModel(10, 10, 10)
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(analyst._generate_async("prompt", deadline=0.2, retries=3))
+    assert time.monotonic() - started < 0.4
+    assert len(analyst.model.calls) == 1
+
+
+def test_backoff_never_sleeps_past_the_deadline(analyst, monkeypatch):
+    monkeypatch.setattr(brain.random, "uniform", lambda low, high: 10.0)
+    analyst.model = StubModel(RuntimeError("503"), VERDICT)
+    started = time.monotonic()
+    with pytest.raises(RuntimeError):
+        asyncio.run(analyst._generate_async("prompt", deadline=0.2, retries=2))
+    assert time.monotonic() - started < 0.4
+    assert len(analyst.model.calls) == 1
+
+
+def test_stream_fallback_records_the_prompt_once(analyst, jitter):
+    analyst.model = StubModel(RuntimeError("stream refused"), VERDICT)
+    before = PROMPT_METRICS.snapshot().get("analysis", {}).get("prompts", 0)
+
+    async def collect():
+        return [event async for event in analyst.analyze_stream("stream fallback context")]
+
+    events = asyncio.run(collect())
+    assert [kind for kind, _ in events] == ["analysis"]
+    assert events[0][1]["verdict"] == "BUY"
+    assert [stream for _, stream in analyst.model.calls] == [True, False]
+    assert PROMPT_METRICS.snapshot()["analysis"]["prompts"] == before + 1
+
+
+def test_identical_prompts_hit_the_response_cache(analyst):
+    analyst.model = StubModel(VERDICT)
+    first = asyncio.run(analyst.analyze_async("cache context"))
+    second = asyncio.run(analyst.analyze_async("cache context"))
+    assert (first["cache"], second["cache"]) == ("miss", "hit")
+    assert second["verdict"] == first["verdict"] == "BUY"
+    assert len(analyst.model.calls) == 1
+    # The sync path shares the cache
+    assert analyst.analyze("cache context")["cache"] == "hit"
+
+
+def test_changed_context_misses(analyst):
+    analyst.model = StubModel(VERDICT, VERDICT)
+    asyncio.run(analyst.analyze_async("cache context"))
+    assert asyncio.run(analyst.analyze_async("other context"))["cache"] == "miss"
+    assert len(analyst.model.calls) == 2
+
+
+def test_fallback_answers_are_not_cached(analyst, jitter):
+    analyst.model = StubModel("not json", RuntimeError("503"), VERDICT)
+    assert "error" in asyncio.run(analyst.analyze_async("flaky context"))
+    assert "error" in analyst.analyze("flaky context")
+    assert asyncio.run(analyst.analyze_async("flaky context"))["cache"] == "miss"
+    assert len(analyst.model.calls) == 3
+
+
+def test_no_model_response_is_not_cached(analyst):
+    result = asyncio.run(analyst.analyze_async("keyless context"))
+    assert "error" in result
+    key = content_key(analyst.model_name, analyst._analysis_prompt("keyless context"))
+    assert brain.LLM_CACHE.get(key) is None
+
+
+def market(source="yfinance", price=100.0):
+    return {"price_data": {"price": price, "change_percent": 1.0, "source": source}, "news": "", "social": ""}
+
+
+def test_batch_analyze_skips_mocked_prices(analyst, monkeypatch):
+    verdict = json.loads(VERDICT)
+    analyst.model = StubModel(json.dumps({"aaa": verdict, "BBB": verdict}))
+    monkeypatch.setattr(brain, "get_analyst", lambda profile="fast": analyst)
+
+    results = asyncio.run(brain.batch_analyze({"AAA": market(), "MOCK": market("Emergency Mock"), "BBB": market()}))
+    assert list(results) == ["AAA", "MOCK", "BBB"]
+    assert results["AAA"]["batched"] and results["BBB"]["verdict"] == "BUY"
+    assert "No live price data" in results["MOCK"]["error"]
+    # One model call, and the mocked ticker is not in its prompt
+    assert len(analyst.model.calls) == 1
+    prompt = analyst.model.calls[0][0]
+    assert "### TICKER: AAA" in prompt and "MOCK" not in prompt
+
+
+def test_batch_analyze_chunks_and_retries_malformed(analyst, monkeypatch):
+    verdict = json.loads(VERDICT)
+    monkeypatch.setattr(brain, "BATCH_ANALYZE_CHUNK", 2)
+    monkeypatch.setattr(brain, "get_analyst", lambda profile="fast": analyst)
+    # Chunk [A, B] drops B; chunk [C] answers; B is retried on its own
+    analyst.model = StubModel(json.dumps({"A": verdict}), json.dumps({"C": verdict}), VERDICT)
+
+    results = asyncio.run(brain.batch_analyze({"A": market(), "B": market(), "C": market()}))
+    assert [results[t]["verdict"] for t in "ABC"] == ["BUY"] * 3
+    assert results["B"].get("batched") is None
+    assert len(analyst.model.calls) == 3
+
+
+@pytest.fixture
+def slo(analyst, monkeypatch):
+    monkeypatch.setattr(brain, "get_analyst", lambda profile="fast": analyst)
+    brain.VERDICT_STORE.clear()
+    yield analyst
+    brain.VERDICT_STORE.clear()
+
+
+def slo_analyze(ticker, slo_ms, price=100.0, **kwargs):
+    return brain.quick_analyze_slo(ticker, market(price=price)["price_data"], "", "", {"atr_percent": 5.0},
+                                   slo_ms=slo_ms, sentiment=0.6, **kwargs)
+
+
+def test_slow_llm_gives_provisional_verdict_then_poll_is_ready(slo):
+    slo.model = StubModel(0.3, 0.3)
+
+    async def run():
+        first = await slo_analyze("SLOW", 50)
+        pending = brain.verdict_status("slow")
+        await brain._PENDING_VERDICTS["SLOW"]
+        await asyncio.sleep(0)
+        ready = brain.verdict_status("slow")
+        # The next miss (new price, new prompt) serves the finished LLM verdict
+        later = await slo_analyze("SLOW", 50, price=101.0)
+        await brain._PENDING_VERDICTS["SLOW"]
+        return first, pending, ready, later
+
+    first, pending, ready, later = asyncio.run(run())
+    assert first["provisional"] and first["source"] == "rules" and first["risk_level"] == "HIGH"
+    assert pending["status"] == "pending"
+    assert ready["status"] == "ready" and ready["analysis"]["verdict"] == "BUY"
+    assert later["source"] == "previous" and not later["provisional"]
+    assert len(slo.model.calls) == 2
+
+
+def test_fast_llm_answers_within_the_slo(slo, monkeypatch):
+    slo.model = StubModel(VERDICT)
+    result = asyncio.run(slo_analyze("FAST", 1000))
+    assert result["verdict"] == "BUY" and "provisional" not in result
+
+    # A fresh stored verdict is reused without another call
+    monkeypatch.setattr(brain, "VERDICT_REUSE_SECONDS", 60.0)
+    assert asyncio.run(slo_analyze("FAST", 1000))["source"] == "stored"
+    assert len(slo.model.calls) == 1
+
+
+def test_verdict_poll_endpoint(slo):
+    from fastapi.testclient import TestClient
+    from api.backend.main import app
+
+    brain.VERDICT_STORE.set("POLL", {**json.loads(VERDICT), "completed_at": time.time()})
+    client = TestClient(app)
+    ready = client.get("/api/analyze/verdict", params={"ticker": "poll"}).json()
+    assert ready["status"] == "ready" and ready["analysis"]["verdict"] == "BUY"
+    assert client.get("/api/analyze/verdict", params={"ticker": "NONE"}).json()["status"] == "unknown"
+    assert client.get("/api/analyze/verdict", params={"ticker": " "}).status_code == 400
@@ -0,0 +1,150 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from api.backend import cache
+from api.backend.cache import SingleFlight, TTLCache
+
+
+@pytest.fixture
+def clock(clock):
+    return clock.install(cache)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for background refresh")
+        time.sleep(0.01)
+
+
+def test_fresh_entry_is_a_hit(clock):
+    c = TTLCache("test_fresh", ttl=10)
+    c.set("k", 1)
+    clock.now += 9
+    assert c.get("k") == 1
+    assert c.get_or_load("k", lambda: 2) == 1
+    assert c.stats()["hits"] == 2
+
+
+def test_expired_entry_is_reloaded(clock):
+    c = TTLCache("test_expired", ttl=10, stale_ttl=5)
+    c.set("k", 1)
+    clock.now += 16
+    assert c.get("k") is None
+    assert c.get_or_load("k", lambda: 2) == 2
+    assert c.get("k") == 2
+
+
+def test_stale_entry_served_while_refreshing(clock):
+    c = TTLCache("test_stale", ttl=10, stale_ttl=5)
+    c.set("k", 1)
+    clock.now += 12
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return 2
+
+    # get() only returns fresh values; get_or_load serves the stale one
+    assert c.get("k") is None
+    assert c.get_or_load("k", loader) == 1
+    wait_for(lambda: c.stats()["refreshes"] == 1)
+    assert c.get("k") == 2
+    assert len(calls) == 1
+    assert c.stats()["stale_hits"] == 1
+
+
+def test_failed_refresh_keeps_stale_value(clock):
+    c = TTLCache("test_stale_failure", ttl=10, stale_ttl=5)
+    c.set("k", 1)
+    clock.now += 12
+
+    def loader():
+        raise RuntimeError("upstream down")
+
+    assert c.get_or_load("k", loader) == 1
+    wait_for(lambda: "k" not in c._refreshing)
+    assert c.get_or_load("k", lambda: 3) == 1
+
+
+def test_should_cache_rejects_value(clock):
+    c = TTLCache("test_should_cache", ttl=10)
+    value = c.get_or_load("k", lambda: {"source": "Emergency Mock"},
+                          should_cache=lambda v: v["source"] != "Emergency Mock")
+    assert value == {"source": "Emergency Mock"}
+    assert c.get("k") is None
+
+
+def test_lru_eviction(clock):
+    c = TTLCache("test_lru", ttl=10, max_size=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")  # "b" is now least recently used
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1 and c.get("c") == 3
+    assert c.stats()["evictions"] == 1
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight("test_flight")
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return "value"
+
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", fn)))
+    leader.start()
+    started.wait(2)
+    waiters = [threading.Thread(target=lambda: results.append(flight.do("k", fn))) for _ in range(3)]
+    for t in waiters:
+        t.start()
+    wait_for(lambda: flight.stats()["shared"] == 3)
+    release.set()
+    for t in [leader] + waiters:
+        t.join(2)
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {"leaders": 1, "shared": 3, "in_flight": 0}
+
+    # Nothing is remembered once the call has finished
+    assert flight.do("k", lambda: "again") == "again"
+
+
+def test_single_flight_shares_exceptions():
+    flight = SingleFlight("test_flight_errors")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do_coroutine("k", failing) for _ in range(3)), return_exceptions=True
+        )
+
+    errors = asyncio.run(run())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.stats()["leaders"] == 1
+
+
+def test_cache_stats_reports_every_cache_and_flight():
+    from api.backend import scrapers  # registers the quote/history/social caches and flights
+
+    stats = cache.cache_stats()
+    assert set(cache._REGISTRY).isdisjoint(cache._FLIGHTS)
+    assert "hits" in stats["social"] and "size" in stats["social"]
+    assert "leaders" in stats[scrapers.SOCIAL_FLIGHT.name]
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from api.backend import health
+from api.backend.health import CLOSED, HALF_OPEN, OPEN, ProviderHealth, ProviderRouter
+
+
+@pytest.fixture
+def clock(clock):
+    return clock.install(health)
+
+
+def fail():
+    raise RuntimeError("HTTP 429")
+
+
+def test_consecutive_failures_open_the_breaker(clock):
+    provider = ProviderHealth("p")
+    for _ in range(health.BREAKER_CONSECUTIVE - 1):
+        provider.record(False, 0.1)
+    assert provider.state == CLOSED
+    provider.record(False, 0.1)
+    assert provider.state == OPEN
+    assert not provider.available() and not provider.acquire()
+
+
+def test_error_rate_opens_the_breaker(clock):
+    provider = ProviderHealth("p")
+    # Alternating results never hit the consecutive limit
+    for i in range(health.BREAKER_MIN_CALLS - 1):
+        provider.record(i % 2 == 0, 0.1)
+    provider.record(False, 0.1)
+    assert provider.state == OPEN
+
+
+def test_half_open_allows_one_probe(clock):
+    provider = ProviderHealth("p")
+    for _ in range(health.BREAKER_CONSECUTIVE):
+        provider.record(False, 0.1)
+
+    clock.now += health.BREAKER_COOLDOWN
+    assert provider.available()
+    assert provider.acquire()
+    assert provider.state == HALF_OPEN
+    assert not provider.acquire()
+
+    provider.record(True, 0.1)
+    assert provider.state == CLOSED
+    assert provider.error_rate() == 0.0
+
+
+def test_failed_probe_reopens(clock):
+    provider = ProviderHealth("p")
+    for _ in range(health.BREAKER_CONSECUTIVE):
+        provider.record(False, 0.1)
+    clock.now += health.BREAKER_COOLDOWN
+    assert provider.acquire()
+    provider.record(False, 0.1)
+    assert provider.state == OPEN
+    assert not provider.acquire()
+
+
+def test_router_counts_only_exceptions_as_failures(clock):
+    router = ProviderRouter("test")
+    # An answer without data for this symbol is not a provider failure
+    for _ in range(health.BREAKER_CONSECUTIVE * 2):
+        assert router.call("yfinance", lambda: None) is None
+    assert router.health("yfinance").state == CLOSED
+    assert router.call("yfinance", lambda: {"price": 1.0}) == {"price": 1.0}
+
+    for _ in range(health.BREAKER_CONSECUTIVE):
+        assert router.call("yfinance", fail) is None
+    assert router.health("yfinance").state == OPEN
+    # Open and cooling down: fn is not called at all
+    assert router.call("yfinance", lambda: {"price": 1.0}) is None
+
+
+def test_router_ranks_healthy_providers_first(clock):
+    router = ProviderRouter("test")
+    for _ in range(health.BREAKER_CONSECUTIVE):
+        router.call("a", fail)
+    router.call("b", lambda: {"price": 1.0})
+    router.call("b", fail)  # degraded: 50% errors, still closed
+
+    assert router.ranked(["a", "b", "c"]) == ["c", "b"]
+    clock.now += health.BREAKER_COOLDOWN
+    assert router.ranked(["a", "b", "c"]) == ["c", "b", "a"]
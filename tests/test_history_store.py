@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from api.backend import history_store
+from api.backend.history_store import HistoryStore, bars_from_columns, period_start
+
+
+def make_bars(days, close=1.0):
+    """One bar per ISO date, every price set to close."""
+    n = len(days)
+    return bars_from_columns(days, [close] * n, [close] * n, [close] * n, [close] * n, [100] * n)
+
+
+def recent_days(count, end=None):
+    end = end or date.today()
+    return [(end - timedelta(days=i)).isoformat() for i in range(count - 1, -1, -1)]
+
+
+def test_plan_sync_empty_store_fetches_whole_period(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    start = period_start("1y")
+    assert store.plan_sync("AAPL", "1y") == (start, start, True)
+
+
+def test_plan_sync_covered_and_fresh_needs_nothing(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    start = period_start("1y")
+    store.merge("AAPL", make_bars(recent_days(5)), "yfinance", start, True)
+
+    assert store.plan_sync("AAPL", "1y") is None
+    # A shorter period is inside the covered range too
+    assert store.plan_sync("AAPL", "1mo") is None
+
+
+def test_plan_sync_longer_period_backfills(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.merge("AAPL", make_bars(recent_days(5)), "yfinance", period_start("1mo"), True)
+
+    start = period_start("1y")
+    assert store.plan_sync("AAPL", "1y") == (start, start, True)
+    assert store.plan_sync("AAPL", "max") == (None, None, True)
+
+
+def test_plan_sync_stale_refetches_from_last_bar(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    days = recent_days(5, end=date.today() - timedelta(days=2))
+    store.merge("AAPL", make_bars(days), "yfinance", period_start("1y"), True)
+    monkeypatch.setattr(history_store, "HISTORY_SYNC_INTERVAL", 0)
+
+    assert store.plan_sync("AAPL", "1y") == (date.fromisoformat(days[-1]), None, False)
+
+
+def test_merge_new_bars_win_on_overlap_and_stay_sorted(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.merge("AAPL", make_bars(["2024-01-02", "2024-01-03"], close=1.0), "yfinance", date(2024, 1, 1), True)
+    # Tail re-fetch: the partial last day is replaced, a new day appended
+    store.merge("AAPL", make_bars(["2024-01-04", "2024-01-03"], close=2.0), "yfinance", None, False)
+
+    bars = store.read("AAPL")
+    assert [str(t) for t in bars["time"]] == ["2024-01-02", "2024-01-03", "2024-01-04"]
+    assert bars["close"].tolist() == [1.0, 2.0, 2.0]
+    assert store.meta("AAPL")["bars"] == 3
+
+
+def test_merge_covered_range_only_moves_on_backfill(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.merge("AAPL", make_bars(["2024-06-03"]), "yfinance", date(2024, 6, 1), True)
+
+    store.merge("AAPL", make_bars(["2024-06-04"]), "yfinance", None, False)
+    assert store.meta("AAPL")["covered_from"] == "2024-06-01"
+
+    store.merge("AAPL", make_bars(["2024-01-02"]), "yfinance", date(2024, 1, 1), True)
+    assert store.meta("AAPL")["covered_from"] == "2024-01-01"
+
+    # A later, shorter backfill doesn't shrink the covered range
+    store.merge("AAPL", make_bars(["2024-03-01"]), "yfinance", date(2024, 3, 1), True)
+    assert store.meta("AAPL")["covered_from"] == "2024-01-01"
+
+    # "max" (None) covers everything from then on
+    store.merge("AAPL", make_bars(["2020-01-02"]), "yfinance", None, True)
+    assert store.meta("AAPL")["covered_from"] is None
+
+
+def test_read_slices_from_start(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.merge("AAPL", make_bars(["2024-01-02", "2024-01-03", "2024-01-04"]), "yfinance", None, True)
+
+    bars = store.read("AAPL", date(2024, 1, 3))
+    assert [str(t) for t in bars["time"]] == ["2024-01-03", "2024-01-04"]
+    assert len(store.read("MSFT")) == 0
+
+
+def test_bars_from_columns_drops_missing_closes():
+    bars = bars_from_columns(["2024-01-02", "2024-01-03"], [1, 2], [1, 2], [1, 2], [1, "nan"], [5, 6])
+    assert len(bars) == 1
+    assert bars["time"][0] == np.datetime64("2024-01-02")
@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+
+import numpy as np
+import pytest
+
+from api.backend.history_store import bars_from_columns
+from api.backend.indicators import atr, compute_indicators, ema, rsi, sma, volume_zscore
+
+
+# Reference implementations: plain loops, one value at a time
+def ref_sma(x, n):
+    out = []
+    for i in range(len(x)):
+        window = [v for v in x[max(0, i - n + 1):i + 1] if not math.isnan(v)] if i >= n - 1 else []
+        out.append(sum(window) / len(window) if window else math.nan)
+    return out
+
+
+def ref_smooth(x, n, alpha):
+    out = [math.nan] * len(x)
+    if len(x) < n:
+        return out
+    out[n - 1] = sum(x[:n]) / n
+    for i in range(n, len(x)):
+        out[i] = alpha * x[i] + (1 - alpha) * out[i - 1]
+    return out
+
+
+def ref_rsi(close, n=14):
+    gains = [max(b - a, 0.0) for a, b in zip(close, close[1:])]
+    losses = [max(a - b, 0.0) for a, b in zip(close, close[1:])]
+    avg_gain, avg_loss = ref_smooth(gains, n, 1 / n)[-1], ref_smooth(losses, n, 1 / n)[-1]
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def ref_atr(high, low, close, n=14):
+    prev = [close[0]] + close[:-1]
+    true_range = [max(h - l, abs(h - p), abs(l - p)) for h, l, p in zip(high, low, prev)]
+    return ref_smooth(true_range, n, 1 / n)[-1]
+
+
+CLOSE = [44.34, 44.09, 44.15, 43.61, 44.33, 44.83, 45.10, 45.42, 45.84, 46.08, 45.89, 46.03, 45.61,
+         46.28, 46.28, 46.00, 46.03, 46.41, 46.22, 45.64, 46.21, 46.25, 45.71, 46.45, 45.78, 45.35]
+HIGH = [c + 0.5 + (i % 3) * 0.1 for i, c in enumerate(CLOSE)]
+LOW = [c - 0.4 - (i % 2) * 0.1 for i, c in enumerate(CLOSE)]
+
+
+def test_sma_matches_reference():
+    assert np.allclose(sma(CLOSE, 5), ref_sma(CLOSE, 5), equal_nan=True)
+
+
+def test_ema_matches_reference():
+    assert np.allclose(ema(CLOSE, 10), ref_smooth(CLOSE, 10, 2 / 11), equal_nan=True)
+
+
+def test_rsi_matches_reference():
+    assert rsi(CLOSE)[-1] == pytest.approx(ref_rsi(CLOSE))
+    # Flat and only-rising series have fixed values
+    assert rsi([1.0] * 20)[-1] == 50.0
+    assert rsi(list(range(20)))[-1] == 100.0
+
+
+def test_atr_matches_reference():
+    assert atr(HIGH, LOW, CLOSE)[-1] == pytest.approx(ref_atr(HIGH, LOW, CLOSE))
+
+
+def test_batch_rows_match_single_series():
+    rows = np.array([CLOSE, CLOSE[::-1]])
+    assert np.allclose(sma(rows, 5)[1], sma(CLOSE[::-1], 5), equal_nan=True)
+    assert np.allclose(rsi(rows)[:, -1], [rsi(CLOSE)[-1], rsi(CLOSE[::-1])[-1]])
+
+
+def test_nan_bar_only_affects_its_own_window():
+    x = [float(v) for v in range(1, 31)]
+    x[10] = math.nan
+    out = sma(x, 5)
+    assert out[12] == pytest.approx(np.mean([9, 10, 12, 13]))
+    assert out[-1] == pytest.approx(np.mean(range(26, 31)))
+    assert np.allclose(out, ref_sma(x, 5), equal_nan=True)
+    # A smoothed series carries over the gap
+    assert np.isfinite(ema(x, 5)[-1])
+
+
+def test_nan_volume_or_range_keeps_indicators():
+    n = 80
+    close = 100 + np.sin(np.arange(n) / 5) * 5
+    volume = np.full(n, 1_000_000.0) + np.arange(n) * 1000
+    high, low = close + 1, close - 1
+    volume[30] = np.nan
+    high[40] = np.nan
+    days = [str(np.datetime64("2024-01-01") + i) for i in range(n)]
+    bars = bars_from_columns(days, close, high, low, close, volume)
+
+    snapshot = compute_indicators(bars)
+    assert snapshot["volume_z"] is not None
+    assert snapshot["atr_14"] is not None
+    assert np.isfinite(volume_zscore(volume)[-1])
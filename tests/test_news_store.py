@@ -0,0 +1,100 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.backend.news_store import NewsStore, article_keys, canonical_link
+
+
+def article(title, source="Reuters", link=None, published="2024-05-01T10:00:00"):
+    return {"title": title, "source": source, "link": link, "published": published}
+
+
+def test_canonical_link_strips_only_tracking_params():
+    link = "https://News.Example.com/story/?id=7&salesid=1&eid=2&utm_source=x&ved=abc&sa=U#top"
+    assert canonical_link(link) == "https://news.example.com/story?id=7&salesid=1&eid=2"
+    assert canonical_link(None) is None
+
+
+def test_article_keys_same_headline_other_outlet_is_a_new_article():
+    first = article_keys(article("Tesla beats delivery estimates", "Reuters"))
+    second = article_keys(article("Tesla Beats Delivery Estimates!", "Bloomberg"))
+    assert first[1] != second[1]
+    assert first == article_keys(article("tesla beats delivery estimates", "reuters"))
+
+
+def test_ingest_returns_only_unseen_articles(tmp_path):
+    store = NewsStore(str(tmp_path / "news.sqlite"))
+    first = [
+        article("Tesla beats delivery estimates", link="https://a.com/1?utm_source=feed"),
+        article("Tesla recalls Model Y over seat belts", link="https://a.com/2"),
+    ]
+    delta = store.ingest("TSLA", first)
+    assert [a["title"] for a in delta] == [a["title"] for a in first]
+    assert all("story_id" in a and a["score"] is not None for a in delta)
+
+    # Same URL without tracking params, and a repeat within one poll
+    second = [
+        article("Tesla beats delivery estimates", link="https://a.com/1"),
+        article("Tesla opens new factory in Mexico", link="https://a.com/3"),
+        article("Tesla opens new factory in Mexico", link="https://a.com/3"),
+    ]
+    delta = store.ingest("TSLA", second)
+    assert [a["title"] for a in delta] == ["Tesla opens new factory in Mexico"]
+
+    # Other tickers are stored separately
+    assert len(store.ingest("AAPL", first)) == 2
+
+
+def test_similar_headlines_cluster_into_one_story(tmp_path):
+    store = NewsStore(str(tmp_path / "news.sqlite"))
+    store.ingest("TSLA", [
+        article("Tesla beats delivery estimates for second quarter", "Reuters", "https://a.com/1",
+                "2024-05-01T10:00:00"),
+        article("Tesla recalls Model Y over seat belts", "CNBC", "https://b.com/2", "2024-05-01T09:00:00"),
+    ])
+    store.ingest("TSLA", [
+        article("Tesla beats delivery estimates for the second quarter", "Bloomberg", "https://c.com/3",
+                "2024-05-01T11:00:00"),
+    ])
+
+    stories = store.stories("TSLA")
+    assert len(stories) == 2
+    top = stories[0]
+    assert top["title"] == "Tesla beats delivery estimates for second quarter"
+    assert top["sources"] == ["Reuters", "Bloomberg"]
+    assert top["coverage"] == 2
+    assert top["published"] == "2024-05-01T11:00:00"
+    assert stories[1]["coverage"] == 1
+
+
+def test_stories_limit_and_empty_ticker(tmp_path):
+    store = NewsStore(str(tmp_path / "news.sqlite"))
+    titles = ["Tesla recalls Model Y", "Musk sells more shares", "Cybertruck deliveries slip"]
+    store.ingest("TSLA", [
+        article(title, link=f"https://a.com/{i}", published=f"2024-05-0{i + 1}")
+        for i, title in enumerate(titles)
+    ])
+    stories = store.stories("TSLA", limit=2)
+    assert [s["published"] for s in stories] == ["2024-05-03", "2024-05-02"]
+    assert store.stories("MSFT") == []
+
+
+def test_sync_polls_only_when_due(tmp_path):
+    store = NewsStore(str(tmp_path / "news.sqlite"))
+    polls = []
+
+    def poll(last_synced):
+        polls.append(last_synced)
+        return [article("Tesla beats delivery estimates", link="https://a.com/1")]
+
+    assert len(store.sync("TSLA", poll)) == 1
+    assert polls == [None]
+
+    # Polled moments ago: served from the store without calling upstream
+    assert store.sync("TSLA", poll) == []
+    assert len(polls) == 1
+
+    # force polls anyway, passing the last poll time; the article is known
+    last = store.synced_at("TSLA")
+    assert store.sync("TSLA", poll, force=True) == []
+    assert polls == [None, last]
@@ -0,0 +1,138 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import types
+import asyncio
+
+import pytest
+
+from api.backend import prefetch
+from api.backend.prefetch import PopularityTracker, PrefetchScheduler, TokenBucket
+
+
+@pytest.fixture
+def clock(clock):
+    return clock.install(prefetch, wall=True)
+
+
+@pytest.fixture
+def sleeps(clock, monkeypatch):
+    """Bucket waits advance the fake clock instead of sleeping."""
+    slept = []
+
+    async def sleep(seconds):
+        slept.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(prefetch, "asyncio", types.SimpleNamespace(sleep=sleep))
+    return slept
+
+
+def test_token_bucket_bursts_then_paces(clock, sleeps):
+    bucket = TokenBucket(60)  # one per second, bursts of 10
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(take(10))
+    assert sleeps == []
+    asyncio.run(take(1))
+    assert sleeps == [pytest.approx(1.0)]
+
+    # Idle time refills, but never past capacity
+    clock.now += 60
+    asyncio.run(take(10))
+    assert len(sleeps) == 1
+
+
+def test_popularity_decays_by_half_life(clock):
+    tracker = PopularityTracker(half_life=100)
+    for _ in range(4):
+        tracker.record("aaa")
+    tracker.record("BBB")
+    tracker.record(" ")
+    assert tracker.top(5) == [("AAA", 4.0), ("BBB", 1.0)]
+
+    clock.now += 100
+    tracker.record("bbb", weight=2)
+    assert tracker.top(5) == [("BBB", 2.5), ("AAA", 2.0)]
+    assert tracker.top(5, min_score=2.2) == [("BBB", 2.5)]
+
+
+def test_popularity_forgets_the_coldest_half(clock):
+    tracker = PopularityTracker(max_tracked=4)
+    for hits, ticker in enumerate(["A", "B", "C", "D", "E"], start=1):
+        tracker.record(ticker, weight=hits)
+    assert sorted(t for t, _ in tracker.top(10)) == ["C", "D", "E"]
+
+
+def test_targets_are_seeds_then_trending(clock):
+    tracker = PopularityTracker()
+    for ticker, hits in [("HOT", 5), ("SEED", 9), ("WARM", 3), ("COLD", 1)]:
+        for _ in range(hits):
+            tracker.record(ticker)
+    scheduler = PrefetchScheduler(tracker, top_n=2)
+    scheduler.seeds = ["SEED"]
+    # COLD is below PREFETCH_MIN_HITS; SEED is not counted twice
+    assert scheduler.targets() == ["SEED", "HOT", "WARM"]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Stub refresh functions; BAD fails and NEW has no full quote yet."""
+    calls = []
+
+    def refresh_quotes(tickers):
+        calls.append(("quotes", list(tickers)))
+        return [t for t in tickers if t == "NEW"]
+
+    def refresh(kind):
+        def run(ticker):
+            calls.append((kind, ticker))
+            if ticker == "BAD":
+                raise RuntimeError("HTTP 500")
+        return run
+
+    monkeypatch.setattr(prefetch, "refresh_quotes", refresh_quotes)
+    for kind in ("quote", "history", "news", "social"):
+        monkeypatch.setattr(prefetch, f"refresh_{kind}", refresh(kind))
+    return calls
+
+
+def run_one_round(scheduler, seeds):
+    async def run():
+        scheduler.start(seeds)
+        for _ in range(200):
+            if all(stats["runs"] for stats in scheduler._stats.values()):
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    asyncio.run(run())
+
+
+def test_one_round_refreshes_every_kind(clock, upstream):
+    scheduler = PrefetchScheduler(PopularityTracker(), top_n=0,
+                                  intervals={kind: 100 for kind in prefetch.PREFETCH_INTERVALS},
+                                  rates={name: 6000 for name in prefetch.PREFETCH_RATES})
+    run_one_round(scheduler, ["aaa", "new", "bad", "aaa"])
+
+    assert scheduler.seeds == ["AAA", "NEW", "BAD"]
+    # One bulk quote call, then full quotes only where missing
+    assert [c for c in upstream if c[0] in ("quotes", "quote")] == [("quotes", ["AAA", "NEW", "BAD"]),
+                                                                  ("quote", "NEW")]
+    assert [t for kind, t in upstream if kind == "history"] == ["AAA", "NEW", "BAD"]
+
+    # A failing ticker is counted, not fatal to the round
+    snapshot = scheduler.snapshot()
+    assert not snapshot["running"] and set(snapshot["kinds"]) == {"price", "history", "news", "social"}
+    history = snapshot["kinds"]["history"]
+    assert history["runs"] == 1 and history["errors"] == 1 and history["last_error"].startswith("BAD")
+    assert snapshot["kinds"]["price"]["errors"] == 0
+
+
+def test_verdict_refresh_is_opt_in():
+    assert "verdict" not in PrefetchScheduler(PopularityTracker(), verdict=False)._kinds()
+    assert "verdict" in PrefetchScheduler(PopularityTracker(), verdict=True)._kinds()
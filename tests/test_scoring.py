@@ -0,0 +1,92 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from api.backend import scoring
+from api.backend.brain import rule_based_verdict
+from api.backend.scoring import market_factors, score_many, score_one
+
+
+def verdict(sentiment, pe, indicators=None):
+    market_data = {"price": {"pe": pe}, "sentiment": {"overall_score": sentiment}}
+    if indicators:
+        market_data["indicators"] = indicators
+    return rule_based_verdict(market_data)[0]
+
+
+@pytest.mark.parametrize("sentiment, pe, expected", [
+    (0.6, 20, "BUY"),
+    (0.41, 49, "BUY"),
+    (0.4, 20, "WAIT"),
+    (0.6, 50, "WAIT"),
+    (-0.5, 150, "SELL"),
+    (-0.3, 30, "SELL"),
+    (-0.21, 30, "SELL"),
+    (0.9, 101, "SELL"),
+    (-0.2, 50, "WAIT"),
+    (0.0, None, "WAIT"),
+    (None, None, "WAIT"),
+])
+def test_rule_based_verdict_keeps_original_thresholds(sentiment, pe, expected):
+    assert verdict(sentiment, pe) == expected
+
+
+def test_rule_based_verdict_uses_engine_with_indicators():
+    # Same sentiment / P/E as the SELL case above, but a strong uptrend
+    indicators = {"sma_50": 80.0, "atr_percent": 1.5, "volume_z": 1.5}
+    market_data = {"price": {"pe": 30, "price": 100.0}, "sentiment": {"overall_score": -0.3},
+                   "indicators": indicators}
+    assert rule_based_verdict(market_data)[0] == score_one(
+        market_data["price"], indicators, sentiment=-0.3)["signal"]
+
+
+def test_score_one_cutoffs():
+    # Sentiment alone: the score is the sentiment itself
+    assert score_one(sentiment=scoring.SCORE_BUY_THRESHOLD)["signal"] == "BUY"
+    assert score_one(sentiment=scoring.SCORE_BUY_THRESHOLD - 0.01)["signal"] == "WAIT"
+    assert score_one(sentiment=scoring.SCORE_SELL_THRESHOLD)["signal"] == "SELL"
+    assert score_one(sentiment=scoring.SCORE_SELL_THRESHOLD + 0.01)["signal"] == "WAIT"
+    # P/E above the cap is a SELL whatever the rest says
+    assert score_one({"pe": scoring.PE_SELL_ABOVE + 1}, sentiment=1.0)["signal"] == "SELL"
+
+
+def test_score_one_sentiment_and_pe_cases():
+    assert score_one({"pe": 20}, sentiment=0.6) == {
+        "signal": "BUY", "confidence": 48, "score": 0.6, "coverage": 0.6,
+        "reasons": ["Strong positive sentiment", "Attractive valuation"],
+        "factors": {"sentiment": 0.35, "valuation": 0.25},
+    }
+    assert score_one({"pe": 150}, sentiment=-0.5)["signal"] == "SELL"
+    # Weighted engine: mild negative sentiment offset by a fair P/E
+    assert score_one({"pe": 30}, sentiment=-0.3)["signal"] == "WAIT"
+
+
+def test_missing_factors_lower_coverage_not_score():
+    assert score_one(sentiment=0.5)["score"] == 0.5
+    assert score_one(sentiment=0.5)["coverage"] == pytest.approx(scoring.DEFAULT_WEIGHTS["sentiment"])
+    empty = score_one()
+    assert empty["signal"] == "WAIT" and empty["coverage"] == 0.0 and empty["confidence"] == 0
+
+
+def test_market_factors_from_quote_and_indicators():
+    factors = market_factors({"price": 110.0, "change_percent": -1.0, "pe": 25, "market_cap": "N/A"},
+                             {"sma_50": 100.0, "atr_percent": 2.0, "volume_z": 0.5}, sentiment=0.2)
+    assert factors == {"sentiment": 0.2, "pe": 25.0, "momentum": pytest.approx(10.0),
+                       "volatility": 2.0, "volume_change": 0.5}
+    # Without a 50-day average, today's move is the momentum; non-numbers are dropped
+    factors = market_factors({"price": 110.0, "change_percent": -1.0, "pe": "N/A"}, {})
+    assert factors["momentum"] == -1.0 and factors["pe"] is None
+
+
+def test_score_many_matches_score_one_per_row():
+    rows = [
+        market_factors({"pe": 20}, None, sentiment=0.6),
+        market_factors({"pe": 150}, None, sentiment=-0.5),
+        market_factors({"pe": 30}, None, sentiment=0.0),
+    ]
+    results = score_many(rows)
+    assert [r["signal"] for r in results] == ["BUY", "SELL", "WAIT"]
+    assert results == [score_many([row])[0] for row in rows]
+    assert score_many([]) == []
@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+
+import pytest
+
+from api.backend import sentiment
+from api.backend.sentiment import aggregate_sentiment, score_text, sentiment_label, shutdown_pool, vader_scores
+
+
+@pytest.mark.parametrize("text", ["dont buy", "don't buy", "this isnt bullish", "wont moon", "cant see it rally"])
+def test_negation_flips_bullish_terms(text):
+    assert sentiment_label(score_text(text)) == "🔴 Bearish"
+
+
+def test_negation_scope_ends_at_clause_break():
+    assert score_text("no way. buy") == score_text("buy")
+    assert score_text("no way, but buy") == score_text("buy")
+    assert sentiment_label(score_text("buy")) == "🟢 Bullish"
+
+
+def test_whole_words_only():
+    # "long" must not match inside "belong"
+    assert score_text("going long here") > 0
+    assert score_text("these belong to the fund") == 0
+
+
+@pytest.fixture
+def vader_calls(monkeypatch):
+    """Count the texts actually sent to VADER; start from an empty cache."""
+    sent = []
+    chunk = sentiment._vader_chunk
+
+    def counting(texts):
+        sent.extend(texts)
+        return chunk(texts)
+
+    sentiment.VADER_CACHE.clear()
+    monkeypatch.setattr(sentiment, "_vader_chunk", counting)
+    yield sent
+    sentiment.VADER_CACHE.clear()
+
+
+def test_vader_scores_each_text_once(vader_calls):
+    texts = ["Stock surges on record profit", "Shares plunge after fraud probe", "Stock surges on record profit"]
+    first = vader_scores(texts)
+    assert first[0] == first[2] and first[0] > 0 > first[1]
+    assert vader_calls == texts[:2]
+
+    # Later calls are served from the cache
+    assert vader_scores(texts[::-1]) == first[::-1]
+    assert len(vader_calls) == 2
+
+
+def test_large_batches_use_the_process_pool(monkeypatch):
+    monkeypatch.setattr(sentiment, "SENTIMENT_POOL_MIN", 4)
+    monkeypatch.setattr(sentiment, "SENTIMENT_WORKERS", 2)
+    sentiment.VADER_CACHE.clear()
+    texts = [f"Stock surges {i} percent on record profit" for i in range(6)]
+    try:
+        assert vader_scores(texts) == sentiment._vader_chunk(texts)
+        assert sentiment._pool is not None
+    finally:
+        shutdown_pool()
+        sentiment.VADER_CACHE.clear()
+    assert sentiment._pool is None
+
+
+def test_aggregate_sentiment_weights_news_and_posts():
+    news = [{"title": "a", "score": 0.5}, {"title": "b", "score": -0.1}]
+    social = [{"title": "c", "score": 0.9, "upvotes": 0}, {"title": "d", "score": -0.9, "upvotes": 100}]
+    result = aggregate_sentiment(news, social)
+
+    assert result["news_score"] == 0.2
+    heavy = 1 + math.log1p(100)
+    social_score = (0.9 - 0.9 * heavy) / (1 + heavy)
+    assert result["social_score"] == round(social_score, 3)
+    expected = sentiment.NEWS_SENTIMENT_WEIGHT * 0.2 + (1 - sentiment.NEWS_SENTIMENT_WEIGHT) * social_score
+    assert result["overall_score"] == round(expected, 3)
+    assert result["label"] == sentiment_label(expected)
+
+
+def test_aggregate_sentiment_one_side_or_nothing():
+    assert aggregate_sentiment([{"title": "a", "score": 0.4}])["overall_score"] == 0.4
+    assert aggregate_sentiment(None, [{"title": "c", "score": -0.3}])["overall_score"] == -0.3
+    empty = aggregate_sentiment([{"title": ""}], [])
+    assert empty["overall_score"] == 0.0 and empty["news"] == [] and empty["news_score"] is None
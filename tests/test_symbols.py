@@ -0,0 +1,37 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from api.backend.symbols import SYMBOLS_PATH, SymbolIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SymbolIndex(SYMBOLS_PATH)
+
+
+@pytest.mark.parametrize("query", ["tech", "bank", "power", "steel", "asian"])
+def test_generic_words_are_not_confident(index, query):
+    assert index.resolve(query) is None
+
+
+@pytest.mark.parametrize("query, ticker", [
+    ("tech mahindra", "TECHM.NS"),
+    ("TECHM", "TECHM.NS"),
+    ("infosys", "INFY.NS"),
+    ("reliance", "RELIANCE.NS"),
+    ("amazon", "AMZN"),
+    ("zomato", "ETERNAL.NS"),
+])
+def test_names_symbols_and_aliases_resolve(index, query, ticker):
+    assert index.resolve(query)["ticker"] == ticker
+
+
+def test_unique_word_fragment_is_confident(index):
+    # Half-typed names are still resolved without the LLM
+    assert index.resolve("infos")["ticker"] == "INFY.NS"
+    assert index.resolve("micro")["ticker"] == "MSFT"
+    # ...and a generic word still shows up as a suggestion
+    assert index.suggest("tech", 1)[0]["ticker"] == "TECHM.NS"